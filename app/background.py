@@ -0,0 +1,71 @@
+"""Фоновые периодические задачи внутри процесса приложения.
+
+Каждый воркер gunicorn запускает свои копии задач (в lifespan), поэтому
+сами задачи обязаны быть безопасны при параллельном запуске
+(SKIP LOCKED, advisory locks и т.п.).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+from collections.abc import Awaitable, Callable
+
+log = logging.getLogger(__name__)
+
+
+class PeriodicJob:
+    """Запускает `func` в цикле с паузой `interval` (+ случайный jitter).
+
+    Если `func` вернула True (есть ещё работа), следующий запуск - сразу.
+    `wake()` досрочно прерывает паузу (например, после постановки в очередь).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[], Awaitable[bool | None]],
+        *,
+        interval: float,
+        jitter: float = 0.0,
+    ) -> None:
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.jitter = jitter
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name=self.name)
+
+    def wake(self) -> None:
+        self._wakeup.set()
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                has_more = await self.func()
+            except Exception:
+                log.exception("Фоновая задача %s упала", self.name)
+                has_more = False
+            if has_more:
+                continue
+            delay = self.interval + random.uniform(0, self.jitter)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except TimeoutError:
+                pass
+            self._wakeup.clear()
@@ -0,0 +1,130 @@
+"""Склейка одновременных точечных запросов в один пакетный (DataLoader).
+
+Каждый `load(key)` ставит ключ в очередь; пакет уходит на следующей
+итерации event loop (call_soon) - то есть собирает все ключи, запрошенные
+в том же "такте", без искусственной задержки. Пока выполняются
+`max_concurrency` пакетов, новые ключи копятся и уходят одним пакетом,
+как только один из них завершится: под нагрузкой пакеты растут сами,
+в простое задержки нет.
+
+Это не кеш: ожидающие в очереди одинаковые ключи получают один результат,
+но ключ, запрошенный после отправки пакета, попадёт в следующий - ответ
+не старше самого запроса (read-your-writes сохраняется).
+
+Результаты общие для всех ожидающих, поэтому их нельзя менять
+(например, ORM-объекты из чужой сессии - только для чтения).
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable, Collection, Mapping
+from dataclasses import asdict, dataclass
+from typing import Any
+
+
+@dataclass
+class BatchLoaderStats:
+    """Счётчики загрузчика (на процесс)."""
+
+    loads: int = 0  # вызовов load()
+    keys: int = 0  # уникальных ключей, ушедших в пакеты
+    batches: int = 0
+    max_batch_size: int = 0
+    errors: int = 0  # пакетов, завершившихся исключением
+
+
+class BatchLoader[K, V]:
+    """`batch_fn(keys) -> {key: value}`; ключей нет в ответе - результат None."""
+
+    def __init__(
+        self,
+        name: str,
+        batch_fn: Callable[[list[K]], Awaitable[Mapping[K, V]]],
+        *,
+        max_batch_size: int,
+        max_concurrency: int,
+    ) -> None:
+        self.name = name
+        self.max_batch_size = max_batch_size
+        self.max_concurrency = max_concurrency
+        self._batch_fn = batch_fn
+        self._queue: dict[K, asyncio.Future[V | None]] = {}
+        self._running: set[asyncio.Task[None]] = set()
+        self._scheduled = False
+        self._stats = BatchLoaderStats()
+
+    async def load(self, key: K) -> V | None:
+        """Значение по ключу (None - не найдено), пакетом с соседними вызовами."""
+        self._stats.loads += 1
+        future = self._queue.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            # исключение пакета, которое никто не дождался (все отменены),
+            # не должно попадать в лог как "never retrieved"
+            future.add_done_callback(_consume_exception)
+            self._queue[key] = future
+            self._schedule()
+        # отмена одного ожидающего не отменяет результат для остальных
+        return await asyncio.shield(future)
+
+    async def load_many(self, keys: Collection[K]) -> dict[K, V]:
+        """Найденные значения по ключам (одним или несколькими пакетами)."""
+        values = await asyncio.gather(*(self.load(key) for key in keys))
+        return {key: value for key, value in zip(keys, values) if value is not None}
+
+    def _schedule(self) -> None:
+        if self._scheduled or not self._queue:
+            return
+        if len(self._running) >= self.max_concurrency:
+            return  # отправит _run_batch, когда освободится слот
+        self._scheduled = True
+        asyncio.get_running_loop().call_soon(self._dispatch)
+
+    def _dispatch(self) -> None:
+        self._scheduled = False
+        while self._queue and len(self._running) < self.max_concurrency:
+            keys = list(self._queue)[: self.max_batch_size]
+            batch = {key: self._queue.pop(key) for key in keys}
+            task = asyncio.create_task(self._run_batch(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run_batch(self, batch: dict[K, asyncio.Future[V | None]]) -> None:
+        self._stats.batches += 1
+        self._stats.keys += len(batch)
+        self._stats.max_batch_size = max(self._stats.max_batch_size, len(batch))
+        try:
+            result = await self._batch_fn(list(batch))
+        except asyncio.CancelledError:  # остановка приложения
+            for future in batch.values():
+                future.cancel()
+            raise
+        except Exception as exc:  # noqa: BLE001 - не глотаем: отдаём ожидающим
+            self._stats.errors += 1
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(exc)
+        else:
+            for key, future in batch.items():
+                if not future.done():
+                    future.set_result(result.get(key))
+        finally:
+            # задача ещё в _running до выхода из корутины - слот считаем
+            # свободным сразу, чтобы очередь ушла без лишнего такта
+            self._running.discard(asyncio.current_task())
+            self._schedule()
+
+    def stats(self) -> dict[str, Any]:
+        """Счётчики и текущая загрузка этого процесса."""
+        return {
+            "name": self.name,
+            "queued": len(self._queue),
+            "running_batches": len(self._running),
+            **asdict(self._stats),
+        }
+
+
+def _consume_exception(future: asyncio.Future[Any]) -> None:
+    if not future.cancelled():
+        future.exception()
@@ -0,0 +1,53 @@
+"""Простой in-process LRU-кеш с TTL.
+
+Живёт в памяти одного воркера, поэтому подходит только для данных,
+которые допустимо держать немного устаревшими (TTL ограничивает
+рассинхрон между воркерами gunicorn).
+"""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+
+
+class TTLCache[K, V]:
+    """LRU на OrderedDict: старые записи вытесняются при переполнении,
+    просроченные - удаляются при обращении."""
+
+    def __init__(self, *, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+    def get(self, key: K) -> V | None:
+        """Вернуть значение или None (нет записи / истёк TTL)."""
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: K, value: V, *, ttl: float | None = None) -> None:
+        """Положить значение (ttl по умолчанию - из конструктора)."""
+        if self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: K) -> None:
+        """Удалить запись, если она есть."""
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
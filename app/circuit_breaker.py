@@ -0,0 +1,115 @@
+"""Circuit breaker для вызовов внешних сервисов.
+
+Пока сервис отвечает ошибками подряд, каждый запрос ждёт таймаут и
+держит воркер. После `failure_threshold` ошибок подряд breaker
+"размыкается": вызовы сразу получают CircuitOpenError, не трогая сеть.
+Через `reset_timeout` секунд пропускается одна пробная попытка
+(half-open): успех замыкает breaker, ошибка - снова размыкает.
+
+Состояние - на процесс (каждый воркер решает сам), без блокировок:
+всё меняется синхронно внутри одного event loop.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import asdict, dataclass
+from enum import Enum
+from typing import Any
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"  # вызовы идут
+    OPEN = "open"  # вызовы отклоняются сразу
+    HALF_OPEN = "half_open"  # идёт пробный вызов
+
+
+class CircuitOpenError(RuntimeError):
+    """Breaker разомкнут - сервис считается недоступным."""
+
+    def __init__(self, name: str, retry_after: float) -> None:
+        super().__init__(f"{name}: сервис недоступен (circuit open)")
+        self.name = name
+        self.retry_after = retry_after
+
+
+@dataclass
+class CircuitBreakerStats:
+    """Счётчики breaker (на процесс)."""
+
+    successes: int = 0
+    failures: int = 0
+    rejected: int = 0  # отклонено без вызова
+    opened: int = 0  # сколько раз размыкался
+
+
+class CircuitBreaker:
+    """`before_call()` перед вызовом, затем `record_success()`/`record_failure()`.
+
+    Ошибкой сервиса считается только то, что говорит о его недоступности
+    (таймаут, обрыв, 5xx) - ответ "неверный запрос" breaker не размыкает.
+    """
+
+    def __init__(
+        self, name: str, *, failure_threshold: int, reset_timeout: float
+    ) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = CircuitState.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._stats = CircuitBreakerStats()
+
+    @property
+    def state(self) -> CircuitState:
+        if (
+            self._state is CircuitState.OPEN
+            and time.monotonic() - self._opened_at >= self.reset_timeout
+        ):
+            return CircuitState.HALF_OPEN
+        return self._state
+
+    def before_call(self) -> None:
+        """Разрешить вызов или сразу отклонить (CircuitOpenError)."""
+        state = self.state
+        if state is CircuitState.CLOSED:
+            return
+        if state is CircuitState.HALF_OPEN and not self._probe_in_flight:
+            self._state = CircuitState.HALF_OPEN
+            self._probe_in_flight = True
+            return
+        self._stats.rejected += 1
+        retry_after = max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+        raise CircuitOpenError(self.name, retry_after)
+
+    def record_success(self) -> None:
+        self._stats.successes += 1
+        self._consecutive_failures = 0
+        self._probe_in_flight = False
+        self._state = CircuitState.CLOSED
+
+    def record_failure(self) -> None:
+        self._stats.failures += 1
+        self._consecutive_failures += 1
+        was_probe = self._probe_in_flight
+        self._probe_in_flight = False
+        if was_probe or self._consecutive_failures >= self.failure_threshold:
+            if self._state is not CircuitState.OPEN:
+                self._stats.opened += 1
+            self._state = CircuitState.OPEN
+            self._opened_at = time.monotonic()
+
+    def record_cancelled(self) -> None:
+        """Вызов отменён без результата: освободить место пробного вызова."""
+        self._probe_in_flight = False
+
+    def stats(self) -> dict[str, Any]:
+        """Состояние и счётчики этого процесса."""
+        return {
+            "name": self.name,
+            "state": self.state.value,
+            "consecutive_failures": self._consecutive_failures,
+            **asdict(self._stats),
+        }
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -6,6 +8,15 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTE: int = 10
+    JWT_CACHE_MAX_SIZE: int = 10_000  # проверенные токены; 0 - без кеша
+    # Пул соединений к БД (на каждый воркер gunicorn)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0  # сек ожидания свободного соединения
+    DB_POOL_RECYCLE: int = 1800  # сек; пересоздавать старые соединения
+    DB_POOL_PRE_PING: bool = False  # +1 round trip на каждую выдачу соединения
+    DB_STATEMENT_CACHE_SIZE: int = 100  # кеш prepared statements asyncpg
+    DB_PGBOUNCER_TRANSACTION_MODE: bool = False  # отключает кеш statements
     # Argon2 tuning (can be overridden via .env)
     ARGON_TIME_COST: int = 3
     ARGON_MEMORY_COST: int = 65536  # KiB (≈64 MiB)
@@ -13,6 +24,98 @@ class Settings(BaseSettings):
     ARGON_HASH_LEN: int = 32
     ARGON_SALT_LEN: int = 16
     ARGON_MAX_PASSWORD_LEN: int = 1024  # basic DoS guard
+    # Калибровка при старте: подобрать time/memory cost под целевое время
+    ARGON_AUTO_CALIBRATE: bool = False
+    ARGON_TARGET_MS: float = 200.0
+    ARGON_MIN_MEMORY_COST: int = 19456  # KiB; ниже не опускаемся (OWASP)
+    ARGON_MIN_TIME_COST: int = 2  # OWASP для 19 MiB; тоже нижняя граница
+    # Отдельный пул для Argon2 (каждая задача ≈ ARGON_MEMORY_COST памяти)
+    PASSWORD_HASH_EXECUTOR: Literal["thread", "process"] = "thread"
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_QUEUE: int = 16  # сверх этого - 503
+    PASSWORD_HASH_RETRY_AFTER_SECONDS: int = 1
+    # Redis (опционально): общий кеш для всех воркеров
+    REDIS_URL: str | None = None
+    REDIS_SOCKET_TIMEOUT: float = 0.25  # сек; Redis не должен тормозить запрос
+    # Кеш принципала в get_current_user
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 5.0  # in-process уровень
+    PRINCIPAL_CACHE_REDIS_TTL_SECONDS: int = 60
+    PRINCIPAL_CACHE_MAX_SIZE: int = 10_000
+    # Очередь входящих webhook (фоновый обработчик в каждом воркере)
+    WEBHOOK_INBOX_CONSUMER_ENABLED: bool = True
+    WEBHOOK_INBOX_BATCH_SIZE: int = 100
+    WEBHOOK_INBOX_CONCURRENCY: int = 4  # <= DB_POOL_SIZE
+    WEBHOOK_INBOX_POLL_INTERVAL: float = 1.0  # сек
+    WEBHOOK_INBOX_LEASE_SECONDS: float = 60.0
+    WEBHOOK_INBOX_MAX_ATTEMPTS: int = 5
+    WEBHOOK_INBOX_RETRY_DELAY_SECONDS: float = 5.0  # умножается на номер попытки
+    # Дедупликация webhook по event_id (кеш перед processed_webhook_events)
+    WEBHOOK_DEDUP_CACHE_SIZE: int = 100_000
+    WEBHOOK_DEDUP_TTL_SECONDS: float = 7 * 24 * 3600
+    # Очистка завершённых событий inbox и записей processed_webhook_events
+    # (не раньше WEBHOOK_DEDUP_TTL_SECONDS: БД - источник истины для дублей)
+    WEBHOOK_RETENTION_ENABLED: bool = True
+    WEBHOOK_RETENTION_SECONDS: float = 30 * 24 * 3600
+    WEBHOOK_RETENTION_INTERVAL_SECONDS: float = 3600.0
+    WEBHOOK_RETENTION_BATCH_SIZE: int = 1000  # строк на транзакцию
+    # HTTP-кеширование публичного каталога (товары, категории)
+    CATALOG_CACHE_CONTROL: str = "public, max-age=0, must-revalidate"
+    CATALOG_SURROGATE_KEY_HEADER: str = "Surrogate-Key"  # пусто - не отдавать
+    # Импорт товаров (POST /products/import)
+    PRODUCT_IMPORT_CHUNK_SIZE: int = 2000  # строк в одной транзакции COPY + upsert
+    PRODUCT_IMPORT_MAX_ERRORS: int = 1000  # ошибок в отчёте; дальше только счётчик
+    PRODUCT_EXPORT_BATCH_SIZE: int = (
+        1000  # строк с сервера за раз (GET /products/export)
+    )
+    # Склейка одновременных GET /products/{id} в пакетные запросы (на воркер)
+    PRODUCT_LOADER_MAX_BATCH_SIZE: int = 100
+    PRODUCT_LOADER_CONCURRENCY: int = 2  # пакетов одновременно (соединений пула)
+    # Сверка сводки заказов (user_order_stats) с таблицей orders:
+    # при старте (догоняет заказы, прошедшие мимо сводки) и раз в интервал
+    ORDER_STATS_RECONCILE_ENABLED: bool = True
+    ORDER_STATS_RECONCILE_INTERVAL_SECONDS: float = 24 * 3600
+    ORDER_STATS_RECONCILE_BATCH_SIZE: int = 1000  # пользователей на транзакцию
+    # Свёртки продаж для /analytics: фоновое обновление по изменённым заказам
+    ANALYTICS_REFRESH_ENABLED: bool = True
+    ANALYTICS_REFRESH_INTERVAL_SECONDS: float = 60.0
+    ANALYTICS_REFRESH_BATCH_SIZE: int = 5000  # изменённых заказов на транзакцию
+    # часовой пояс дней и часов в отчётах; после смены - полный пересчёт
+    # (python -m app.services.analytics --rebuild)
+    ANALYTICS_TIMEZONE: str = "UTC"
+    # Создание платежа: вызов провайдера идёт без соединения с БД; платёж,
+    # не переданный провайдеру, досылает outbox после истечения аренды
+    PAYMENT_PROVIDER_LEASE_SECONDS: float = 30.0  # > таймаута вызова провайдера
+    PAYMENT_OUTBOX_ENABLED: bool = True
+    PAYMENT_OUTBOX_POLL_INTERVAL: float = 10.0  # сек
+    PAYMENT_OUTBOX_BATCH_SIZE: int = 50
+    PAYMENT_OUTBOX_CONCURRENCY: int = 4  # одновременных вызовов провайдера
+    PAYMENT_OUTBOX_RETRY_DELAY_SECONDS: float = 10.0  # после ошибки провайдера
+    PAYMENT_OUTBOX_MAX_ATTEMPTS: int = 5  # затем платёж - FAILED
+    # Платёжный шлюз новых платежей: mock или HTTP-провайдер (PAYMENT_HTTP_*)
+    PAYMENT_GATEWAY: Literal["mock", "http"] = "mock"
+    PAYMENT_HTTP_PROVIDER_NAME: str = "http"  # payments.provider, /webhook/{имя}
+    PAYMENT_HTTP_BASE_URL: str = "http://127.0.0.1:8100"
+    PAYMENT_HTTP_API_KEY: str = ""
+    PAYMENT_HTTP_WEBHOOK_SECRET: str = ""
+    PAYMENT_HTTP_CONNECT_TIMEOUT: float = 1.0  # сек
+    PAYMENT_HTTP_READ_TIMEOUT: float = 5.0  # сек на попытку
+    # все попытки одного вызова; меньше PAYMENT_PROVIDER_LEASE_SECONDS
+    PAYMENT_HTTP_TOTAL_TIMEOUT: float = 15.0
+    PAYMENT_HTTP_MAX_RETRIES: int = 2
+    PAYMENT_HTTP_RETRY_BACKOFF: float = 0.2  # сек, удваивается с попыткой
+    PAYMENT_HTTP_MAX_CONNECTIONS: int = 50  # пул keep-alive на воркер
+    PAYMENT_HTTP_MAX_KEEPALIVE: int = 20
+    PAYMENT_HTTP_BREAKER_FAILURES: int = 5  # ошибок подряд до размыкания
+    PAYMENT_HTTP_BREAKER_RESET_SECONDS: float = 30.0
+    # Истечение зависших заказов/платежей (фоновая задача в каждом воркере);
+    # TTL заказа больше TTL платежа: заказ ждёт, пока истечёт его платёж
+    EXPIRY_ENABLED: bool = True
+    EXPIRY_INTERVAL_SECONDS: float = 300.0
+    EXPIRY_BATCH_SIZE: int = 500  # строк на транзакцию
+    ORDER_PENDING_TTL_SECONDS: float = 24 * 3600
+    PAYMENT_PENDING_TTL_SECONDS: float = 2 * 3600
+    # ORM: падать на любой неявной подгрузке relationship (для тестов/отладки)
+    ORM_STRICT_LOADING: bool = False
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -1,11 +1,80 @@
+import time
+from collections.abc import AsyncGenerator
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any
+from uuid import uuid4
+
+from sqlalchemy import exc, make_url, text
 from sqlalchemy.orm import DeclarativeBase
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.config import settings
-from collections.abc import AsyncGenerator
 
+
+@dataclass
+class PoolWaitStats:
+    """Сколько запросы ждали свободное соединение из пула (на процесс)."""
+
+    checkouts: int = 0
+    wait_seconds_total: float = 0.0
+    wait_seconds_max: float = 0.0
+    timeouts: int = 0
+
+
+pool_wait_stats = PoolWaitStats()
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Пул, который замеряет время ожидания соединения и таймауты."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            pool_wait_stats.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            pool_wait_stats.checkouts += 1
+            pool_wait_stats.wait_seconds_total += waited
+            pool_wait_stats.wait_seconds_max = max(
+                pool_wait_stats.wait_seconds_max, waited
+            )
+
+
+def _connect_args() -> dict[str, Any]:
+    """Параметры драйвера asyncpg (кеш prepared statements, PgBouncer)."""
+    if make_url(settings.DATABASE_URL).get_driver_name() != "asyncpg":
+        return {}
+    if settings.DB_PGBOUNCER_TRANSACTION_MODE:
+        # PgBouncer (pool_mode=transaction) отдаёт серверные соединения разным
+        # клиентам, поэтому кешировать prepared statements нельзя, а их имена
+        # должны быть уникальными.
+        return {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+    return {
+        "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+    }
+
+
+# Пул на каждый воркер: при `make prod` (4 воркера) до
+# 4 * (DB_POOL_SIZE + DB_MAX_OVERFLOW) соединений к БД.
 engine = create_async_engine(
     settings.DATABASE_URL,
     echo=False,  # логи
+    poolclass=InstrumentedQueuePool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+    connect_args=_connect_args(),
 )
 
 AsyncSessionLocal = async_sessionmaker(
@@ -13,10 +82,59 @@ AsyncSessionLocal = async_sessionmaker(
 )
 
 
+def get_pool_stats() -> dict[str, Any]:
+    """Текущее состояние пула соединений этого процесса."""
+    pool = engine.pool
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        **asdict(pool_wait_stats),
+    }
+
+
 class Base(DeclarativeBase):
     pass
 
 
+# Стратегия загрузки relationship по умолчанию: неявно ничего не грузим,
+# каждый запрос в репозитории сам указывает нужные связи (selectinload и т.п.).
+# raise_on_sql - ошибка, если обращение к связи потребовало бы SQL;
+# raise (строгий режим) - ошибка при любом обращении к незагруженной связи.
+RELATIONSHIP_LAZY = "raise" if settings.ORM_STRICT_LOADING else "raise_on_sql"
+
+
 async def get_db() -> AsyncGenerator[AsyncSession]:  # асинхронно генерит асинк сессию
     async with AsyncSessionLocal() as session:
         yield session
+
+
+async def get_visibility_watermark(session: AsyncSession) -> datetime:
+    """Момент, все изменения до которого уже видны следующему запросу.
+
+    Для инкрементальных чтений по updated_at (экспорт, аналитика).
+    updated_at ставится при UPDATE, а видна строка после COMMIT, поэтому
+    "сейчас" не годится: незакоммиченная транзакция может позже проявить
+    строку с updated_at в прошлом. Берём начало самой старой открытой
+    транзакции (её updated_at не раньше: новые строки получают now() -
+    начало транзакции, даже если она ещё ничего не записала), но не позже
+    начала этого запроса. Долгие транзакции только задерживают знак.
+    Чужие роли видны в pg_stat_activity только с pg_read_all_stats -
+    у приложения с одной ролью это не проблема.
+    """
+    result = await session.execute(
+        text(
+            """
+            SELECT least(
+                statement_timestamp(),
+                (SELECT min(xact_start) FROM pg_stat_activity
+                 WHERE datname = current_database()
+                   AND backend_type = 'client backend'
+                   AND pid <> pg_backend_pid())
+            )
+            """
+        )
+    )
+    return result.scalar_one()
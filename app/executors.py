@@ -0,0 +1,106 @@
+"""Отдельные пулы для тяжёлой синхронной работы (CPU / память).
+
+Общий threadpool AnyIO (`run_in_threadpool`, 40 потоков) используется всеми
+sync-зависимостями FastAPI. Дорогие задачи (Argon2: ~64 MiB и 150-250 мс
+на вызов) выносим в свой пул ограниченного размера с ограниченной очередью:
+при переполнении запрос сразу получает отказ, а не ждёт без предела.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from collections.abc import Callable
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Literal, TypeVar
+
+T = TypeVar("T")
+
+ExecutorKind = Literal["thread", "process"]
+
+
+class ExecutorOverloaded(RuntimeError):
+    """Очередь пула заполнена - повторить запрос позже."""
+
+    def __init__(self, name: str, retry_after: int) -> None:
+        super().__init__(f"Пул {name} перегружен")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class BoundedExecutor:
+    """Пул из `workers` исполнителей и очередью не больше `max_queue` задач.
+
+    kind="thread" подходит для кода, отпускающего GIL (argon2-cffi),
+    kind="process" - для чистого Python. Для процессов `func` и аргументы
+    должны сериализоваться pickle (функции уровня модуля).
+    Пул создаётся лениво, при первой задаче.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        kind: ExecutorKind,
+        workers: int,
+        max_queue: int,
+        retry_after: int,
+    ) -> None:
+        self.name = name
+        self.kind = kind
+        self.workers = workers
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self._executor: Executor | None = None
+        self._in_flight = 0  # выполняются + ждут в очереди
+        self._rejected = 0
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix=self.name
+                )
+        return self._executor
+
+    def _release(self, _: Future[Any]) -> None:
+        # Слот освобождается, когда задача реально завершилась в пуле,
+        # а не когда вызывающий перестал ждать (отмена запроса).
+        with self._lock:
+            self._in_flight -= 1
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        """Выполнить `func(*args)` в пуле или сразу поднять ExecutorOverloaded."""
+        with self._lock:
+            if self._in_flight >= self.workers + self.max_queue:
+                self._rejected += 1
+                raise ExecutorOverloaded(self.name, self.retry_after)
+            self._in_flight += 1
+        try:
+            future = self._get_executor().submit(func, *args)
+        except BaseException:
+            with self._lock:
+                self._in_flight -= 1
+            raise
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> dict[str, Any]:
+        """Загрузка пула этого процесса."""
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+            "queued": max(self._in_flight - self.workers, 0),
+            "rejected": self._rejected,
+        }
+
+    def shutdown(self) -> None:
+        """Остановить пул; задачи из очереди отменяются."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,108 @@
+"""Условные GET (ETag / Last-Modified) и заголовки кеширования для CDN.
+
+Версия строки - её `updated_at` (выставляет триггер БД при изменении
+строки, в том числе из сырого SQL). У товаров - только при изменении
+карточки или наличия (остаток стал/перестал быть нулём): списание при
+каждой покупке версию не меняет. Поэтому в кешируемом представлении
+товара (ProductRead) только `in_stock`, а не точный остаток - иначе два
+разных тела получили бы один сильный ETag.
+
+Списки: на условный GET (есть If-None-Match / If-Modified-Since) роут
+сначала читает только (id, updated_at) страницы и при актуальном
+валидаторе отвечает 304, не загружая строки целиком и не сериализуя
+ответ. Обычный GET - один запрос: валидаторы считаются по уже
+загруженным строкам. Одна строка читается целиком в любом случае.
+
+ETag - сильный: хеш от набора (id, updated_at) всех строк ответа.
+Last-Modified - максимум updated_at (с точностью до секунды, как в HTTP),
+поэтому приоритет у If-None-Match.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Request, Response, status
+
+from app.config import settings
+
+# Меняется вместе со схемой ответа, чтобы старые ETag не давали 304.
+ETAG_VERSION = "2"
+
+
+@dataclass(frozen=True, slots=True)
+class Validators:
+    """Валидаторы представления ресурса."""
+
+    etag: str
+    last_modified: datetime | None
+
+
+def make_validators(kind: str, versions: Iterable[tuple[int, datetime]]) -> Validators:
+    """Валидаторы для набора строк (id, updated_at) ресурса типа `kind`.
+
+    Порядок строк не важен: при тех же версиях строк порядок выдачи тот же.
+    """
+    rows = sorted(versions)
+    digest = hashlib.sha256(f"{ETAG_VERSION}:{kind}".encode())
+    for row_id, updated_at in rows:
+        digest.update(f"|{row_id}:{updated_at.isoformat()}".encode())
+    last_modified = max((updated_at for _, updated_at in rows), default=None)
+    return Validators(etag=f'"{digest.hexdigest()[:32]}"', last_modified=last_modified)
+
+
+def is_conditional(request: Request) -> bool:
+    """Прислал ли клиент валидаторы - стоит ли проверять версии до загрузки."""
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+
+def is_not_modified(request: Request, validators: Validators) -> bool:
+    """Можно ли ответить 304 на условный GET (RFC 9110, 13.2.2)."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return validators.etag in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or validators.last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return validators.last_modified.replace(microsecond=0) <= since
+
+
+def cache_headers(
+    validators: Validators, surrogate_keys: Sequence[str] = ()
+) -> dict[str, str]:
+    """ETag, Last-Modified, Cache-Control и ключи для инвалидации в CDN."""
+    headers = {
+        "ETag": validators.etag,
+        "Cache-Control": settings.CATALOG_CACHE_CONTROL,
+    }
+    if validators.last_modified is not None:
+        headers["Last-Modified"] = format_datetime(
+            validators.last_modified.astimezone(timezone.utc), usegmt=True
+        )
+    if settings.CATALOG_SURROGATE_KEY_HEADER and surrogate_keys:
+        headers[settings.CATALOG_SURROGATE_KEY_HEADER] = " ".join(surrogate_keys)
+    return headers
+
+
+def not_modified(
+    validators: Validators, surrogate_keys: Sequence[str] = ()
+) -> Response:
+    """Пустой ответ 304 с теми же заголовками, что были бы у 200."""
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers=cache_headers(validators, surrogate_keys),
+    )
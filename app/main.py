@@ -1,15 +1,75 @@
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 
+from app.config import settings
+from app.payments import register_gateway
+from app.payments.http_gateway import HttpPaymentGateway
+from app.redis_client import close_redis
+from app.routes.analytics import router as analytics_router
 from app.routes.auth import router as auth_router
 from app.routes.category import router as category_router
+from app.routes.health import router as health_router
 from app.routes.product import router as product_router
 from app.routes.order import router as order_router
 from app.routes.payment import router as payment_router
+from app.security.argon2_calibration import calibrate_from_settings
+from app.security.password import password_executor, set_params
+from app.services.analytics import analytics_refresh_job
+from app.services.expiry import expiry_job
+from app.services.payment_outbox import payment_outbox_job
+from app.services.order_stats import order_stats_reconcile_job
+from app.services.webhook_inbox import inbox_job, webhook_retention_job
+
+log = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Старт/остановка приложения: фоновые задачи и общие клиенты."""
+    if settings.ARGON_AUTO_CALIBRATE:
+        # Несколько секунд на старте; воркеры калибруются одновременно и
+        # мешают друг другу, поэтому для продакшена надёжнее CLI + .env.
+        result = await run_in_threadpool(calibrate_from_settings)
+        set_params(result.params)
+        log.info("Argon2 откалиброван: %s (~%s мс)", result.params, result.measured_ms)
+    http_gateway = None
+    if settings.PAYMENT_GATEWAY == "http":
+        # один пул keep-alive соединений к провайдеру на процесс
+        http_gateway = HttpPaymentGateway.from_settings(settings)
+        register_gateway(http_gateway, default=True)
+    if settings.WEBHOOK_INBOX_CONSUMER_ENABLED:
+        inbox_job.start()
+    if settings.ORDER_STATS_RECONCILE_ENABLED:
+        order_stats_reconcile_job.start()
+    if settings.ANALYTICS_REFRESH_ENABLED:
+        analytics_refresh_job.start()
+    if settings.EXPIRY_ENABLED:
+        expiry_job.start()
+    if settings.PAYMENT_OUTBOX_ENABLED:
+        payment_outbox_job.start()
+    if settings.WEBHOOK_RETENTION_ENABLED:
+        webhook_retention_job.start()
+    yield
+    await webhook_retention_job.stop()
+    await payment_outbox_job.stop()
+    await expiry_job.stop()
+    await analytics_refresh_job.stop()
+    await order_stats_reconcile_job.stop()
+    await inbox_job.stop()
+    if http_gateway is not None:
+        await http_gateway.aclose()
+    await close_redis()
+    password_executor.shutdown()
+
 
 app = FastAPI(
     title="Online Store API",
     description="API для интернет-магазина с авторизацией и управлением товарами",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 app.include_router(auth_router, prefix="/api/v1")
@@ -17,3 +77,5 @@ app.include_router(category_router, prefix="/api/v1")
 app.include_router(product_router, prefix="/api/v1")
 app.include_router(order_router, prefix="/api/v1")
 app.include_router(payment_router, prefix="/api/v1")
+app.include_router(analytics_router, prefix="/api/v1")
+app.include_router(health_router, prefix="/api/v1")
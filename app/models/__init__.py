@@ -3,3 +3,12 @@ from .category import Category as Category
 from .product import Product as Product
 from .order import Order as Order, OrderItem as OrderItem
 from .payment import Payment as Payment
+from .webhook_inbox import WebhookInbox as WebhookInbox
+from .processed_webhook_event import ProcessedWebhookEvent as ProcessedWebhookEvent
+from .user_order_stats import UserOrderStats as UserOrderStats
+from .sales_rollup import (
+    AnalyticsWatermark as AnalyticsWatermark,
+    SalesHourly as SalesHourly,
+    SalesProductDaily as SalesProductDaily,
+    SalesProductHourly as SalesProductHourly,
+)
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 
 from typing import TYPE_CHECKING
-from app.database import Base
+from app.database import RELATIONSHIP_LAZY, Base
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy import Boolean, Identity, String, text
 
@@ -22,4 +22,6 @@ class Category(TimestampMixin, Base):
         Boolean(), nullable=False, server_default=text("true")
     )
 
-    products: Mapped[list["Product"]] = relationship(back_populates="category")
+    products: Mapped[list["Product"]] = relationship(
+        back_populates="category", lazy=RELATIONSHIP_LAZY
+    )
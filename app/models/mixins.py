@@ -19,6 +19,6 @@ class TimestampMixin(CreatedAtMixin):
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
         server_default=UTC_NOW,
-        server_onupdate=UTC_NOW,  # просим БД выставлять при UPDATE
+        server_onupdate=UTC_NOW,  # выставляет триггер БД set_updated_at()
         nullable=False,
     )
@@ -4,10 +4,18 @@ from typing import TYPE_CHECKING
 from decimal import Decimal
 from enum import Enum
 
-from sqlalchemy import CheckConstraint, ForeignKey, Identity, Index, Numeric, Integer
-from sqlalchemy.orm import Mapped, mapped_column, relationship
-
-from app.database import Base
+from sqlalchemy import (
+    CheckConstraint,
+    ForeignKey,
+    Identity,
+    Index,
+    Integer,
+    Numeric,
+    text,
+)
+from sqlalchemy.orm import Mapped, mapped_column, query_expression, relationship
+
+from app.database import RELATIONSHIP_LAZY, Base
 from app.models.mixins import TimestampMixin
 
 if TYPE_CHECKING:
@@ -30,24 +38,41 @@ class Order(TimestampMixin, Base):
     __table_args__ = (
         # все заказы юзера со статусом ...
         Index("ix_orders_user_status", "user_id", "status"),
+        # "мои заказы": keyset по (created_at, id) от новых к старым
+        Index("ix_orders_user_id_created_at_id", "user_id", "created_at", "id"),
+        # аналитика: заказы, изменённые после водяного знака, и пересчёт часа
+        Index("ix_orders_updated_at", "updated_at"),
+        Index("ix_orders_created_at", "created_at"),
+        # поиск зависших pending-заказов (app.services.expiry)
+        Index(
+            "ix_orders_pending_created_at",
+            "created_at",
+            postgresql_where=text("status = 'PENDING'"),
+        ),
     )
 
     id: Mapped[int] = mapped_column(Identity(), primary_key=True)
     user_id: Mapped[int] = mapped_column(
-        ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=False
     )
     status: Mapped[OrderStatus] = mapped_column(default=OrderStatus.PENDING, index=True)
     total_price: Mapped[Decimal] = mapped_column(
         Numeric(10, 2), CheckConstraint("total_price >= 0"), nullable=False
     )
-    user: Mapped[User] = relationship(back_populates="orders")
+    # сводка по позициям; заполняется только по запросу (with_expression
+    # в get_user_orders), иначе None
+    item_count: Mapped[int | None] = query_expression()
+    units: Mapped[int | None] = query_expression()
+    user: Mapped[User] = relationship(back_populates="orders", lazy=RELATIONSHIP_LAZY)
 
     """ all - подгрузит items(позиции) сама в базу без add(item)
             delete-orphan - удалить из базы брошенные items(позиции)"""
     items: Mapped[list[OrderItem]] = relationship(
         back_populates="order",
         cascade="all, delete-orphan",
+        passive_deletes=True,  # позиции удалит ON DELETE CASCADE в БД
         order_by="OrderItem.id",  # детерминированность порядка
+        lazy=RELATIONSHIP_LAZY,
     )
 
 
@@ -73,5 +98,5 @@ class OrderItem(Base):
         Numeric(10, 2), CheckConstraint("price >= 0"), nullable=False
     )
 
-    order: Mapped[Order] = relationship(back_populates="items")
-    product: Mapped[Product] = relationship()
+    order: Mapped[Order] = relationship(back_populates="items", lazy=RELATIONSHIP_LAZY)
+    product: Mapped[Product] = relationship(lazy=RELATIONSHIP_LAZY)
@@ -8,14 +8,25 @@
 
 from __future__ import annotations
 
+from datetime import datetime
 from decimal import Decimal
 from enum import Enum
 from typing import TYPE_CHECKING, Any
 
-from sqlalchemy import ForeignKey, Identity, Index, JSON, Numeric, String, text
+from sqlalchemy import (
+    DateTime,
+    ForeignKey,
+    Identity,
+    Index,
+    Integer,
+    JSON,
+    Numeric,
+    String,
+    text,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from app.database import Base
+from app.database import RELATIONSHIP_LAZY, Base
 from app.models.mixins import TimestampMixin
 
 if TYPE_CHECKING:
@@ -28,13 +39,17 @@ DEFAULT_CURRENCY = "RUB"
 class PaymentStatus(str, Enum):
     """Внутренние статусы оплаты (каноничные для приложения)."""
 
-    CREATED = "created"
+    CREATED = "created"  # сохранён локально, провайдеру ещё не передан
     PENDING = "pending"
     SUCCEEDED = "succeeded"
     FAILED = "failed"
     CANCELED = "canceled"
 
 
+# Платёж ещё может завершиться (не больше одного на заказ)
+ACTIVE_PAYMENT_STATUSES = (PaymentStatus.CREATED, PaymentStatus.PENDING)
+
+
 class Payment(TimestampMixin, Base):
     """Платеж по заказу.
 
@@ -51,6 +66,24 @@ class Payment(TimestampMixin, Base):
             unique=True,
             postgresql_where=text("status IN ('CREATED', 'PENDING')"),
         ),
+        # outbox: платежи, ещё не переданные провайдеру
+        Index(
+            "ix_payments_outbox",
+            "id",
+            postgresql_where=text("status = 'CREATED'"),
+        ),
+        # поиск зависших активных платежей (app.services.expiry)
+        Index(
+            "ix_payments_active_created_at",
+            "created_at",
+            postgresql_where=text("status IN ('CREATED', 'PENDING')"),
+        ),
+        # очередь возвратов: деньги списаны, а заказ не оплачен
+        Index(
+            "ix_payments_refund_required",
+            "refund_required_at",
+            postgresql_where=text("refund_required_at IS NOT NULL"),
+        ),
     )
 
     id: Mapped[int] = mapped_column(Identity(), primary_key=True)
@@ -78,5 +111,20 @@ class Payment(TimestampMixin, Base):
     checkout_url: Mapped[str | None] = mapped_column(String(1024), nullable=True)
     fail_reason: Mapped[str | None] = mapped_column(String(255), nullable=True)
     provider_payload: Mapped[dict[str, Any] | None] = mapped_column(JSON, nullable=True)
+    # outbox (app.services.payment_outbox): попытки передать платёж
+    # провайдеру и аренда текущей попытки - до locked_until платёж
+    # не подхватит повтор
+    provider_attempts: Mapped[int] = mapped_column(
+        Integer, nullable=False, server_default=text("0")
+    )
+    locked_until: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    # провайдер списал деньги, а заказ не может быть оплачен (платёж уже
+    # истёк/отменён или заказ отменён) - нужен возврат, см.
+    # services.payment.process_webhook_event
+    refund_required_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
 
-    order: Mapped[Order] = relationship()
+    order: Mapped[Order] = relationship(lazy=RELATIONSHIP_LAZY)
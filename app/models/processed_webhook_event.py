@@ -0,0 +1,29 @@
+"""ORM-модель обработанного webhook-события (идемпотентность по event_id)."""
+
+from __future__ import annotations
+
+from sqlalchemy import Index, PrimaryKeyConstraint, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+from app.models.mixins import CreatedAtMixin
+
+
+class ProcessedWebhookEvent(CreatedAtMixin, Base):
+    """Событие провайдера, которое уже применено к платежу/заказу.
+
+    Источник истины для дедупликации: строка вставляется в той же
+    транзакции, что и изменения платежа, поэтому повторная доставка
+    того же event_id упирается в первичный ключ. Хранится
+    WEBHOOK_RETENTION_SECONDS - дольше провайдеры событие не повторяют.
+    """
+
+    __tablename__ = "processed_webhook_events"
+    __table_args__ = (
+        PrimaryKeyConstraint("provider", "event_id"),
+        # очистка старых записей (webhook_retention_job)
+        Index("ix_processed_webhook_events_created_at", "created_at"),
+    )
+
+    provider: Mapped[str] = mapped_column(String(32), nullable=False)
+    event_id: Mapped[str] = mapped_column(String(128), nullable=False)
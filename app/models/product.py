@@ -3,10 +3,21 @@ from __future__ import annotations
 from decimal import Decimal
 from typing import TYPE_CHECKING
 
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import Boolean, ForeignKey, Identity, Numeric, String, text
+from sqlalchemy import (
+    Boolean,
+    CheckConstraint,
+    ForeignKey,
+    Identity,
+    Index,
+    Integer,
+    Numeric,
+    String,
+    text,
+)
 
-from app.database import Base
+from app.database import RELATIONSHIP_LAZY, Base
 from app.models.mixins import TimestampMixin
 
 if TYPE_CHECKING:
@@ -15,14 +26,69 @@ if TYPE_CHECKING:
 
 class Product(TimestampMixin, Base):
     __tablename__ = "products"
+    __table_args__ = (
+        # keyset-пагинация каталога: WHERE category_id = ? AND id > ? ORDER BY id
+        Index("ix_products_category_id_id", "category_id", "id"),
+        # то же для активных товаров (режим по умолчанию в каталоге)
+        Index(
+            "ix_products_active_category_id_id",
+            "category_id",
+            "id",
+            postgresql_where=text("is_active"),
+        ),
+        Index("ix_products_active_id", "id", postgresql_where=text("is_active")),
+        # сортировки по цене и новизне (с категорией и без): индекс отдаёт
+        # строки уже в нужном порядке, фильтры проверяются по ходу скана
+        Index("ix_products_price_id", "price", "id"),
+        Index("ix_products_category_id_price_id", "category_id", "price", "id"),
+        Index("ix_products_created_at_id", "created_at", "id"),
+        Index(
+            "ix_products_category_id_created_at_id", "category_id", "created_at", "id"
+        ),
+        # инкрементальный экспорт (GET /products/export?updated_after=)
+        Index("ix_products_updated_at_id", "updated_at", "id"),
+        # полнотекстовый поиск и поиск с опечатками (pg_trgm) в /products/search
+        Index("ix_products_search_vector", "search_vector", postgresql_using="gin"),
+        Index(
+            "ix_products_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+        # место на странице под новую версию строки: списание остатка
+        # (индексы не меняются) идёт HOT-апдейтом, без записи в индексы
+        {"postgresql_with": {"fillfactor": 90}},
+    )
 
     id: Mapped[int] = mapped_column(Identity(), primary_key=True)
     name: Mapped[str] = mapped_column(String(100), unique=True, nullable=False)
     description: Mapped[str] = mapped_column(String(255), nullable=True)
     price: Mapped[Decimal] = mapped_column(Numeric(10, 2), nullable=False)
     is_active: Mapped[bool] = mapped_column(Boolean(), server_default=text("true"))
+    # остаток на складе; списывается атомарно при оформлении заказа.
+    # updated_at (версия для ETag/экспорта) он двигает, только когда товар
+    # кончается или появляется - см. миграцию e2b8d4f6a193, поэтому в
+    # каталог и экспорт попадает только in_stock
+    stock: Mapped[int] = mapped_column(
+        Integer,
+        CheckConstraint("stock >= 0", name="ck_products_stock_non_negative"),
+        nullable=False,
+        server_default=text("0"),
+    )
+    # name (вес A) + description (вес B); заполняет триггер
+    # trg_products_search_vector, поэтому ORM колонку не пишет и не читает
+    search_vector: Mapped[str | None] = mapped_column(
+        TSVECTOR, nullable=True, deferred=True, deferred_raiseload=True
+    )
 
     category_id: Mapped[int] = mapped_column(
         ForeignKey("categories.id", ondelete="RESTRICT"), nullable=False
     )
-    category: Mapped[Category] = relationship(back_populates="products")
+    category: Mapped[Category] = relationship(
+        back_populates="products", lazy=RELATIONSHIP_LAZY
+    )
+
+    @property
+    def in_stock(self) -> bool:
+        """Есть ли товар в наличии (то, что видит каталог вместо stock)."""
+        return self.stock > 0
@@ -0,0 +1,71 @@
+"""ORM-модели свёрток продаж для аналитики (app.services.analytics).
+
+Свёртки строятся только из оплаченных заказов (paid, shipped, delivered)
+и пересчитываются фоновой задачей по часам, в которых менялись заказы;
+читать их можно сколько угодно - orders и order_items отчёты не трогают.
+
+Часы и дни - местное время ANALYTICS_TIMEZONE (timestamp/date без пояса):
+отчёт "за день" - это день магазина, а не сутки UTC.
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime
+from decimal import Decimal
+
+from sqlalchemy import Date, DateTime, Index, Integer, Numeric, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class SalesHourly(Base):
+    """Итоги продаж за час: выручка по дням/часам."""
+
+    __tablename__ = "sales_hourly"
+
+    bucket: Mapped[datetime] = mapped_column(DateTime(), primary_key=True)
+    orders: Mapped[int] = mapped_column(Integer, nullable=False)
+    units: Mapped[int] = mapped_column(Integer, nullable=False)
+    revenue: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False)
+
+
+class SalesProductHourly(Base):
+    """Продажи товара за час - из них собираются дневные строки."""
+
+    __tablename__ = "sales_product_hourly"
+
+    bucket: Mapped[datetime] = mapped_column(DateTime(), primary_key=True)
+    # без внешних ключей: свёртка не должна мешать удалять товары
+    product_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    orders: Mapped[int] = mapped_column(Integer, nullable=False)
+    units: Mapped[int] = mapped_column(Integer, nullable=False)
+    revenue: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False)
+
+
+class SalesProductDaily(Base):
+    """Продажи товара за день: отчёты по товарам, категориям и топ продаж."""
+
+    __tablename__ = "sales_product_daily"
+    __table_args__ = (
+        Index("ix_sales_product_daily_category_day", "category_id", "day"),
+    )
+
+    day: Mapped[date] = mapped_column(Date(), primary_key=True)
+    product_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # категория товара на момент пересчёта дня
+    category_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    orders: Mapped[int] = mapped_column(Integer, nullable=False)
+    units: Mapped[int] = mapped_column(Integer, nullable=False)
+    revenue: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False)
+
+
+class AnalyticsWatermark(Base):
+    """До какого orders.updated_at изменения уже учтены в свёртках."""
+
+    __tablename__ = "analytics_watermarks"
+
+    name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    high_water: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
@@ -3,7 +3,7 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy import Identity, String, Boolean, text
-from app.database import Base
+from app.database import RELATIONSHIP_LAZY, Base
 from app.models.mixins import TimestampMixin
 
 
@@ -20,8 +20,14 @@ class User(TimestampMixin, Base):
     )
     hashed_password: Mapped[str] = mapped_column(String(255), nullable=False)
     is_active: Mapped[bool] = mapped_column(Boolean(), server_default=text("true"))
+    # доступ к служебным эндпоинтам (аналитика продаж); выдаётся вручную в БД
+    is_admin: Mapped[bool] = mapped_column(
+        Boolean(), server_default=text("false"), nullable=False
+    )
     orders: Mapped[list[Order]] = relationship(
         back_populates="user",
-        lazy="selectin",  # <оптимально для коллекций(n+1)
+        # не грузим историю заказов при каждом get_user_by_id/get_user_by_email
+        lazy=RELATIONSHIP_LAZY,
         cascade="all, delete-orphan",
+        passive_deletes=True,  # заказы удалит ON DELETE CASCADE в БД
     )
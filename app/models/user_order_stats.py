@@ -0,0 +1,44 @@
+"""ORM-модель сводки заказов пользователя (страница аккаунта)."""
+
+from __future__ import annotations
+
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import DateTime, ForeignKey, Integer, Numeric, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+from app.models.mixins import UTC_NOW
+
+
+class UserOrderStats(Base):
+    """Счётчики заказов пользователя, поддерживаются инкрементально.
+
+    Обновляются одним upsert в той же транзакции, что и сам заказ
+    (создание, смена статуса), поэтому чтение - по первичному ключу.
+    Расхождения (ручные правки в БД и т.п.) исправляет сверка с orders
+    (app.services.order_stats).
+    """
+
+    __tablename__ = "user_order_stats"
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    order_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, server_default=text("0")
+    )
+    # оплаченные (paid, shipped, delivered) и сумма по ним
+    paid_order_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, server_default=text("0")
+    )
+    lifetime_spend: Mapped[Decimal] = mapped_column(
+        Numeric(12, 2), nullable=False, server_default=text("0")
+    )
+    last_order_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=UTC_NOW, nullable=False
+    )
@@ -0,0 +1,62 @@
+"""ORM-модель входящего webhook (inbox).
+
+Webhook сначала одним INSERT сохраняется сюда, провайдер сразу получает
+ответ, а обработка (`process_webhook_event`) идёт в фоне пачками.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from enum import Enum
+from typing import Any
+
+from sqlalchemy import DateTime, Identity, Index, Integer, JSON, String, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+from app.models.mixins import CreatedAtMixin
+
+
+class InboxStatus(str, Enum):
+    """Статусы обработки входящего события."""
+
+    PENDING = "pending"  # ждёт обработки
+    PROCESSING = "processing"  # захвачено обработчиком до locked_until
+    PROCESSED = "processed"  # обработано
+    FAILED = "failed"  # ошибка без повтора / исчерпаны попытки
+
+
+class WebhookInbox(CreatedAtMixin, Base):
+    """Сырое webhook-событие провайдера в очереди на обработку."""
+
+    __tablename__ = "webhook_inbox"
+    __table_args__ = (
+        # выборка очереди: только необработанные строки, по порядку поступления
+        Index(
+            "ix_webhook_inbox_queue",
+            "id",
+            postgresql_where=text("status IN ('PENDING', 'PROCESSING')"),
+        ),
+        # очистка старых завершённых событий (webhook_retention_job)
+        Index("ix_webhook_inbox_created_at", "created_at"),
+    )
+
+    id: Mapped[int] = mapped_column(Identity(), primary_key=True)
+    provider: Mapped[str] = mapped_column(String(32), nullable=False)
+    event_id: Mapped[str] = mapped_column(String(128), nullable=False)
+    provider_payment_id: Mapped[str] = mapped_column(String(128), nullable=False)
+    event_status: Mapped[str] = mapped_column(String(32), nullable=False)
+    payload: Mapped[dict[str, Any]] = mapped_column(JSON, nullable=False)
+    status: Mapped[InboxStatus] = mapped_column(
+        default=InboxStatus.PENDING, nullable=False
+    )
+    attempts: Mapped[int] = mapped_column(
+        Integer, nullable=False, server_default=text("0")
+    )
+    locked_until: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    last_error: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    processed_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
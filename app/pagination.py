@@ -0,0 +1,51 @@
+"""Keyset (cursor) пагинация.
+
+Курсор - непрозрачная для клиента строка (urlsafe base64 от JSON),
+внутри лежат ключи последней строки страницы. Следующая страница
+ищется через `WHERE key > :last ORDER BY key`, поэтому стоимость
+любой страницы одинакова (в отличие от OFFSET).
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import hashlib
+import json
+from typing import Any
+
+# Заголовок ответа с курсором следующей страницы (нет заголовка - страниц больше нет)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidCursor(ValueError):
+    """Курсор поврежден или не подходит к запросу."""
+
+
+def encode_cursor(**keys: Any) -> str:
+    """Упаковать ключи последней строки в непрозрачный курсор."""
+    raw = json.dumps(keys, separators=(",", ":"), sort_keys=True, default=str)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str) -> dict[str, Any]:
+    """Распаковать курсор обратно в словарь ключей.
+
+    Raises:
+        InvalidCursor: Если строка не является курсором приложения
+    """
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (binascii.Error, UnicodeError, ValueError) as exc:
+        raise InvalidCursor("Некорректный курсор") from exc
+    if not isinstance(data, dict):
+        raise InvalidCursor("Некорректный курсор")
+    return data
+
+
+def filters_fingerprint(**filters: Any) -> str:
+    """Короткий отпечаток фильтров запроса - кладётся в курсор, чтобы курсор
+    нельзя было применить к другой выборке."""
+    raw = json.dumps(filters, separators=(",", ":"), sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
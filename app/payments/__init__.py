@@ -2,6 +2,14 @@ from .gateway import (
     CreatePaymentRequest as CreatePaymentRequest,
     CreatePaymentResult as CreatePaymentResult,
     PaymentGateway as PaymentGateway,
+    PaymentGatewayError as PaymentGatewayError,
+    PaymentGatewayRejected as PaymentGatewayRejected,
+    PaymentGatewayUnavailable as PaymentGatewayUnavailable,
     WebhookEvent as WebhookEvent,
 )
 from .mock_gateway import MockPaymentGateway as MockPaymentGateway
+from .registry import (
+    get_default_gateway as get_default_gateway,
+    get_gateway as get_gateway,
+    register_gateway as register_gateway,
+)
@@ -11,6 +11,21 @@ from decimal import Decimal
 from typing import Any, Mapping, Protocol
 
 
+class PaymentGatewayError(Exception):
+    """Провайдер не выполнил запрос (после всех повторов)."""
+
+
+class PaymentGatewayUnavailable(PaymentGatewayError):
+    """Провайдер недоступен: таймаут, обрыв, 5xx или разомкнут breaker.
+
+    Повтор с тем же ключом идемпотентности позже безопасен.
+    """
+
+
+class PaymentGatewayRejected(PaymentGatewayError):
+    """Провайдер отклонил запрос (4xx): повтор с теми же данными не поможет."""
+
+
 @dataclass(frozen=True, slots=True)
 class CreatePaymentRequest:
     """Запрос на создание платежа в провайдере."""
@@ -0,0 +1,272 @@
+"""HTTP-шлюз внешнего платёжного провайдера.
+
+Один экземпляр на процесс (создаётся в lifespan): httpx.AsyncClient
+держит пул keep-alive соединений, и вызов провайдера не платит за
+TCP/TLS-рукопожатие.
+
+API провайдера:
+    POST {base_url}/v1/payments
+        Authorization: Bearer <api_key>
+        Idempotency-Key: <CreatePaymentRequest.idempotency_key>
+        {"payment_id", "order_id", "amount", "currency", "description",
+         "return_url", "cancel_url"}
+    -> 200/201 {"id", "status", "checkout_url", ...}
+
+    webhook: JSON {"event_id", "provider_payment_id", "status", ...},
+    заголовок X-Signature - hex HMAC-SHA256 тела на webhook_secret.
+
+Каждая попытка ограничена таймаутами httpx, все попытки вместе -
+total_timeout. Повторяются только сбои, после которых повтор безопасен:
+таймаут/обрыв соединения, 5xx и 429 - с тем же Idempotency-Key
+провайдер не создаст второй платёж. Ответы 4xx не повторяются и
+breaker не размыкают: это ошибка запроса, а не недоступность провайдера.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import hmac
+import json
+import random
+import time
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Any, Mapping
+
+import httpx
+
+from app.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.payments.gateway import (
+    CreatePaymentRequest,
+    CreatePaymentResult,
+    PaymentGateway,
+    PaymentGatewayError,
+    PaymentGatewayRejected,
+    PaymentGatewayUnavailable,
+    WebhookEvent,
+)
+
+if TYPE_CHECKING:
+    from app.config import Settings
+
+SIGNATURE_HEADER = "X-Signature"
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+@dataclass
+class HttpGatewayStats:
+    """Счётчики шлюза (на процесс)."""
+
+    calls: int = 0
+    attempts: int = 0
+    retries: int = 0
+    errors: int = 0  # вызовов, завершившихся ошибкой
+
+
+class HttpPaymentGateway(PaymentGateway):
+    """Шлюз провайдера по HTTP: пул соединений, повторы, circuit breaker."""
+
+    def __init__(
+        self,
+        *,
+        provider_name: str,
+        base_url: str,
+        api_key: str,
+        webhook_secret: str,
+        connect_timeout: float,
+        read_timeout: float,
+        total_timeout: float,
+        max_retries: int,
+        retry_backoff: float,
+        max_connections: int,
+        max_keepalive_connections: int,
+        breaker: CircuitBreaker,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        self.provider_name = provider_name
+        self.total_timeout = total_timeout
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.breaker = breaker
+        self._webhook_secret = webhook_secret.encode()
+        self._stats = HttpGatewayStats()
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            headers={"Authorization": f"Bearer {api_key}"} if api_key else None,
+            timeout=httpx.Timeout(
+                read_timeout, connect=connect_timeout, pool=connect_timeout
+            ),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+            ),
+            transport=transport,
+        )
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> HttpPaymentGateway:
+        """Шлюз с параметрами PAYMENT_HTTP_* из настроек."""
+        return cls(
+            provider_name=settings.PAYMENT_HTTP_PROVIDER_NAME,
+            base_url=settings.PAYMENT_HTTP_BASE_URL,
+            api_key=settings.PAYMENT_HTTP_API_KEY,
+            webhook_secret=settings.PAYMENT_HTTP_WEBHOOK_SECRET,
+            connect_timeout=settings.PAYMENT_HTTP_CONNECT_TIMEOUT,
+            read_timeout=settings.PAYMENT_HTTP_READ_TIMEOUT,
+            total_timeout=settings.PAYMENT_HTTP_TOTAL_TIMEOUT,
+            max_retries=settings.PAYMENT_HTTP_MAX_RETRIES,
+            retry_backoff=settings.PAYMENT_HTTP_RETRY_BACKOFF,
+            max_connections=settings.PAYMENT_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.PAYMENT_HTTP_MAX_KEEPALIVE,
+            breaker=CircuitBreaker(
+                f"payment-{settings.PAYMENT_HTTP_PROVIDER_NAME}",
+                failure_threshold=settings.PAYMENT_HTTP_BREAKER_FAILURES,
+                reset_timeout=settings.PAYMENT_HTTP_BREAKER_RESET_SECONDS,
+            ),
+        )
+
+    async def aclose(self) -> None:
+        """Закрыть пул соединений (остановка приложения)."""
+        await self._client.aclose()
+
+    async def create_payment(self, req: CreatePaymentRequest) -> CreatePaymentResult:
+        """Создать платёж у провайдера (с повторами по тому же ключу)."""
+        self._stats.calls += 1
+        payload = {
+            "payment_id": req.payment_id,
+            "order_id": req.order_id,
+            "amount": str(req.amount),
+            "currency": req.currency,
+            "description": req.description,
+            "return_url": req.return_url,
+            "cancel_url": req.cancel_url,
+        }
+        try:
+            data = await self._post_with_retries(
+                "/v1/payments",
+                body=payload,
+                headers={IDEMPOTENCY_HEADER: req.idempotency_key},
+            )
+        except PaymentGatewayError:
+            self._stats.errors += 1
+            raise
+        provider_payment_id = data.get("id")
+        if not isinstance(provider_payment_id, str) or not provider_payment_id:
+            self._stats.errors += 1
+            raise PaymentGatewayError("Ответ провайдера без id платежа")
+        return CreatePaymentResult(
+            provider_payment_id=provider_payment_id,
+            checkout_url=data.get("checkout_url"),
+            raw=data,
+        )
+
+    async def _post_with_retries(
+        self, url: str, *, body: dict[str, Any], headers: dict[str, str]
+    ) -> dict[str, Any]:
+        deadline = time.monotonic() + self.total_timeout
+        attempt = 0
+        while True:
+            attempt += 1
+            self._stats.attempts += 1
+            retry_after: float | None = None
+            try:
+                self.breaker.before_call()
+            except CircuitOpenError as exc:
+                raise PaymentGatewayUnavailable(str(exc)) from exc
+            try:
+                async with asyncio.timeout(max(0.0, deadline - time.monotonic())):
+                    response = await self._client.post(url, json=body, headers=headers)
+            except asyncio.CancelledError:
+                self.breaker.record_cancelled()
+                raise
+            except (httpx.TransportError, TimeoutError) as exc:
+                self.breaker.record_failure()
+                error: PaymentGatewayError = PaymentGatewayUnavailable(
+                    f"Провайдер не ответил: {exc.__class__.__name__}"
+                )
+            else:
+                if response.status_code in RETRY_STATUSES:
+                    self.breaker.record_failure()
+                    retry_after = _retry_after_seconds(response)
+                    error = PaymentGatewayUnavailable(
+                        f"Провайдер ответил {response.status_code}"
+                    )
+                else:
+                    self.breaker.record_success()
+                    if response.is_success:
+                        return _json_object(response)
+                    raise PaymentGatewayRejected(
+                        f"Провайдер отклонил запрос: {response.status_code} "
+                        f"{response.text[:200]}"
+                    )
+
+            if attempt > self.max_retries:
+                raise error
+            # экспоненциальная пауза с jitter: воркеры не бьют провайдера разом
+            delay = random.uniform(0, self.retry_backoff * 2 ** (attempt - 1))
+            if retry_after is not None:
+                delay = max(delay, retry_after)
+            if time.monotonic() + delay >= deadline:
+                raise error
+            self._stats.retries += 1
+            await asyncio.sleep(delay)
+
+    def verify_webhook_signature(
+        self,
+        *,
+        headers: Mapping[str, str],
+        body: bytes,
+    ) -> bool:
+        """HMAC-SHA256 тела на webhook_secret в заголовке X-Signature."""
+        signature = headers.get(SIGNATURE_HEADER)
+        if not signature:
+            return False
+        expected = hmac.new(self._webhook_secret, body, hashlib.sha256).hexdigest()
+        return hmac.compare_digest(expected, signature)
+
+    def parse_webhook(
+        self,
+        *,
+        headers: Mapping[str, str],
+        body: bytes,
+    ) -> WebhookEvent:
+        """Преобразовать JSON webhook в структуру WebhookEvent."""
+        try:
+            payload = json.loads(body)
+        except ValueError as exc:
+            raise ValueError("Тело webhook - не JSON") from exc
+        # маршрут отвечает 400 на ValueError - и на "не объект", и на "нет поля"
+        fields = {}
+        for name in ("event_id", "provider_payment_id", "status"):
+            value = payload.get(name) if isinstance(payload, dict) else None
+            if not isinstance(value, str) or not value:
+                raise ValueError(f"Отсутствует или некорректный {name}")
+            fields[name] = value
+        return WebhookEvent(raw=payload, **fields)
+
+    def stats(self) -> dict[str, Any]:
+        """Счётчики вызовов и состояние breaker этого процесса."""
+        return {
+            "provider": self.provider_name,
+            **asdict(self._stats),
+            "circuit": self.breaker.stats(),
+        }
+
+
+def _retry_after_seconds(response: httpx.Response) -> float | None:
+    value = response.headers.get("Retry-After")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None  # дата HTTP - не поддерживаем, пауза по backoff
+
+
+def _json_object(response: httpx.Response) -> dict[str, Any]:
+    try:
+        data = response.json()
+    except ValueError as exc:
+        raise PaymentGatewayError("Ответ провайдера - не JSON") from exc
+    if not isinstance(data, dict):
+        raise PaymentGatewayError("Ответ провайдера - не JSON-объект")
+    return data
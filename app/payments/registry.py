@@ -0,0 +1,45 @@
+"""Платёжные шлюзы процесса по имени провайдера.
+
+Фоновым задачам (outbox) нужен шлюз того провайдера, через который
+создан платёж (`payments.provider`), а не шлюз текущего запроса.
+
+Регистрируются только шлюзы, включённые настройкой PAYMENT_GATEWAY:
+mock не проверяет подпись webhook, и при боевом провайдере его
+`/webhook/mock` был бы открытой дверью.
+"""
+
+from __future__ import annotations
+
+from app.config import settings
+from app.payments.gateway import PaymentGateway
+from app.payments.mock_gateway import MockPaymentGateway
+
+_gateways: dict[str, PaymentGateway] = {}
+_default_provider: str | None = None
+
+
+def register_gateway(gateway: PaymentGateway, *, default: bool = False) -> None:
+    """Зарегистрировать шлюз под его provider_name (заменяет прежний).
+
+    default=True - через него создаются новые платежи.
+    """
+    global _default_provider
+    _gateways[gateway.provider_name] = gateway
+    if default:
+        _default_provider = gateway.provider_name
+
+
+def get_default_gateway() -> PaymentGateway:
+    """Шлюз для новых платежей (PAYMENT_GATEWAY)."""
+    if _default_provider is None:
+        raise RuntimeError("Платёжный шлюз не зарегистрирован (см. lifespan)")
+    return _gateways[_default_provider]
+
+
+def get_gateway(provider: str) -> PaymentGateway | None:
+    """Шлюз провайдера или None, если такой не зарегистрирован."""
+    return _gateways.get(provider)
+
+
+if settings.PAYMENT_GATEWAY == "mock":
+    register_gateway(MockPaymentGateway(), default=True)
@@ -0,0 +1,35 @@
+"""Общий async-клиент Redis.
+
+Redis опционален: если REDIS_URL не задан, `get_redis()` вернёт None,
+и вызывающий код работает только со своим in-process уровнем.
+"""
+
+from __future__ import annotations
+
+from redis.asyncio import Redis
+
+from app.config import settings
+
+_redis: Redis | None = None
+
+
+def get_redis() -> Redis | None:
+    """Вернуть клиента Redis (создаётся лениво, один на процесс)."""
+    global _redis
+    if settings.REDIS_URL is None:
+        return None
+    if _redis is None:
+        _redis = Redis.from_url(
+            settings.REDIS_URL,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        )
+    return _redis
+
+
+async def close_redis() -> None:
+    """Закрыть пул соединений Redis (вызывается при остановке приложения)."""
+    global _redis
+    if _redis is not None:
+        await _redis.aclose()
+        _redis = None
@@ -0,0 +1,353 @@
+"""Репозиторий свёрток продаж (таблицы `sales_*`, `analytics_watermarks`).
+
+Обновление инкрементальное: берутся заказы, изменённые (orders.updated_at)
+после водяного знака, и для часов, в которых они были созданы, свёртки
+пересчитываются заново из orders/order_items - только эти часы, а не вся
+история. По updated_at, а не created_at: заказ попадает в выручку при
+оплате, то есть после создания, и может из неё выйти.
+
+Удаление заказов (каскадом с пользователем) водяной знак не видит -
+такие расхождения исправляет полный пересчёт (`reset_sales_rollups`).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Literal
+
+from sqlalchemy import Date, bindparam, cast, func, select, text
+from sqlalchemy.dialects.postgresql import aggregate_order_by, array_agg
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_visibility_watermark
+from app.models.category import Category
+from app.models.order import Order
+from app.models.product import Product
+from app.models.sales_rollup import (
+    AnalyticsWatermark,
+    SalesHourly,
+    SalesProductDaily,
+)
+from app.repositories.order_stats_repo import SPENT_STATUSES
+
+SALES_WATERMARK = "sales"
+
+# Заказы часа h (местное время): условие по created_at в UTC с запасом
+# в час с каждой стороны - для индекса, точное - по date_trunc (переход
+# на зимнее время: два часа UTC в одном местном).
+_ORDERS_OF_HOUR = """
+    JOIN orders o
+      ON o.created_at >= (h.bucket - interval '1 hour') AT TIME ZONE :tz
+     AND o.created_at < (h.bucket + interval '2 hours') AT TIME ZONE :tz
+     AND date_trunc('hour', o.created_at AT TIME ZONE :tz) = h.bucket
+     AND o.status IN :paid
+"""
+
+
+@dataclass(frozen=True, slots=True)
+class RollupRefreshResult:
+    high_water: datetime
+    orders: int  # изменённых заказов в пачке
+    hours: int  # пересчитанных часов
+    has_more: bool  # пачка упёрлась в batch_size
+
+
+async def refresh_sales_rollups(
+    session: AsyncSession, *, batch_size: int, tz: str
+) -> RollupRefreshResult | None:
+    """Учесть следующую пачку изменённых заказов и закоммитить.
+
+    Returns:
+        Итог пачки или None, если обновление уже идёт в другом процессе.
+
+    Всё - одна транзакция: свёртки и водяной знак меняются вместе, отчёты
+    видят либо старое состояние часа, либо новое. Строка водяного знака
+    блокируется (SKIP LOCKED) - второй воркер не ждёт, а пропускает запуск.
+    """
+    high_water = await session.scalar(
+        select(AnalyticsWatermark.high_water)
+        .where(AnalyticsWatermark.name == SALES_WATERMARK)
+        .with_for_update(skip_locked=True)
+    )
+    if high_water is None:
+        await session.rollback()
+        return None
+
+    # всё, что изменено до visible, уже закоммичено - заказы позже
+    # (или ещё не видимые) возьмёт следующий запуск
+    visible = await get_visibility_watermark(session)
+    nth = await session.scalar(
+        text(
+            """
+            SELECT updated_at FROM orders
+            WHERE updated_at > :after AND updated_at <= :visible
+            ORDER BY updated_at OFFSET :offset LIMIT 1
+            """
+        ),
+        {"after": high_water, "visible": visible, "offset": batch_size - 1},
+    )
+    has_more = nth is not None and nth < visible
+    upper = nth if has_more else visible
+
+    params = {"after": high_water, "upper": upper, "tz": tz}
+    await session.execute(
+        text(
+            "CREATE TEMP TABLE _sales_hours (bucket timestamp PRIMARY KEY) "
+            "ON COMMIT DROP"
+        )
+    )
+    orders = await session.scalar(
+        text(
+            """
+            WITH changed AS (
+                SELECT created_at FROM orders
+                WHERE updated_at > :after AND updated_at <= :upper
+            ),
+            hours AS (
+                INSERT INTO _sales_hours
+                SELECT DISTINCT date_trunc('hour', created_at AT TIME ZONE :tz)
+                FROM changed
+            )
+            SELECT count(*) FROM changed
+            """
+        ),
+        params,
+    )
+    hours = 0
+    if orders:
+        hours = await session.scalar(text("SELECT count(*) FROM _sales_hours"))
+        await _rebuild_hours(session, tz)
+    await session.execute(
+        text("UPDATE analytics_watermarks SET high_water = :upper WHERE name = :name"),
+        {"upper": upper, "name": SALES_WATERMARK},
+    )
+    await session.commit()
+    return RollupRefreshResult(
+        high_water=upper, orders=orders, hours=hours, has_more=has_more
+    )
+
+
+async def _rebuild_hours(session: AsyncSession, tz: str) -> None:
+    """Пересчитать свёртки часов из _sales_hours и их дней."""
+    paid = bindparam(
+        "paid",
+        sorted(SPENT_STATUSES),
+        type_=Order.__table__.c.status.type,
+        expanding=True,
+    )
+    params = {"tz": tz}
+    await session.execute(
+        text(
+            """
+            DELETE FROM sales_hourly
+            WHERE bucket IN (SELECT bucket FROM _sales_hours)
+            """
+        )
+    )
+    await session.execute(
+        text(
+            f"""
+            INSERT INTO sales_hourly (bucket, orders, units, revenue)
+            SELECT h.bucket, count(*), coalesce(sum(i.units), 0),
+                   sum(o.total_price)
+            FROM _sales_hours h
+            {_ORDERS_OF_HOUR}
+            CROSS JOIN LATERAL (
+                SELECT sum(quantity) AS units
+                FROM order_items WHERE order_id = o.id
+            ) i
+            GROUP BY h.bucket
+            """
+        ).bindparams(paid),
+        params,
+    )
+    await session.execute(
+        text(
+            """
+            DELETE FROM sales_product_hourly
+            WHERE bucket IN (SELECT bucket FROM _sales_hours)
+            """
+        )
+    )
+    await session.execute(
+        text(
+            f"""
+            INSERT INTO sales_product_hourly
+                (bucket, product_id, orders, units, revenue)
+            SELECT h.bucket, i.product_id, count(DISTINCT o.id),
+                   sum(i.quantity), sum(i.quantity * i.price)
+            FROM _sales_hours h
+            {_ORDERS_OF_HOUR}
+            JOIN order_items i ON i.order_id = o.id
+            GROUP BY h.bucket, i.product_id
+            """
+        ).bindparams(paid),
+        params,
+    )
+    # дни собираются из часовых строк (не больше 24 часов на товар)
+    await session.execute(
+        text(
+            """
+            DELETE FROM sales_product_daily
+            WHERE day IN (SELECT DISTINCT bucket::date FROM _sales_hours)
+            """
+        )
+    )
+    await session.execute(
+        text(
+            """
+            INSERT INTO sales_product_daily
+                (day, product_id, category_id, orders, units, revenue)
+            SELECT d.day, s.product_id, p.category_id,
+                   sum(s.orders), sum(s.units), sum(s.revenue)
+            FROM (SELECT DISTINCT bucket::date AS day FROM _sales_hours) d
+            JOIN sales_product_hourly s
+              ON s.bucket >= d.day AND s.bucket < d.day + 1
+            JOIN products p ON p.id = s.product_id
+            GROUP BY d.day, s.product_id, p.category_id
+            """
+        )
+    )
+
+
+async def reset_sales_rollups(session: AsyncSession) -> None:
+    """Очистить свёртки и водяной знак (и закоммитить).
+
+    Следующие обновления построят свёртки заново из всех заказов. Нужно
+    после смены ANALYTICS_TIMEZONE или удаления заказов.
+    """
+    await session.execute(
+        text(
+            "SELECT high_water FROM analytics_watermarks WHERE name = :name FOR UPDATE"
+        ),
+        {"name": SALES_WATERMARK},
+    )
+    await session.execute(
+        text("TRUNCATE sales_hourly, sales_product_hourly, sales_product_daily")
+    )
+    await session.execute(
+        text(
+            "UPDATE analytics_watermarks SET high_water = '-infinity' "
+            "WHERE name = :name"
+        ),
+        {"name": SALES_WATERMARK},
+    )
+    await session.commit()
+
+
+# ---------- Чтение отчётов ----------
+
+
+async def get_sales_watermark(session: AsyncSession) -> datetime | None:
+    """Свёртки учитывают изменения заказов до этого момента."""
+    return await session.scalar(
+        select(AnalyticsWatermark.high_water).where(
+            AnalyticsWatermark.name == SALES_WATERMARK
+        )
+    )
+
+
+async def get_revenue(
+    session: AsyncSession,
+    *,
+    start: date,
+    end: date,
+    granularity: Literal["day", "hour"],
+) -> list[tuple[datetime | date, int, int, Decimal]]:
+    """(период, заказов, штук, выручка) за дни [start, end], по возрастанию."""
+    period = (
+        SalesHourly.bucket
+        if granularity == "hour"
+        else cast(func.date_trunc("day", SalesHourly.bucket), Date)
+    )
+    stmt = (
+        select(
+            period.label("period"),
+            func.sum(SalesHourly.orders),
+            func.sum(SalesHourly.units),
+            func.sum(SalesHourly.revenue),
+        )
+        .where(
+            SalesHourly.bucket >= start, SalesHourly.bucket < end + timedelta(days=1)
+        )
+        .group_by(period)
+        .order_by(period)
+    )
+    return [tuple(row) for row in await session.execute(stmt)]
+
+
+async def get_category_sales(
+    session: AsyncSession, *, start: date, end: date
+) -> list[tuple[int, str | None, int, Decimal]]:
+    """(категория, название, штук, выручка) за дни [start, end], по выручке."""
+    revenue = func.sum(SalesProductDaily.revenue)
+    stmt = (
+        select(
+            SalesProductDaily.category_id,
+            Category.name,
+            func.sum(SalesProductDaily.units),
+            revenue,
+        )
+        .outerjoin(Category, Category.id == SalesProductDaily.category_id)
+        .where(SalesProductDaily.day >= start, SalesProductDaily.day <= end)
+        .group_by(SalesProductDaily.category_id, Category.name)
+        .order_by(revenue.desc(), SalesProductDaily.category_id)
+    )
+    return [tuple(row) for row in await session.execute(stmt)]
+
+
+async def get_product_sales(
+    session: AsyncSession,
+    *,
+    start: date,
+    end: date,
+    category_id: int | None = None,
+    order_by: Literal["revenue", "units"] = "revenue",
+    limit: int,
+    offset: int = 0,
+) -> list[tuple[int, str | None, int, int, int, Decimal]]:
+    """(товар, название, категория, заказов, штук, выручка) за дни [start, end].
+
+    Сортировка по order_by (убывание), затем по id товара.
+    """
+    units = func.sum(SalesProductDaily.units)
+    revenue = func.sum(SalesProductDaily.revenue)
+    primary = revenue if order_by == "revenue" else units
+    filters = [SalesProductDaily.day >= start, SalesProductDaily.day <= end]
+    if category_id is not None:
+        filters.append(SalesProductDaily.category_id == category_id)
+    grouped = (
+        select(
+            SalesProductDaily.product_id,
+            # категория на последний день периода
+            array_agg(
+                aggregate_order_by(
+                    SalesProductDaily.category_id, SalesProductDaily.day.desc()
+                )
+            )[1].label("category_id"),
+            func.sum(SalesProductDaily.orders).label("orders"),
+            units.label("units"),
+            revenue.label("revenue"),
+        )
+        .where(*filters)
+        .group_by(SalesProductDaily.product_id)
+        .order_by(primary.desc(), SalesProductDaily.product_id)
+        .limit(limit)
+        .offset(offset)
+        .subquery()
+    )
+    stmt = (
+        select(
+            grouped.c.product_id,
+            Product.name,
+            grouped.c.category_id,
+            grouped.c.orders,
+            grouped.c.units,
+            grouped.c.revenue,
+        )
+        .outerjoin(Product, Product.id == grouped.c.product_id)
+        .order_by(grouped.c[order_by].desc(), grouped.c.product_id)
+    )
+    return [tuple(row) for row in await session.execute(stmt)]
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
 from collections.abc import Sequence
+from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import Select, select
 
 from app.models.category import Category
 
@@ -13,15 +14,32 @@ class CategoryAlreadyExists(Exception):
     pass
 
 
+def _is_id(val: int | str) -> bool:
+    return isinstance(val, int) or (isinstance(val, str) and val.isdigit())
+
+
 async def get_category(session: AsyncSession, val: int | str) -> Category | None:
     """Category по id или slug (БЕЗ подгрузки товаров)"""
-    if isinstance(val, int) or (isinstance(val, str) and val.isdigit()):
+    if _is_id(val):
         return await session.get(Category, int(val))
     # Поиск по slug
     res = await session.execute(select(Category).where(Category.slug == val))
     return res.scalar_one_or_none()
 
 
+def _category_list_query(
+    *, only_active: bool, limit: int | None, offset: int | None
+) -> Select[tuple[Category]]:
+    stmt = select(Category).order_by(Category.id)
+    if only_active:
+        stmt = stmt.where(Category.is_active)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    if offset is not None:
+        stmt = stmt.offset(offset)
+    return stmt
+
+
 async def category_list(
     session: AsyncSession,
     *,
@@ -30,17 +48,26 @@ async def category_list(
     offset: int | None = 0,
 ) -> Sequence[Category]:
     """Получить список Category"""
-    stmt = select(Category).order_by(Category.id)
-    if only_active:
-        stmt = stmt.where(Category.is_active)
-    if limit is not None:
-        stmt = stmt.limit(limit)
-    if offset is not None:
-        stmt = stmt.offset(offset)
+    stmt = _category_list_query(only_active=only_active, limit=limit, offset=offset)
     categories = await session.execute(stmt)
     return categories.scalars().all()
 
 
+async def category_list_versions(
+    session: AsyncSession,
+    *,
+    only_active: bool = True,
+    limit: int | None = 50,
+    offset: int | None = 0,
+) -> Sequence[tuple[int, datetime]]:
+    """(id, updated_at) той же страницы, что отдаст category_list"""
+    page = _category_list_query(
+        only_active=only_active, limit=limit, offset=offset
+    ).subquery()
+    rows = await session.execute(select(page.c.id, page.c.updated_at))
+    return rows.tuples().all()
+
+
 async def create_category(session: AsyncSession, *, name: str, slug: str) -> Category:
     """Создать Category / raise unique error"""
     try:
@@ -1,13 +1,28 @@
 from __future__ import annotations
 from collections.abc import Sequence
 from dataclasses import dataclass
+from datetime import datetime, timedelta
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
+from sqlalchemy import (
+    Integer,
+    column,
+    exists,
+    func,
+    insert,
+    literal,
+    select,
+    true,
+    tuple_,
+    update,
+    values,
+)
+from sqlalchemy.orm import selectinload, with_expression
 
 from app.models.order import Order, OrderItem, OrderStatus
+from app.models.payment import ACTIVE_PAYMENT_STATUSES, Payment
 from app.models.product import Product
+from app.repositories.order_stats_repo import apply_status_change, stats_delta_upsert
 
 
 @dataclass(frozen=True, slots=True)
@@ -30,6 +45,20 @@ class ProductNotActive(Exception):
     pass
 
 
+class InsufficientStock(Exception):
+    """Недостаточно товара на складе."""
+
+    def __init__(self, product_ids: list[int]) -> None:
+        self.product_ids = product_ids
+        super().__init__(f"Недостаточно товара на складе: {product_ids}")
+
+
+class OrderNotPending(Exception):
+    """Заказ уже не в статусе pending (изменён параллельным запросом)."""
+
+    pass
+
+
 async def get_products_by_ids(
     session: AsyncSession, product_ids: list[int]
 ) -> list[Product]:
@@ -41,21 +70,159 @@ async def get_products_by_ids(
     return list(result.scalars().all())
 
 
+async def release_stock_for_orders(
+    session: AsyncSession, order_ids: Sequence[int]
+) -> None:
+    """Вернуть на склад остатки по позициям нескольких заказов (без коммита).
+
+    Строки товаров блокируются по возрастанию id, как при создании заказа,
+    иначе параллельные заказы и возвраты ловят дедлок.
+    """
+    product_ids = (
+        select(OrderItem.product_id)
+        .where(OrderItem.order_id.in_(order_ids))
+        .scalar_subquery()
+    )
+    await session.execute(
+        select(Product.id)
+        .where(Product.id.in_(product_ids))
+        .order_by(Product.id)
+        .with_for_update()
+    )
+    returned = (
+        select(OrderItem.product_id, func.sum(OrderItem.quantity).label("quantity"))
+        .where(OrderItem.order_id.in_(order_ids))
+        .group_by(OrderItem.product_id)
+        .subquery()
+    )
+    await session.execute(
+        update(Product)
+        .where(Product.id == returned.c.product_id)
+        .values(stock=Product.stock + returned.c.quantity)
+        .execution_options(synchronize_session=False)
+    )
+
+
 async def create_order_db(
-    session: AsyncSession, user_id: int, order_items: list[OrderItem], total_price
-) -> Order:
-    """Создать заказ в БД."""
-    new_order = Order(user_id=user_id, total_price=total_price, items=order_items)
-    session.add(new_order)
+    session: AsyncSession, user_id: int, items: Sequence[OrderItemData]
+) -> Order | None:
+    """
+    Создать заказ одним SQL-запросом и закоммитить (2 round trip: запрос + COMMIT).
+
+    WITH req AS (VALUES (product_id, quantity), ...),
+         locked AS (SELECT id FROM products WHERE id IN (...)
+                    ORDER BY id FOR UPDATE),
+         reserved AS (UPDATE products SET stock = stock - req.quantity
+                      FROM req, locked WHERE ... AND is_active
+                        AND stock >= req.quantity RETURNING id, price),
+         new_order AS (INSERT INTO orders ... SELECT sum(price * quantity)
+                       FROM reserved JOIN req HAVING count(*) = :n
+                       RETURNING *),
+         new_items AS (INSERT INTO order_items ... SELECT ...
+                       FROM new_order, reserved JOIN req),
+         order_stats AS (INSERT INTO user_order_stats ... SELECT ...
+                         FROM new_order ON CONFLICT (user_id) DO UPDATE ...)
+    SELECT * FROM new_order
+
+    Проверка активности, остатков, цены и сумма считаются в БД.
+    Условие `stock >= quantity` перепроверяется PostgreSQL после ожидания
+    блокировки строки, поэтому параллельные заказы одного SKU не уводят
+    остаток в минус. Строки блокируются по возрастанию id (CTE locked),
+    иначе пересекающиеся корзины ловят дедлок.
+
+    Returns:
+        Order | None: None - не все позиции удалось зарезервировать
+            (ничего не закоммичено, вызывающий обязан сделать rollback)
+    """
+    rows = sorted((item.product_id, item.quantity) for item in items)
+    req = (
+        values(column("product_id", Integer), column("quantity", Integer), name="req")
+        .data(rows)
+        .cte("req")
+    )
+    locked = (
+        select(Product.id)
+        .where(Product.id.in_([product_id for product_id, _ in rows]))
+        .order_by(Product.id)
+        .with_for_update()
+        .cte("locked")
+    )
+    reserved = (
+        update(Product)
+        .where(
+            Product.id == req.c.product_id,
+            Product.id == locked.c.id,
+            Product.is_active,
+            Product.stock >= req.c.quantity,
+        )
+        .values(stock=Product.stock - req.c.quantity)
+        .returning(Product.id, Product.price)
+        .cte("reserved")
+    )
+    new_order = (
+        insert(Order)
+        .from_select(
+            ["user_id", "status", "total_price"],
+            select(
+                literal(user_id),
+                literal(OrderStatus.PENDING, Order.__table__.c.status.type),
+                func.sum(reserved.c.price * req.c.quantity),
+            )
+            .select_from(reserved.join(req, req.c.product_id == reserved.c.id))
+            # все позиции должны списаться, иначе заказ не создаётся
+            .having(func.count() == len(rows)),
+        )
+        .returning(*Order.__table__.c)
+        .cte("new_order")
+    )
+    new_items = (
+        insert(OrderItem)
+        .from_select(
+            ["order_id", "product_id", "quantity", "price"],
+            select(new_order.c.id, reserved.c.id, req.c.quantity, reserved.c.price)
+            .select_from(new_order)
+            .join(reserved, true())
+            .join(req, req.c.product_id == reserved.c.id)
+            .order_by(reserved.c.id),
+        )
+        .cte("new_items")
+    )
+    # +1 заказ в сводке пользователя - тем же запросом
+    order_stats = stats_delta_upsert(
+        select(
+            new_order.c.user_id,
+            literal(1),
+            literal(0),
+            literal(0),
+            new_order.c.created_at,
+        )
+    ).cte("order_stats")
+    stmt = select(Order).from_statement(
+        select(*new_order.c).add_cte(new_items, order_stats, nest_here=False)
+    )
+    result = await session.execute(stmt)
+    new_order_obj = result.scalar_one_or_none()
+    if new_order_obj is None:
+        return None
     await session.commit()
-    await session.refresh(new_order)
-    return new_order
+    return new_order_obj
 
 
 async def get_order_by_id(
-    session: AsyncSession, order_id: int, *, load_items: bool = False
+    session: AsyncSession,
+    order_id: int,
+    *,
+    load_items: bool = False,
+    for_update: bool = False,
 ) -> Order | None:
-    """Получить заказ по ID."""
+    """Получить заказ по ID (позиции и товары - только при load_items).
+
+    for_update=True - заблокировать строку и перечитать её (без позиций).
+    """
+    if for_update:
+        return await session.get(
+            Order, order_id, with_for_update=True, populate_existing=True
+        )
     if not load_items:
         return await session.get(Order, order_id)
 
@@ -72,25 +239,142 @@ async def get_order_by_id(
 
 
 async def get_user_orders(
-    session: AsyncSession, user_id: int, *, limit: int = 50, offset: int = 0
+    session: AsyncSession,
+    user_id: int,
+    *,
+    limit: int = 50,
+    offset: int | None = 0,
+    after: tuple[datetime, int] | None = None,
+    with_summary: bool = False,
 ) -> Sequence[Order]:
-    """Получить список заказов пользователя."""
+    """Получить список заказов пользователя (без позиций), новые первыми.
+
+    after - keyset-режим: (created_at, id) последнего заказа прошлой
+    страницы; страница читается обратным сканом
+    ix_orders_user_id_created_at_id, OFFSET не нужен.
+    with_summary - заполнить Order.item_count (позиций) и Order.units
+    (штук) тем же запросом: LATERAL-агрегат по order_items на каждый
+    заказ страницы, без отдельных запросов на заказ.
+    """
     stmt = (
         select(Order)
         .where(Order.user_id == user_id)
-        .order_by(Order.created_at.desc())
+        .order_by(Order.created_at.desc(), Order.id.desc())
         .limit(limit)
-        .offset(offset)
     )
+    if after is not None:
+        stmt = stmt.where(tuple_(Order.created_at, Order.id) < tuple_(*after))
+    elif offset:
+        stmt = stmt.offset(offset)
+    if with_summary:
+        summary = (
+            select(
+                func.count().label("item_count"),
+                func.coalesce(func.sum(OrderItem.quantity), 0).label("units"),
+            )
+            .where(OrderItem.order_id == Order.id)
+            .lateral("order_summary")
+        )
+        stmt = stmt.join(summary, true()).options(
+            with_expression(Order.item_count, summary.c.item_count),
+            with_expression(Order.units, summary.c.units),
+        )
     result = await session.execute(stmt)
     return result.scalars().all()
 
 
+async def cancel_pending_order(session: AsyncSession, order_id: int) -> bool:
+    """
+    Перевести заказ pending -> cancelled условным UPDATE (без коммита).
+
+    Возвращает False, если заказ уже не pending: так параллельные отмены
+    не вернут резерв на склад дважды.
+    """
+    stmt = (
+        update(Order)
+        .where(Order.id == order_id, Order.status == OrderStatus.PENDING)
+        .values(status=OrderStatus.CANCELLED)
+        .returning(Order.id)
+        .execution_options(synchronize_session=False)
+    )
+    result = await session.execute(stmt)
+    return result.scalar_one_or_none() is not None
+
+
 async def update_order_status(
-    session: AsyncSession, order: Order, new_status: OrderStatus
+    session: AsyncSession, order: Order, new_status: OrderStatus, *, commit: bool = True
 ) -> Order:
-    """Обновить статус заказа."""
+    """Обновить статус заказа (commit=False - только flush).
+
+    Строка заказа сначала блокируется (FOR UPDATE) и перечитывается:
+    сводка user_order_stats меняется в той же транзакции по фактическому
+    старому статусу, поэтому параллельные смены статуса не учитываются
+    дважды.
+    """
+    await session.refresh(
+        order,
+        attribute_names=["user_id", "status", "total_price"],
+        with_for_update=True,
+    )
+    old_status = order.status
     order.status = new_status
+    await session.flush()
+    await apply_status_change(
+        session,
+        user_id=order.user_id,
+        total_price=order.total_price,
+        old_status=old_status,
+        new_status=new_status,
+    )
+    if not commit:
+        return order
     await session.commit()
     await session.refresh(order)
     return order
+
+
+async def expire_pending_orders(
+    session: AsyncSession, *, ttl: timedelta, limit: int
+) -> int:
+    """Отменить до `limit` заказов, висящих в pending дольше ttl, вернуть
+    резерв на склад и закоммитить. Возвращает число отменённых заказов.
+
+    UPDATE orders SET status = 'CANCELLED'
+    WHERE id IN (SELECT id FROM orders
+                 WHERE status = 'PENDING' AND created_at < now() - ttl
+                   AND NOT EXISTS (активный платёж)
+                 ORDER BY created_at LIMIT :limit FOR UPDATE SKIP LOCKED)
+
+    Заказы, занятые другой транзакцией (оплата, отмена, другой воркер),
+    пропускаются. Заказ с активным платежом не трогаем: сначала истекает
+    платёж (expire_stale_payments), и только следующий запуск отменит
+    заказ - так не берём блокировки в порядке, обратном webhook
+    (платёж -> заказ). Сводка user_order_stats не меняется: pending и
+    cancelled одинаково не входят в оплаченные.
+    """
+    stale = (
+        select(Order.id)
+        .where(
+            Order.status == OrderStatus.PENDING,
+            Order.created_at < func.now() - ttl,
+            ~exists().where(
+                Payment.order_id == Order.id,
+                Payment.status.in_(ACTIVE_PAYMENT_STATUSES),
+            ),
+        )
+        .order_by(Order.created_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    result = await session.execute(
+        update(Order)
+        .where(Order.id.in_(stale.scalar_subquery()))
+        .values(status=OrderStatus.CANCELLED)
+        .returning(Order.id)
+        .execution_options(synchronize_session=False)
+    )
+    order_ids = result.scalars().all()
+    if order_ids:
+        await release_stock_for_orders(session, order_ids)
+    await session.commit()
+    return len(order_ids)
@@ -0,0 +1,198 @@
+"""Репозиторий сводки заказов пользователя (таблица `user_order_stats`).
+
+Все изменения - приращения одним `INSERT ... ON CONFLICT DO UPDATE`
+в транзакции самого заказа: строка пользователя блокируется только на
+время этой транзакции, параллельные заказы одного пользователя
+складываются, а не перезаписывают друг друга.
+"""
+
+from __future__ import annotations
+
+from decimal import Decimal
+
+from sqlalchemy import Select, bindparam, func, literal, select, text
+from sqlalchemy.dialects.postgresql import Insert, insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.order import Order, OrderStatus
+from app.models.user_order_stats import UserOrderStats
+
+# Статусы, в которых заказ считается оплаченным (входит в lifetime_spend)
+SPENT_STATUSES = frozenset(
+    {OrderStatus.PAID, OrderStatus.SHIPPED, OrderStatus.DELIVERED}
+)
+
+_DELTA_COLUMNS = [
+    "user_id",
+    "order_count",
+    "paid_order_count",
+    "lifetime_spend",
+    "last_order_at",
+]
+
+
+def stats_delta_upsert(source: Select) -> Insert:
+    """Upsert, прибавляющий к сводке строки `source`.
+
+    source - SELECT с колонками (user_id, order_count, paid_order_count,
+    lifetime_spend, last_order_at); last_order_at может быть NULL
+    (greatest() в PostgreSQL NULL пропускает).
+    """
+    stmt = pg_insert(UserOrderStats).from_select(_DELTA_COLUMNS, source)
+    current = UserOrderStats.__table__.c
+    return stmt.on_conflict_do_update(
+        index_elements=[UserOrderStats.user_id],
+        set_={
+            "order_count": current.order_count + stmt.excluded.order_count,
+            "paid_order_count": (
+                current.paid_order_count + stmt.excluded.paid_order_count
+            ),
+            "lifetime_spend": current.lifetime_spend + stmt.excluded.lifetime_spend,
+            "last_order_at": func.greatest(
+                current.last_order_at, stmt.excluded.last_order_at
+            ),
+            "updated_at": func.now(),
+        },
+    )
+
+
+async def apply_status_change(
+    session: AsyncSession,
+    *,
+    user_id: int,
+    total_price: Decimal,
+    old_status: OrderStatus,
+    new_status: OrderStatus,
+) -> None:
+    """Учесть смену статуса заказа в сводке (без коммита).
+
+    Меняет сводку, только если заказ вошёл в оплаченные или вышел из них.
+    """
+    paid_delta = int(new_status in SPENT_STATUSES) - int(old_status in SPENT_STATUSES)
+    if not paid_delta:
+        return
+    await session.execute(
+        stats_delta_upsert(
+            select(
+                literal(user_id),
+                literal(0),
+                literal(paid_delta),
+                literal(total_price * paid_delta),
+                literal(None),
+            )
+        )
+    )
+
+
+async def get_user_order_stats(
+    session: AsyncSession, user_id: int
+) -> UserOrderStats | None:
+    """Сводка пользователя по первичному ключу (None - заказов ещё не было)."""
+    return await session.get(UserOrderStats, user_id)
+
+
+async def reconcile_user_order_stats(
+    session: AsyncSession, *, after_user_id: int, batch_size: int
+) -> tuple[int | None, int]:
+    """Пересчитать сводку из orders для следующей пачки пользователей и закоммитить.
+
+    Returns:
+        (id последнего пользователя пачки или None - пользователи кончились,
+         число исправленных строк сводки)
+
+    Сначала блокируются существующие строки сводки пачки: заказы этих
+    пользователей, созданные во время пересчёта, ждут его коммита и
+    прибавляются уже к пересчитанному значению. Строки, которых ещё нет,
+    только вставляются (ON CONFLICT DO NOTHING) - если параллельный заказ
+    успел вставить свою, её поправит следующая сверка.
+    """
+    upper = await session.scalar(
+        text(
+            """
+            SELECT max(id) FROM (
+                SELECT id FROM users WHERE id > :after ORDER BY id LIMIT :limit
+            ) batch
+            """
+        ),
+        {"after": after_user_id, "limit": batch_size},
+    )
+    if upper is None:
+        await session.rollback()
+        return None, 0
+
+    params = {"after": after_user_id, "upper": upper}
+    await session.execute(
+        text(
+            """
+            SELECT user_id FROM user_order_stats
+            WHERE user_id > :after AND user_id <= :upper
+            ORDER BY user_id FOR UPDATE
+            """
+        ),
+        params,
+    )
+    fixed = await session.scalar(
+        text(
+            """
+            WITH actual AS (
+                SELECT user_id,
+                       count(*) AS order_count,
+                       count(*) FILTER (WHERE status IN :spent) AS paid_order_count,
+                       coalesce(sum(total_price) FILTER (WHERE status IN :spent), 0)
+                           AS lifetime_spend,
+                       max(created_at) AS last_order_at
+                FROM orders
+                WHERE user_id > :after AND user_id <= :upper
+                GROUP BY user_id
+            ),
+            updated AS (
+                UPDATE user_order_stats s
+                SET order_count = a.order_count,
+                    paid_order_count = a.paid_order_count,
+                    lifetime_spend = a.lifetime_spend,
+                    last_order_at = a.last_order_at,
+                    updated_at = now()
+                FROM actual a
+                WHERE s.user_id = a.user_id
+                  AND (s.order_count, s.paid_order_count, s.lifetime_spend,
+                       s.last_order_at)
+                      IS DISTINCT FROM
+                      (a.order_count, a.paid_order_count, a.lifetime_spend,
+                       a.last_order_at)
+                RETURNING s.user_id
+            ),
+            inserted AS (
+                INSERT INTO user_order_stats
+                    (user_id, order_count, paid_order_count, lifetime_spend,
+                     last_order_at)
+                SELECT user_id, order_count, paid_order_count, lifetime_spend,
+                       last_order_at
+                FROM actual a
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM user_order_stats s WHERE s.user_id = a.user_id
+                )
+                ON CONFLICT (user_id) DO NOTHING
+                RETURNING user_id
+            ),
+            deleted AS (
+                DELETE FROM user_order_stats s
+                WHERE s.user_id > :after AND s.user_id <= :upper
+                  AND NOT EXISTS (SELECT 1 FROM actual a WHERE a.user_id = s.user_id)
+                RETURNING s.user_id
+            )
+            SELECT (SELECT count(*) FROM updated)
+                 + (SELECT count(*) FROM inserted)
+                 + (SELECT count(*) FROM deleted)
+            """
+        ).bindparams(
+            bindparam(
+                "spent",
+                sorted(SPENT_STATUSES),
+                type_=Order.__table__.c.status.type,
+                expanding=True,
+            )
+        ),
+        params,
+    )
+    await session.commit()
+    return upper, fixed or 0
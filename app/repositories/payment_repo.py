@@ -6,13 +6,18 @@
 
 from __future__ import annotations
 
+from collections.abc import Sequence
+from datetime import timedelta
 from decimal import Decimal
 from typing import Any
 
-from sqlalchemy import select
+from sqlalchemy import case, exists, func, insert, literal, or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.payment import Payment, PaymentStatus
+from app.models.order import Order, OrderStatus
+from app.models.payment import ACTIVE_PAYMENT_STATUSES, Payment, PaymentStatus
+
+EXPIRED_FAIL_REASON = "expired"
 
 
 async def create_payment(
@@ -23,22 +28,172 @@ async def create_payment(
     currency: str,
     provider: str,
     idempotency_key: str,
+    lease_seconds: float,
 ) -> Payment:
-    """Создать платеж в локальной БД."""
-    payment = Payment(
-        order_id=order_id,
-        amount=amount,
-        currency=currency,
-        provider=provider,
-        status=PaymentStatus.CREATED,
-        idempotency_key=idempotency_key,
+    """Создать платеж в локальной БД (без коммита) - INSERT ... RETURNING.
+
+    Платёж сразу арендован на lease_seconds: пока запрос передаёт его
+    провайдеру, outbox его не подхватит. RETURNING вместо refresh после
+    коммита - иначе refresh открыл бы новую транзакцию и держал
+    соединение всё время вызова провайдера.
+    """
+    stmt = (
+        insert(Payment)
+        .values(
+            order_id=order_id,
+            amount=amount,
+            currency=currency,
+            provider=provider,
+            status=PaymentStatus.CREATED,
+            idempotency_key=idempotency_key,
+            provider_attempts=1,
+            locked_until=func.now() + timedelta(seconds=lease_seconds),
+        )
+        .returning(Payment)
+    )
+    return (await session.scalars(stmt)).one()
+
+
+async def claim_created_payment(
+    session: AsyncSession, payment_id: int, *, lease_seconds: float
+) -> Payment | None:
+    """Арендовать платёж в CREATED для повторной передачи провайдеру
+    (без коммита). None - платёж уже передан или аренда ещё не истекла."""
+    stmt = (
+        update(Payment)
+        .where(
+            Payment.id == payment_id,
+            Payment.status == PaymentStatus.CREATED,
+            or_(Payment.locked_until.is_(None), Payment.locked_until < func.now()),
+        )
+        .values(
+            locked_until=func.now() + timedelta(seconds=lease_seconds),
+            provider_attempts=Payment.provider_attempts + 1,
+        )
+        .returning(Payment)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    return (await session.scalars(stmt)).one_or_none()
+
+
+async def claim_outbox_batch(
+    session: AsyncSession, *, limit: int, lease_seconds: float
+) -> Sequence[Payment]:
+    """
+    Захватить пачку платежей, не переданных провайдеру, и закоммитить захват.
+
+    UPDATE payments SET locked_until = now() + lease,
+        provider_attempts = provider_attempts + 1
+    WHERE id IN (SELECT id FROM payments
+                 WHERE status = 'CREATED'
+                   AND (locked_until IS NULL OR locked_until < now())
+                   AND заказ ещё pending
+                 ORDER BY id LIMIT :limit FOR UPDATE SKIP LOCKED)
+    RETURNING *
+
+    Платежи отменённых заказов не передаются - их закроет истечение
+    (app.services.expiry).
+    """
+    queued = (
+        select(Payment.id)
+        .where(
+            Payment.status == PaymentStatus.CREATED,
+            or_(Payment.locked_until.is_(None), Payment.locked_until < func.now()),
+            exists().where(
+                Order.id == Payment.order_id, Order.status == OrderStatus.PENDING
+            ),
+        )
+        .order_by(Payment.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    stmt = (
+        update(Payment)
+        .where(Payment.id.in_(queued.scalar_subquery()))
+        .values(
+            locked_until=func.now() + timedelta(seconds=lease_seconds),
+            provider_attempts=Payment.provider_attempts + 1,
+        )
+        .returning(Payment)
+        .execution_options(synchronize_session=False)
     )
-    session.add(payment)
+    rows = (await session.scalars(stmt)).all()
+    await session.commit()
+    return sorted(rows, key=lambda row: row.id)
+
+
+async def apply_provider_result(
+    session: AsyncSession,
+    payment_id: int,
+    *,
+    provider_payment_id: str,
+    checkout_url: str | None,
+    provider_payload: dict[str, Any] | None,
+) -> Payment:
+    """Записать ответ провайдера о создании платежа и закоммитить.
+
+    Условный UPDATE, а не запись загруженного объекта: пока шёл вызов,
+    платёж мог измениться (истёк, пришёл webhook, ответ уже записал
+    outbox). Данные провайдера пишутся один раз (provider_payment_id IS
+    NULL) - по ним webhook находит платёж, даже отменённый; статус
+    CREATED -> PENDING меняется, только если его никто не сдвинул.
+    """
+    stmt = (
+        update(Payment)
+        .where(Payment.id == payment_id, Payment.provider_payment_id.is_(None))
+        .values(
+            provider_payment_id=provider_payment_id,
+            checkout_url=checkout_url,
+            provider_payload=provider_payload,
+            status=case(
+                (
+                    Payment.status == PaymentStatus.CREATED,
+                    literal(PaymentStatus.PENDING, Payment.__table__.c.status.type),
+                ),
+                else_=Payment.status,
+            ),
+            locked_until=None,
+        )
+        .returning(Payment)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    payment = (await session.scalars(stmt)).one_or_none()
+    if payment is None:
+        payment = (
+            await session.scalars(
+                select(Payment)
+                .where(Payment.id == payment_id)
+                .execution_options(populate_existing=True)
+            )
+        ).one()
     await session.commit()
-    await session.refresh(payment)
     return payment
 
 
+async def release_payment_lease(
+    session: AsyncSession, payment_id: int, *, retry_after: float
+) -> None:
+    """Неудачная попытка передачи: повторить не раньше чем через retry_after."""
+    await session.execute(
+        update(Payment)
+        .where(Payment.id == payment_id, Payment.status == PaymentStatus.CREATED)
+        .values(locked_until=func.now() + timedelta(seconds=retry_after))
+    )
+    await session.commit()
+
+
+async def fail_created_payment(
+    session: AsyncSession, payment_id: int, *, reason: str
+) -> None:
+    """Закрыть платёж, так и не переданный провайдеру, как FAILED."""
+    await session.execute(
+        update(Payment)
+        .where(Payment.id == payment_id, Payment.status == PaymentStatus.CREATED)
+        .values(status=PaymentStatus.FAILED, fail_reason=reason, locked_until=None)
+    )
+    await session.commit()
+
+
 async def get_active_payment_for_order(
     session: AsyncSession,
     order_id: int,
@@ -46,7 +201,7 @@ async def get_active_payment_for_order(
     """Найти активный (CREATED или PENDING) платёж по заказу."""
     stmt = select(Payment).where(
         Payment.order_id == order_id,
-        Payment.status.in_([PaymentStatus.CREATED, PaymentStatus.PENDING]),
+        Payment.status.in_(ACTIVE_PAYMENT_STATUSES),
     )
     result = await session.execute(stmt)
     return result.scalars().first()
@@ -54,44 +209,94 @@ async def get_active_payment_for_order(
 
 async def get_payment_by_provider_payment_id(
     session: AsyncSession,
+    *,
+    provider: str,
     provider_payment_id: str,
+    for_update: bool = False,
 ) -> Payment | None:
-    """Найти платеж по идентификатору провайдера."""
-    stmt = select(Payment).where(Payment.provider_payment_id == provider_payment_id)
+    """Найти платеж провайдера `provider` по его идентификатору у провайдера.
+
+    Провайдер - часть ключа: webhook одного провайдера не может изменить
+    платёж, созданный через другого. for_update=True - заблокировать
+    строку (FOR UPDATE) и перечитать её до конца транзакции.
+    """
+    stmt = select(Payment).where(
+        Payment.provider == provider,
+        Payment.provider_payment_id == provider_payment_id,
+    )
+    if for_update:
+        stmt = stmt.with_for_update().execution_options(populate_existing=True)
     result = await session.execute(stmt)
     return result.scalar_one_or_none()
 
 
-async def update_payment_after_create(
+async def update_payment_status(
     session: AsyncSession,
     payment: Payment,
     *,
-    provider_payment_id: str,
-    checkout_url: str | None,
-    provider_payload: dict[str, Any] | None,
+    status: PaymentStatus,
+    provider_payload: dict[str, Any] | None = None,
+    fail_reason: str | None = None,
+    commit: bool = True,
 ) -> Payment:
-    """Записать данные провайдера после успешного создания платежа."""
-    payment.provider_payment_id = provider_payment_id
-    payment.checkout_url = checkout_url
+    """Обновить статус платежа и сопутствующие поля.
+
+    commit=False - только flush, транзакцию завершает вызывающий.
+    """
+    payment.status = status
     payment.provider_payload = provider_payload
-    payment.status = PaymentStatus.PENDING
+    payment.fail_reason = fail_reason
+    if not commit:
+        await session.flush()
+        return payment
     await session.commit()
     await session.refresh(payment)
     return payment
 
 
-async def update_payment_status(
+async def flag_payment_for_refund(
     session: AsyncSession,
     payment: Payment,
     *,
-    status: PaymentStatus,
-    provider_payload: dict[str, Any] | None = None,
-    fail_reason: str | None = None,
+    provider_payload: dict[str, Any] | None,
 ) -> Payment:
-    """Обновить статус платежа и сопутствующие поля."""
-    payment.status = status
+    """Пометить платёж к возврату (без коммита); статус не меняется."""
+    payment.refund_required_at = func.now()
     payment.provider_payload = provider_payload
-    payment.fail_reason = fail_reason
-    await session.commit()
-    await session.refresh(payment)
+    await session.flush()
     return payment
+
+
+async def expire_stale_payments(
+    session: AsyncSession, *, ttl: timedelta, limit: int
+) -> int:
+    """Отменить до `limit` платежей, висящих в CREATED/PENDING дольше ttl,
+    и закоммитить. Возвращает число отменённых платежей.
+
+    Платежи, занятые другой транзакцией (обработка webhook), пропускаются
+    (SKIP LOCKED) - их возьмёт следующий запуск, если webhook их не закрыл.
+    Заказ не трогаем: он остаётся pending и может быть оплачен заново
+    или истечёт сам (expire_pending_orders). Провайдер об отмене не знает:
+    если покупатель всё же заплатит, webhook не оживит платёж, а пометит
+    его к возврату (refund_required_at).
+    """
+    stale = (
+        select(Payment.id)
+        .where(
+            Payment.status.in_(ACTIVE_PAYMENT_STATUSES),
+            Payment.created_at < func.now() - ttl,
+        )
+        .order_by(Payment.created_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    result = await session.execute(
+        update(Payment)
+        .where(Payment.id.in_(stale.scalar_subquery()))
+        .values(status=PaymentStatus.CANCELED, fail_reason=EXPIRED_FAIL_REASON)
+        .returning(Payment.id)
+        .execution_options(synchronize_session=False)
+    )
+    expired = len(result.scalars().all())
+    await session.commit()
+    return expired
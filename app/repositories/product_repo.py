@@ -1,13 +1,29 @@
 from __future__ import annotations
-from collections.abc import Sequence
+from collections.abc import Collection, Sequence
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any
 
 
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncScalarResult, AsyncSession
 
+from app.models.category import Category
 from app.models.product import Product
 
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
+from sqlalchemy import (
+    REAL,
+    Select,
+    bindparam,
+    func,
+    or_,
+    select,
+    text,
+    tuple_,
+    union_all,
+)
+from sqlalchemy.orm import InstrumentedAttribute, aliased, joinedload, selectinload
 
 from sqlalchemy.exc import IntegrityError
 
@@ -16,30 +32,299 @@ class ProductAlreadyExists(Exception):
     pass
 
 
+@dataclass(frozen=True, slots=True)
+class ProductImportRow:
+    """Проверенная строка импорта; line - номер строки во входном файле."""
+
+    line: int
+    name: str
+    description: str | None
+    price: Decimal
+    category_id: int
+    stock: int | None  # None - остаток в строке не задан, не трогаем
+
+
+@dataclass(frozen=True, slots=True)
+class ProductUpsertResult:
+    """Итог загрузки одной пачки импорта."""
+
+    inserted: int
+    updated: int
+    unchanged: int
+    missing_category_lines: list[tuple[int, int]]  # (line, category_id)
+
+
+# Та же конфигурация, что в триггере trg_products_search_vector.
+SEARCH_CONFIG = "russian"
+
+
 async def get_product_with_relation(session: AsyncSession, id: int) -> Product | None:
     """Product по id с подгрузкой категории"""
     return await session.get(Product, id, options=[selectinload(Product.category)])
 
 
+class ProductSort(str, Enum):
+    """Порядок каталога; у каждого варианта свой индекс."""
+
+    ID = "id"
+    PRICE_ASC = "price_asc"
+    PRICE_DESC = "price_desc"
+    NEWEST = "newest"
+
+
+# Ключ сортировки (он же ключ keyset-курсора) и направление.
+# id - последняя колонка ключа, поэтому порядок однозначный.
+_SORT_KEYS: dict[ProductSort, tuple[tuple[InstrumentedAttribute, ...], bool]] = {
+    ProductSort.ID: ((Product.id,), False),
+    ProductSort.PRICE_ASC: ((Product.price, Product.id), False),
+    ProductSort.PRICE_DESC: ((Product.price, Product.id), True),
+    ProductSort.NEWEST: ((Product.created_at, Product.id), True),
+}
+
+
+def product_sort_key(product: Product, sort: ProductSort) -> tuple[Any, ...]:
+    """Значения ключа сортировки товара (для курсора следующей страницы)."""
+    columns, _ = _SORT_KEYS[sort]
+    return tuple(getattr(product, column.key) for column in columns)
+
+
+async def resolve_category_ids(
+    session: AsyncSession,
+    *,
+    category_id: int | None = None,
+    category_ids: Sequence[int] = (),
+    category_slugs: Sequence[str] = (),
+) -> set[int] | None:
+    """Объединить фильтры категорий (id и slug) в один набор id.
+
+    None - заданы только slug, и ни один не найден: выборка пустая.
+    """
+    ids = set(category_ids)
+    if category_id:  # для категории товара, если надо
+        ids.add(category_id)
+    if category_slugs:
+        resolved = await session.scalars(
+            select(Category.id).where(Category.slug.in_(category_slugs))
+        )
+        ids.update(resolved)
+        if not ids:
+            return None
+    return ids
+
+
 async def get_product_list(
     session: AsyncSession,
     category_id: int | None = None,
     only_active: bool = True,
     limit: int | None = 50,
     offset: int | None = 0,
+    *,
+    category_ids: Collection[int] = (),
+    price_min: Decimal | None = None,
+    price_max: Decimal | None = None,
+    created_after: datetime | None = None,
+    sort: ProductSort = ProductSort.ID,
+    after: tuple[Any, ...] | None = None,
 ) -> Sequence[Product]:
-    """Получить список с Products"""
-    stmt = select(Product).order_by(Product.id)
-    if category_id:  # для категории товара, если надо
-        stmt = stmt.where(Product.category_id == category_id)
+    """Получить список с Products
+
+    Категории (category_id, category_ids) объединяются по ИЛИ; slug
+    переводятся в id заранее (resolve_category_ids).
+    after - keyset-режим: значения ключа сортировки последней строки прошлой
+    страницы (см. product_sort_key); OFFSET в этом режиме не нужен.
+    """
+    ids = set(category_ids)
+    if category_id:
+        ids.add(category_id)
+    stmt = product_list_query(
+        category_ids=ids,
+        only_active=only_active,
+        limit=limit,
+        offset=offset,
+        price_min=price_min,
+        price_max=price_max,
+        created_after=created_after,
+        sort=sort,
+        after=after,
+    )
+    products = await session.execute(stmt)
+    return products.scalars().all()
+
+
+async def get_product_list_versions(
+    session: AsyncSession, **filters: Any
+) -> Sequence[tuple[int, datetime]]:
+    """(id, updated_at) той же страницы, что отдаст get_product_list.
+
+    Дешёвая проверка для условного GET: без остальных колонок и ORM-объектов.
+    Аргументы - как у product_list_query.
+    """
+    page = product_list_query(**filters).subquery()
+    rows = await session.execute(select(page.c.id, page.c.updated_at))
+    return rows.tuples().all()
+
+
+async def get_products_with_relation(
+    session: AsyncSession, ids: Collection[int]
+) -> dict[int, Product]:
+    """Products по id с категориями - одним запросом (IN + JOIN).
+
+    Ненайденных id в ответе нет.
+    """
+    if not ids:
+        return {}
+    stmt = (
+        select(Product).where(Product.id.in_(ids)).options(joinedload(Product.category))
+    )
+    products = await session.scalars(stmt)
+    return {product.id: product for product in products}
+
+
+async def get_product_versions(
+    session: AsyncSession, ids: Collection[int]
+) -> dict[int, datetime]:
+    """updated_at товаров по id (ненайденных в ответе нет)."""
+    if not ids:
+        return {}
+    result = await session.execute(
+        select(Product.id, Product.updated_at).where(Product.id.in_(ids))
+    )
+    return {product_id: updated_at for product_id, updated_at in result}
+
+
+def product_list_query(
+    *,
+    category_ids: Collection[int] = (),
+    only_active: bool = True,
+    limit: int | None = 50,
+    offset: int | None = 0,
+    price_min: Decimal | None = None,
+    price_max: Decimal | None = None,
+    created_after: datetime | None = None,
+    sort: ProductSort = ProductSort.ID,
+    after: tuple[Any, ...] | None = None,
+) -> Select[tuple[Product]]:
+    """SELECT для каталога (его же проверяет benchmarks/plans.py).
+
+    Каждый порядок обслуживается индексом без сортировки выборки:
+    id - PK / (category_id, id); price - (price, id) / (category_id, price, id);
+    newest - (created_at, id) / (category_id, created_at, id), обход назад.
+    Для нескольких категорий запрос собирается как UNION ALL из запросов по
+    каждой категории: Postgres сливает их упорядоченные индексные сканы
+    (Merge Append) вместо сортировки всех подходящих строк.
+    """
+    columns, descending = _SORT_KEYS[sort]
+    order_by = [column.desc() if descending else column for column in columns]
+
+    stmt = select(Product)
     if only_active:
         stmt = stmt.where(Product.is_active)
+    if price_min is not None:
+        stmt = stmt.where(Product.price >= price_min)
+    if price_max is not None:
+        stmt = stmt.where(Product.price <= price_max)
+    if created_after is not None:
+        stmt = stmt.where(Product.created_at > created_after)
+    if after is not None:
+        key, bound = tuple_(*columns), tuple_(*after)
+        stmt = stmt.where(key < bound if descending else key > bound)
+
+    if len(category_ids) > 1:
+        # в каждой ветке достаточно первых offset + limit строк
+        branch_limit = None if limit is None else limit + (offset or 0)
+        branches = [
+            stmt.where(Product.category_id == cid)
+            .order_by(*order_by)
+            .limit(branch_limit)
+            for cid in sorted(category_ids)
+        ]
+        merged = union_all(*branches).subquery()
+        product = aliased(Product, merged)
+        stmt = select(product).order_by(
+            *[
+                merged.c[column.key].desc() if descending else merged.c[column.key]
+                for column in columns
+            ]
+        )
+    else:
+        if category_ids:
+            stmt = stmt.where(Product.category_id == next(iter(category_ids)))
+        stmt = stmt.order_by(*order_by)
+
     if limit is not None:
         stmt = stmt.limit(limit)
     if offset is not None:
         stmt = stmt.offset(offset)
-    products = await session.execute(stmt)
-    return products.scalars().all()
+    return stmt
+
+
+async def search_products(
+    session: AsyncSession,
+    *,
+    query: str,
+    category_id: int | None = None,
+    limit: int = 20,
+    after: tuple[float, int] | None = None,
+) -> Sequence[tuple[Product, float]]:
+    """Поиск активных товаров по тексту с ранжированием.
+
+    Совпадение - полнотекстовое по name/description (GIN по search_vector)
+    или нечёткое по name с опечатками (pg_trgm, оператор `<%`, GIN trgm).
+    score = ts_rank_cd + word_similarity; сортировка score DESC, id ASC.
+
+    after - keyset-режим: (score, id) последней строки прошлой страницы.
+    """
+    ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, query)
+    score = (
+        func.ts_rank_cd(Product.search_vector, ts_query)
+        + func.word_similarity(query, Product.name)
+    ).cast(REAL)
+    stmt = (
+        select(Product, score.label("score"))
+        .where(
+            Product.is_active,
+            or_(
+                Product.search_vector.op("@@")(ts_query),
+                bindparam("q_trgm", query).op("<%")(Product.name),
+            ),
+        )
+        .order_by(score.desc(), Product.id)
+        .limit(limit)
+    )
+    if category_id:
+        stmt = stmt.where(Product.category_id == category_id)
+    if after is not None:
+        after_score = bindparam("after_score", after[0], type_=REAL)
+        stmt = stmt.where(
+            or_(
+                score < after_score,
+                (score == after_score) & (Product.id > after[1]),
+            )
+        )
+    result = await session.execute(stmt)
+    return [(product, product_score) for product, product_score in result.all()]
+
+
+async def stream_products_for_export(
+    session: AsyncSession,
+    *,
+    updated_after: datetime | None = None,
+    batch_size: int = 1000,
+) -> AsyncScalarResult[Product]:
+    """Все товары (включая неактивные) через серверный курсор.
+
+    Строки приходят с сервера пачками по batch_size; полная выгрузка идёт
+    по первичному ключу, инкрементальная - по ix_products_updated_at_id.
+    Курсор держит соединение и транзакцию, пока результат не дочитан.
+    """
+    stmt = select(Product)
+    if updated_after is None:
+        stmt = stmt.order_by(Product.id)
+    else:
+        stmt = stmt.where(Product.updated_at > updated_after).order_by(
+            Product.updated_at, Product.id
+        )
+    return await session.stream_scalars(stmt.execution_options(yield_per=batch_size))
 
 
 async def create_product(session: AsyncSession, **kwargs) -> Product:
@@ -71,3 +356,126 @@ async def deactivate_product(
     product.is_active = False
     await session.commit()
     return product
+
+
+# Временная таблица живёт до конца транзакции (одна пачка импорта), поэтому
+# совместима с PgBouncer в transaction mode и не требует миграции.
+_IMPORT_STAGING_TABLE = "product_import_staging"
+_IMPORT_COLUMNS = ("line", "name", "description", "price", "category_id", "stock")
+
+
+async def upsert_products_bulk(
+    session: AsyncSession, rows: Sequence[ProductImportRow]
+) -> ProductUpsertResult:
+    """Загрузить пачку товаров через COPY во временную таблицу и upsert по name.
+
+    Строки с несуществующей категорией не загружаются - возвращаются номера
+    строк. Если name повторяется внутри пачки, побеждает последняя строка.
+    Не изменившиеся товары не обновляются (updated_at и поисковый вектор
+    остаются прежними). Остаток, заданный в строке, записывается как есть;
+    не заданный (stock=None) у существующего товара не меняется - иначе
+    импорт цен обнулял бы склад и затирал списания заказов, - а новый
+    товар получает 0. Коммит - за вызывающим.
+    """
+    await session.execute(
+        text(
+            f"""
+            CREATE TEMP TABLE {_IMPORT_STAGING_TABLE} (
+                line integer NOT NULL,
+                name varchar(100) NOT NULL,
+                description varchar(255),
+                price numeric(10, 2) NOT NULL,
+                category_id integer NOT NULL,
+                stock integer
+            ) ON COMMIT DROP
+            """
+        )
+    )
+    # COPY - через asyncpg-соединение той же транзакции (CREATE выше её уже
+    # открыл): бинарный протокол без разбора SQL на каждую строку
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    await raw_connection.driver_connection.copy_records_to_table(
+        _IMPORT_STAGING_TABLE,
+        records=[
+            (
+                row.line,
+                row.name,
+                row.description,
+                row.price,
+                row.category_id,
+                row.stock,
+            )
+            for row in rows
+        ],
+        columns=_IMPORT_COLUMNS,
+    )
+
+    missing = await session.execute(
+        text(
+            f"""
+            SELECT s.line, s.category_id FROM {_IMPORT_STAGING_TABLE} s
+            WHERE NOT EXISTS (SELECT 1 FROM categories c WHERE c.id = s.category_id)
+            ORDER BY s.line
+            """
+        )
+    )
+    missing_category_lines = [(line, category_id) for line, category_id in missing]
+
+    upserted = await session.execute(
+        text(
+            f"""
+            WITH src AS (
+                SELECT DISTINCT ON (s.name)
+                       s.name, s.description, s.price, s.category_id, s.stock
+                FROM {_IMPORT_STAGING_TABLE} s
+                WHERE EXISTS (SELECT 1 FROM categories c WHERE c.id = s.category_id)
+                ORDER BY s.name, s.line DESC
+            ),
+            with_stock AS (
+                INSERT INTO products (name, description, price, category_id, stock)
+                SELECT name, description, price, category_id, stock FROM src
+                WHERE stock IS NOT NULL
+                ON CONFLICT (name) DO UPDATE SET
+                    description = EXCLUDED.description,
+                    price = EXCLUDED.price,
+                    category_id = EXCLUDED.category_id,
+                    stock = EXCLUDED.stock
+                WHERE (products.description, products.price,
+                       products.category_id, products.stock)
+                      IS DISTINCT FROM
+                      (EXCLUDED.description, EXCLUDED.price,
+                       EXCLUDED.category_id, EXCLUDED.stock)
+                RETURNING (xmax = 0) AS inserted
+            ),
+            -- stock не задан: новый товар - с остатком по умолчанию,
+            -- у существующего остаток не меняется
+            without_stock AS (
+                INSERT INTO products (name, description, price, category_id)
+                SELECT name, description, price, category_id FROM src
+                WHERE stock IS NULL
+                ON CONFLICT (name) DO UPDATE SET
+                    description = EXCLUDED.description,
+                    price = EXCLUDED.price,
+                    category_id = EXCLUDED.category_id
+                WHERE (products.description, products.price, products.category_id)
+                      IS DISTINCT FROM
+                      (EXCLUDED.description, EXCLUDED.price, EXCLUDED.category_id)
+                RETURNING (xmax = 0) AS inserted
+            )
+            SELECT inserted FROM with_stock
+            UNION ALL
+            SELECT inserted FROM without_stock
+            """
+        )
+    )
+    flags = upserted.scalars().all()
+    inserted = sum(1 for flag in flags if flag)
+    updated = len(flags) - inserted
+    loaded = len(rows) - len(missing_category_lines)
+    return ProductUpsertResult(
+        inserted=inserted,
+        updated=updated,
+        unchanged=loaded - inserted - updated,
+        missing_category_lines=missing_category_lines,
+    )
@@ -10,7 +10,7 @@ from app.models.user import User
 
 async def get_user_by_id(session: AsyncSession, user_id: int) -> User | None:
     """
-    Получить пользователя по ID.
+    Получить пользователя по ID (без связей: заказы не подгружаются).
 
     Args:
         session: Асинхронная сессия БД
@@ -24,7 +24,7 @@ async def get_user_by_id(session: AsyncSession, user_id: int) -> User | None:
 
 async def get_user_by_email(session: AsyncSession, email: str) -> User | None:
     """
-    Получить пользователя по email.
+    Получить пользователя по email (без связей: заказы не подгружаются).
 
     Args:
         session: Асинхронная сессия БД
@@ -57,3 +57,40 @@ async def create_user(
     await session.commit()
     await session.refresh(new_user)
     return new_user
+
+
+async def deactivate_user(session: AsyncSession, user: User) -> User:
+    """
+    Деактивировать пользователя.
+
+    Args:
+        session: Асинхронная сессия БД
+        user: Пользователь
+
+    Returns:
+        User: Обновлённый пользователь
+    """
+    user.is_active = False
+    await session.commit()
+    # updated_at выставляет БД: перечитываем, снимок для кеша нужен целиком
+    await session.refresh(user)
+    return user
+
+
+async def update_password_hash(
+    session: AsyncSession, user: User, hashed_password: str
+) -> User:
+    """
+    Заменить хеш пароля (перехеширование с новыми параметрами).
+
+    Args:
+        session: Асинхронная сессия БД
+        user: Пользователь
+        hashed_password: Новый хеш пароля
+
+    Returns:
+        User: Обновлённый пользователь
+    """
+    user.hashed_password = hashed_password
+    await session.commit()
+    return user
@@ -0,0 +1,187 @@
+"""Репозиторий входящих webhook (таблица `webhook_inbox`).
+
+Очередь разбирается несколькими воркерами одновременно: строки
+захватываются через `FOR UPDATE SKIP LOCKED` и аренду `locked_until`,
+поэтому один и тот же event не обрабатывается параллельно.
+Завершённые события и записи дедупликации старше срока хранения
+удаляются пачками (`prune_webhook_history`).
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from datetime import timedelta
+
+from sqlalchemy import delete, func, insert, or_, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.processed_webhook_event import ProcessedWebhookEvent
+from app.models.webhook_inbox import InboxStatus, WebhookInbox
+from app.payments.gateway import WebhookEvent
+
+
+async def add_inbox_event(
+    session: AsyncSession, *, provider: str, event: WebhookEvent
+) -> None:
+    """Сохранить событие в очередь (один INSERT + COMMIT)."""
+    await session.execute(
+        insert(WebhookInbox).values(
+            provider=provider,
+            event_id=event.event_id,
+            provider_payment_id=event.provider_payment_id,
+            event_status=event.status,
+            payload=event.raw,
+            status=InboxStatus.PENDING,
+        )
+    )
+    await session.commit()
+
+
+async def claim_inbox_batch(
+    session: AsyncSession, *, limit: int, lease_seconds: float
+) -> Sequence[WebhookInbox]:
+    """
+    Захватить пачку событий на обработку и закоммитить захват.
+
+    UPDATE webhook_inbox SET status = 'PROCESSING', locked_until = now() + lease,
+        attempts = attempts + 1
+    WHERE id IN (SELECT id FROM webhook_inbox
+                 WHERE status = 'PENDING'
+                    OR (status = 'PROCESSING' AND locked_until < now())
+                 ORDER BY id LIMIT :limit FOR UPDATE SKIP LOCKED)
+    RETURNING *
+
+    Истёкшая аренда (обработчик упал) делает событие снова доступным.
+    """
+    queued = (
+        select(WebhookInbox.id)
+        .where(
+            or_(
+                WebhookInbox.status == InboxStatus.PENDING,
+                (WebhookInbox.status == InboxStatus.PROCESSING)
+                & (WebhookInbox.locked_until < func.now()),
+            )
+        )
+        .order_by(WebhookInbox.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    stmt = (
+        update(WebhookInbox)
+        .where(WebhookInbox.id.in_(queued.scalar_subquery()))
+        .values(
+            status=InboxStatus.PROCESSING,
+            locked_until=func.now() + timedelta(seconds=lease_seconds),
+            attempts=WebhookInbox.attempts + 1,
+        )
+        .returning(WebhookInbox)
+        .execution_options(synchronize_session=False)
+    )
+    result = await session.execute(stmt)
+    rows = result.scalars().all()
+    await session.commit()
+    return sorted(rows, key=lambda row: row.id)
+
+
+async def mark_inbox_processed(session: AsyncSession, inbox_id: int) -> None:
+    """Отметить событие обработанным."""
+    await session.execute(
+        update(WebhookInbox)
+        .where(WebhookInbox.id == inbox_id)
+        .values(
+            status=InboxStatus.PROCESSED,
+            processed_at=func.now(),
+            locked_until=None,
+            last_error=None,
+        )
+    )
+    await session.commit()
+
+
+async def mark_inbox_failed(
+    session: AsyncSession,
+    inbox_id: int,
+    *,
+    error: str,
+    retry_after: float | None,
+) -> None:
+    """Записать ошибку обработки.
+
+    retry_after - через сколько секунд повторить (аренда продлевается,
+    и claim подберёт событие после её истечения); None - закрыть как FAILED.
+    """
+    if retry_after is None:
+        values = {"status": InboxStatus.FAILED, "locked_until": None}
+    else:
+        values = {
+            "status": InboxStatus.PROCESSING,
+            "locked_until": func.now() + timedelta(seconds=retry_after),
+        }
+    await session.execute(
+        update(WebhookInbox)
+        .where(WebhookInbox.id == inbox_id)
+        .values(last_error=error[:255], **values)
+    )
+    await session.commit()
+
+
+async def record_processed_event(
+    session: AsyncSession, *, provider: str, event_id: str
+) -> bool:
+    """
+    Зафиксировать event_id как обработанный (без коммита).
+
+    INSERT ... ON CONFLICT DO NOTHING RETURNING: False - событие уже
+    обработано. Параллельный дубль ждёт на уникальном ключе, пока первая
+    транзакция не завершится, поэтому событие применяется ровно один раз.
+    """
+    stmt = (
+        pg_insert(ProcessedWebhookEvent)
+        .values(provider=provider, event_id=event_id)
+        .on_conflict_do_nothing()
+        .returning(ProcessedWebhookEvent.event_id)
+    )
+    result = await session.execute(stmt)
+    return result.scalar_one_or_none() is not None
+
+
+async def prune_webhook_history(
+    session: AsyncSession, *, older_than_seconds: float, limit: int
+) -> int:
+    """Удалить пачку старых записей и закоммитить. Больше удалённых из двух таблиц.
+
+    Из inbox - только завершённые события (PROCESSED/FAILED); строки
+    выбираются по индексу created_at, занятые другим воркером пропускаются
+    (SKIP LOCKED).
+    """
+    cutoff = func.now() - timedelta(seconds=older_than_seconds)
+    inbox = (
+        select(WebhookInbox.id)
+        .where(
+            WebhookInbox.created_at < cutoff,
+            WebhookInbox.status.in_([InboxStatus.PROCESSED, InboxStatus.FAILED]),
+        )
+        .order_by(WebhookInbox.created_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    processed = (
+        select(ProcessedWebhookEvent.provider, ProcessedWebhookEvent.event_id)
+        .where(ProcessedWebhookEvent.created_at < cutoff)
+        .order_by(ProcessedWebhookEvent.created_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    inbox_deleted = await session.execute(
+        delete(WebhookInbox).where(WebhookInbox.id.in_(inbox.scalar_subquery()))
+    )
+    processed_deleted = await session.execute(
+        delete(ProcessedWebhookEvent).where(
+            tuple_(ProcessedWebhookEvent.provider, ProcessedWebhookEvent.event_id).in_(
+                processed
+            )
+        )
+    )
+    await session.commit()
+    return max(inbox_deleted.rowcount, processed_deleted.rowcount)
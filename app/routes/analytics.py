@@ -0,0 +1,167 @@
+"""Отчёты по продажам для администраторов (из свёрток, см. app.services.analytics)."""
+
+from datetime import date, datetime, timedelta
+from typing import Literal
+from zoneinfo import ZoneInfo
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import get_db
+from app.repositories.analytics_repo import (
+    get_category_sales,
+    get_product_sales,
+    get_revenue,
+    get_sales_watermark,
+)
+from app.schemas.analytics import CategorySales, ProductSales, RevenuePoint
+from app.security.dependences import get_current_admin
+
+WATERMARK_HEADER = "X-Analytics-Watermark"
+MAX_PERIOD_DAYS = 366
+MAX_HOURLY_PERIOD_DAYS = 31
+
+router = APIRouter(
+    prefix="/analytics",
+    tags=["analytics"],
+    dependencies=[Depends(get_current_admin)],
+)
+
+
+class Period:
+    """Дни [date_from, date_to] включительно (по умолчанию - последние 30).
+
+    Дни - местные для ANALYTICS_TIMEZONE, как и в свёртках.
+    """
+
+    def __init__(
+        self,
+        date_from: date | None = Query(None, description="Первый день периода"),
+        date_to: date | None = Query(None, description="Последний день (включительно)"),
+    ) -> None:
+        self.end = date_to or datetime.now(ZoneInfo(settings.ANALYTICS_TIMEZONE)).date()
+        self.start = date_from or self.end - timedelta(days=29)
+        if self.start > self.end:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="date_from позже date_to",
+            )
+        if (self.end - self.start).days >= MAX_PERIOD_DAYS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Период не длиннее {MAX_PERIOD_DAYS} дней",
+            )
+
+
+async def _set_watermark(response: Response, session: AsyncSession) -> None:
+    watermark = await get_sales_watermark(session)
+    if watermark is not None:
+        response.headers[WATERMARK_HEADER] = watermark.isoformat()
+
+
+@router.get("/revenue", response_model=list[RevenuePoint], summary="Выручка по дням")
+async def revenue_route(
+    response: Response,
+    period: Period = Depends(),
+    granularity: Literal["day", "hour"] = Query("day"),
+    session: AsyncSession = Depends(get_db),
+):
+    """Оплаченные заказы, штуки и выручка по дням или часам периода.
+
+    Дни без продаж в ответ не попадают. По часам - не длиннее
+    MAX_HOURLY_PERIOD_DAYS дней.
+    """
+    if (
+        granularity == "hour"
+        and (period.end - period.start).days >= MAX_HOURLY_PERIOD_DAYS
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"По часам - период не длиннее {MAX_HOURLY_PERIOD_DAYS} дней",
+        )
+    await _set_watermark(response, session)
+    rows = await get_revenue(
+        session, start=period.start, end=period.end, granularity=granularity
+    )
+    return [
+        RevenuePoint(period=period_, orders=orders, units=units, revenue=revenue)
+        for period_, orders, units, revenue in rows
+    ]
+
+
+@router.get(
+    "/categories", response_model=list[CategorySales], summary="Продажи по категориям"
+)
+async def categories_route(
+    response: Response,
+    period: Period = Depends(),
+    session: AsyncSession = Depends(get_db),
+):
+    """Штуки и выручка по категориям за период, по убыванию выручки."""
+    await _set_watermark(response, session)
+    rows = await get_category_sales(session, start=period.start, end=period.end)
+    return [
+        CategorySales(category_id=category_id, name=name, units=units, revenue=revenue)
+        for category_id, name, units, revenue in rows
+    ]
+
+
+@router.get(
+    "/products", response_model=list[ProductSales], summary="Продажи по товарам"
+)
+async def products_route(
+    response: Response,
+    period: Period = Depends(),
+    category_id: int | None = Query(None, gt=0),
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    session: AsyncSession = Depends(get_db),
+):
+    """Продажи товаров за период (с фильтром по категории), по убыванию выручки."""
+    await _set_watermark(response, session)
+    return await _product_sales(
+        session,
+        period,
+        category_id=category_id,
+        order_by="revenue",
+        limit=limit,
+        offset=offset,
+    )
+
+
+@router.get(
+    "/top-sellers", response_model=list[ProductSales], summary="Самые продаваемые"
+)
+async def top_sellers_route(
+    response: Response,
+    period: Period = Depends(),
+    by: Literal["units", "revenue"] = Query("units"),
+    category_id: int | None = Query(None, gt=0),
+    limit: int = Query(10, ge=1, le=100),
+    session: AsyncSession = Depends(get_db),
+):
+    """Первые `limit` товаров периода по штукам или выручке."""
+    await _set_watermark(response, session)
+    return await _product_sales(
+        session, period, category_id=category_id, order_by=by, limit=limit
+    )
+
+
+async def _product_sales(
+    session: AsyncSession, period: Period, **kwargs
+) -> list[ProductSales]:
+    rows = await get_product_sales(
+        session, start=period.start, end=period.end, **kwargs
+    )
+    return [
+        ProductSales(
+            product_id=product_id,
+            name=name,
+            category_id=category_id_,
+            orders=orders,
+            units=units,
+            revenue=revenue,
+        )
+        for product_id, name, category_id_, orders, units, revenue in rows
+    ]
@@ -3,16 +3,26 @@ from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
+from app.executors import ExecutorOverloaded
 from app.models.user import User
 from app.schemas.auth import RegisterCreate, Token, UserRead
-from app.security.dependences import get_current_user
+from app.security.dependences import get_current_admin, get_current_user
 from app.security.jwt import create_access_token
-from app.services.auth import register_user, authenticate_user
-from app.repositories.user_repo import get_user_by_email
+from app.services.auth import register_user, authenticate_user, deactivate_user
+from app.repositories.user_repo import get_user_by_email, get_user_by_id
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
+def _hasher_busy(exc: ExecutorOverloaded) -> HTTPException:
+    """503: пул Argon2 перегружен, клиенту стоит повторить позже."""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Сервис перегружен, повторите попытку позже",
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
 @router.post(
     "/register",
     response_model=UserRead,
@@ -30,8 +40,11 @@ async def create_user(
             status_code=status.HTTP_409_CONFLICT,
             detail="Пользователь с таким Email уже зарегистрирован",
         )
-    new_user = await register_user(session, payload.email, payload.password)
-    return UserRead.model_validate(new_user)
+    try:
+        new_user = await register_user(session, payload.email, payload.password)
+    except ExecutorOverloaded as exc:
+        raise _hasher_busy(exc) from exc
+    return new_user
 
 
 @router.post("/login", response_model=Token, summary="Вход в систему")
@@ -40,7 +53,10 @@ async def login_user(
     session: AsyncSession = Depends(get_db),
 ):
     """Аутентификация пользователя и выдача JWT токена."""
-    user = await authenticate_user(session, form_data.username, form_data.password)
+    try:
+        user = await authenticate_user(session, form_data.username, form_data.password)
+    except ExecutorOverloaded as exc:
+        raise _hasher_busy(exc) from exc
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -63,3 +79,31 @@ async def login_user(
 async def current_user(current_user: User = Depends(get_current_user)):
     """Информация о текущем авторизованном пользователе."""
     return current_user
+
+
+@router.post(
+    "/users/{user_id}/deactivate",
+    response_model=UserRead,
+    summary="Заблокировать пользователя (для администраторов)",
+)
+async def deactivate_user_route(
+    user_id: int,
+    admin: User = Depends(get_current_admin),
+    session: AsyncSession = Depends(get_db),
+):
+    """Блокировка аккаунта: уже выданные токены перестают работать.
+
+    Сразу - в этом воркере и через Redis; в локальном кеше принципала
+    других воркеров - не позже PRINCIPAL_CACHE_TTL_SECONDS.
+    """
+    if user_id == admin.id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Нельзя заблокировать самого себя",
+        )
+    user = await get_user_by_id(session, user_id)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Пользователь не найден"
+        )
+    return await deactivate_user(session, user)
@@ -1,8 +1,17 @@
-from fastapi import APIRouter, Depends, Query, HTTPException, status
+from collections.abc import Iterable
+
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
 from app.dependency import CategoryDep
+from app.http_cache import (
+    cache_headers,
+    is_conditional,
+    is_not_modified,
+    make_validators,
+    not_modified,
+)
 from app.security.dependences import get_current_user
 from app.schemas.category import CategoryRead, CategoryCreate, CategoryUpdatePatch
 from app.repositories.category_repo import (
@@ -10,31 +19,74 @@ from app.repositories.category_repo import (
     deactivate_category,
     update_category,
     category_list,
+    category_list_versions,
     create_category,
+    get_category,
 )
 
 router = APIRouter(prefix="/categories", tags=["categories"])
 
 
+def _list_keys(category_ids: Iterable[int]) -> list[str]:
+    """Surrogate-ключи списка: `categories` (новые) + каждая категория."""
+    return ["categories", *(f"category-{category_id}" for category_id in category_ids)]
+
+
 @router.get(
     "/all", response_model=list[CategoryRead], summary="Получить список категорий"
 )
 async def get_categories_list_route(
+    request: Request,
+    response: Response,
     only_active: bool = Query(True, description="Только активные категории"),
     limit: int = Query(50, ge=1, le=100),
     offset: int = Query(0, ge=0),
     session: AsyncSession = Depends(get_db),
 ):
-    """Список категорий с фильтрацией и пагинацией."""
+    """Список категорий с фильтрацией и пагинацией (поддерживает 304)."""
+    if is_conditional(request):
+        versions = await category_list_versions(
+            session, only_active=only_active, limit=limit, offset=offset
+        )
+        validators = make_validators("categories", versions)
+        if is_not_modified(request, validators):
+            return not_modified(
+                validators, _list_keys(row_id for row_id, _ in versions)
+            )
+
     categories = await category_list(
         session, only_active=only_active, limit=limit, offset=offset
     )
+    validators = make_validators(
+        "categories", [(category.id, category.updated_at) for category in categories]
+    )
+    response.headers.update(
+        cache_headers(validators, _list_keys(category.id for category in categories))
+    )
     return categories
 
 
 @router.get("/{val}", response_model=CategoryRead, summary="Получить категорию")
-async def get_category_route(category: CategoryDep):
-    """Получение категории по ID или slug."""
+async def get_category_route(
+    val: int | str,
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_db),
+):
+    """Получение категории по ID или slug (поддерживает 304).
+
+    Одна строка - читается целиком сразу, валидаторы - по ней.
+    """
+    category = await get_category(session, val)
+    if category is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Категория не найдена"
+        )
+    keys = [f"category-{category.id}"]
+    validators = make_validators("category", [(category.id, category.updated_at)])
+    if is_not_modified(request, validators):
+        return not_modified(validators, keys)
+    response.headers.update(cache_headers(validators, keys))
     return category
 
 
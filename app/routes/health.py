@@ -0,0 +1,59 @@
+"""Служебные эндпоинты: состояние процесса для мониторинга.
+
+Только для администраторов: загрузка пулов, очереди и состояние breaker
+помогают и тому, кто подбирает момент для атаки.
+"""
+
+from fastapi import APIRouter, Depends
+
+from app.database import get_pool_stats
+from app.payments import get_default_gateway
+from app.security.dependences import get_current_admin
+from app.security.jwt import get_token_cache_stats
+from app.security.password import password_executor
+from app.services.expiry import get_expiry_stats
+from app.services.product_lookup import get_product_loader_stats
+
+router = APIRouter(
+    prefix="/health",
+    tags=["health"],
+    dependencies=[Depends(get_current_admin)],
+)
+
+
+@router.get("/db-pool", summary="Состояние пула соединений БД")
+async def db_pool_route():
+    """Счётчики пула этого воркера: занято, overflow, время ожидания."""
+    return get_pool_stats()
+
+
+@router.get("/password-hasher", summary="Загрузка пула Argon2")
+async def password_hasher_route():
+    """Сколько задач хеширования выполняется/ждёт и сколько отклонено (503)."""
+    return password_executor.stats()
+
+
+@router.get("/token-cache", summary="Кеш проверенных JWT")
+async def token_cache_route():
+    """Размер кеша токенов этого воркера и счётчики попаданий/промахов."""
+    return get_token_cache_stats()
+
+
+@router.get("/product-loader", summary="Склейка запросов товаров по id")
+async def product_loader_route():
+    """Сколько точечных чтений товаров ушло в БД пакетами и какого размера."""
+    return get_product_loader_stats()
+
+
+@router.get("/expiry", summary="Истечение зависших заказов и платежей")
+async def expiry_route():
+    """Сколько заказов/платежей этот воркер отменил по TTL и последний запуск."""
+    return get_expiry_stats()
+
+
+@router.get("/payment-gateway", summary="Вызовы платёжного провайдера")
+async def payment_gateway_route():
+    """Повторы, ошибки и состояние circuit breaker шлюза этого воркера."""
+    gateway = get_default_gateway()
+    stats = getattr(gateway, "stats", None)
+    return stats() if stats is not None else {"provider": gateway.provider_name}
@@ -1,26 +1,42 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
 from app.models.order import OrderStatus
 from app.models.user import User
+from app.pagination import (
+    NEXT_CURSOR_HEADER,
+    InvalidCursor,
+    decode_cursor,
+    encode_cursor,
+)
 from app.security.dependences import get_current_user
 
 # Pydantic схемы
-from app.schemas.order import OrderCreate, OrderRead, OrderReadDetailed
+from app.schemas.order import (
+    OrderCreate,
+    OrderListItem,
+    OrderRead,
+    OrderReadDetailed,
+    OrderStatsRead,
+)
 
 # Сервис (для создания заказа - бизнес-логика)
-from app.services.order import create_order
+from app.services.order import cancel_order, create_order
 
 # Репозиторий (для чтения/обновления - работа с БД)
 from app.repositories.order_repo import (
+    InsufficientStock,
     OrderItemData,
+    OrderNotPending,
     get_order_by_id,
     get_user_orders,
-    update_order_status,
     ProductNotFound,
     ProductNotActive,
 )
+from app.repositories.order_stats_repo import get_user_order_stats
 
 
 router = APIRouter(prefix="/orders", tags=["orders"])
@@ -52,24 +68,73 @@ async def create_order_route(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
     except ProductNotActive as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except InsufficientStock as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"message": str(e), "product_ids": e.product_ids},
+        )
 
-    return OrderRead.model_validate(order)
+    return order
 
 
-@router.get("/me", response_model=list[OrderRead], summary="Мои заказы")
+@router.get(
+    "/me",
+    response_model=list[OrderListItem],
+    response_model_exclude_none=True,
+    summary="Мои заказы",
+)
 async def get_my_orders(
+    response: Response,
     current_user: User = Depends(get_current_user),
     limit: int = Query(50, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    cursor: str | None = Query(
+        None, description=f"Курсор следующей страницы (из {NEXT_CURSOR_HEADER})"
+    ),
+    with_summary: bool = Query(
+        False, description="Добавить item_count и units по каждому заказу"
+    ),
     session: AsyncSession = Depends(get_db),
 ):
-    """Список заказов текущего пользователя."""
+    """Список заказов текущего пользователя, новые первыми.
+
+    Пагинация - limit/offset (старый режим) или cursor: keyset по
+    (created_at, id), курсор следующей страницы - в X-Next-Cursor.
+    """
+    after = None
+    if cursor is not None:
+        try:
+            keys = decode_cursor(cursor)
+            after = (datetime.fromisoformat(keys["created_at"]), int(keys["id"]))
+        except (InvalidCursor, KeyError, TypeError, ValueError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Некорректный курсор"
+            )
 
     orders = await get_user_orders(
-        session, user_id=current_user.id, limit=limit, offset=offset
+        session,
+        user_id=current_user.id,
+        limit=limit,
+        offset=None if after is not None else offset,
+        after=after,
+        with_summary=with_summary,
     )
+    if len(orders) == limit:
+        last = orders[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(
+            created_at=last.created_at.isoformat(), id=last.id
+        )
+    return orders
 
-    return [OrderRead.model_validate(order) for order in orders]
+
+@router.get("/me/summary", response_model=OrderStatsRead, summary="Сводка моих заказов")
+async def get_my_orders_summary(
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_db),
+):
+    """Число заказов, сумма оплаченных и дата последнего - чтение одной строки."""
+    stats = await get_user_order_stats(session, current_user.id)
+    return stats if stats is not None else OrderStatsRead()
 
 
 @router.get("/{order_id}", response_model=OrderReadDetailed, summary="Детали заказа")
@@ -95,7 +160,7 @@ async def get_order_details(
             status_code=status.HTTP_403_FORBIDDEN, detail="Нет доступа к этому заказу"
         )
 
-    return OrderReadDetailed.model_validate(order)
+    return order
 
 
 @router.post("/{order_id}/cancel", response_model=OrderRead, summary="Отменить заказ")
@@ -127,8 +192,10 @@ async def cancel_order_route(
             detail="Заказ нельзя отменить в текущем статусе",
         )
 
-    updated_order = await update_order_status(
-        session, order, new_status=OrderStatus.CANCELLED
-    )
+    # Отмена возвращает резерв на склад
+    try:
+        updated_order = await cancel_order(session, order)
+    except OrderNotPending as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
 
-    return OrderRead.model_validate(updated_order)
+    return updated_order
@@ -5,23 +5,28 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
 from app.models.user import User
-from app.payments import MockPaymentGateway, PaymentGateway
+from app.payments import PaymentGateway, get_default_gateway, get_gateway
 from app.repositories.order_repo import get_order_by_id
-from app.schemas.payment import PaymentRead
+from app.repositories.webhook_inbox_repo import add_inbox_event
+from app.schemas.payment import PaymentRead, WebhookAccepted
 from app.security.dependences import get_current_user
 from app.services.payment import (
-    PaymentNotFoundError,
+    PaymentProviderError,
     PaymentStateError,
     create_payment_for_order,
-    process_webhook_event,
 )
+from app.services.webhook_dedup import is_processed
+from app.services.webhook_inbox import inbox_job
 
 router = APIRouter(prefix="/payments", tags=["payments"])
 
 
 def get_payment_gateway() -> PaymentGateway:
-    """DI-фабрика: вернуть активный платежный шлюз (сейчас mock)."""
-    return MockPaymentGateway()
+    """DI-фабрика: шлюз новых платежей (PAYMENT_GATEWAY).
+
+    Общий на процесс: HTTP-шлюз держит пул соединений, созданный в lifespan.
+    """
+    return get_default_gateway()
 
 
 @router.post(
@@ -36,7 +41,13 @@ async def create_payment_route(
     session: AsyncSession = Depends(get_db),
     gateway: PaymentGateway = Depends(get_payment_gateway),
 ):
-    """Создать платеж для заказа текущего пользователя."""
+    """Создать платеж для заказа текущего пользователя.
+
+    502 - провайдер не ответил: платёж сохранён и будет дослан в фоне,
+    повторный запрос после паузы продолжит его же.
+    Если провайдер отклонил платёж (4xx), тоже 502, но платёж закрыт как
+    FAILED, и повторный запрос создаст новый.
+    """
     order = await get_order_by_id(session, order_id, load_items=False)
     if not order:
         raise HTTPException(
@@ -56,21 +67,33 @@ async def create_payment_route(
         )
     except PaymentStateError as exc:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc))
+    except PaymentProviderError as exc:
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(exc))
 
-    return PaymentRead.model_validate(payment)
+    return payment
 
 
 @router.post(
-    "/webhook/mock",
-    response_model=PaymentRead,
-    summary="Webhook mock-провайдера",
+    "/webhook/{provider}",
+    response_model=WebhookAccepted,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Webhook платёжного провайдера",
 )
-async def mock_webhook_route(
+async def webhook_route(
+    provider: str,
     request: Request,
     session: AsyncSession = Depends(get_db),
-    gateway: PaymentGateway = Depends(get_payment_gateway),
 ):
-    """Принять webhook от mock-провайдера и обновить состояния."""
+    """Принять webhook провайдера (mock, http, ...) и поставить в очередь.
+
+    Здесь только проверка подписи, разбор и один INSERT в inbox;
+    платёж и заказ обновляет фоновый обработчик (`services.webhook_inbox`).
+    """
+    gateway = get_gateway(provider)
+    if gateway is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Неизвестный провайдер"
+        )
     body = await request.body()
     if not gateway.verify_webhook_signature(headers=request.headers, body=body):
         raise HTTPException(
@@ -80,12 +103,13 @@ async def mock_webhook_route(
 
     try:
         event = gateway.parse_webhook(headers=request.headers, body=body)
-        payment = await process_webhook_event(session, event=event)
     except ValueError as exc:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
-    except PaymentNotFoundError as exc:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc))
-    except PaymentStateError as exc:
-        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc))
 
-    return PaymentRead.model_validate(payment)
+    # повторная доставка: ответ из кеша, без очереди и без БД
+    if await is_processed(gateway.provider_name, event.event_id):
+        return WebhookAccepted(event_id=event.event_id, duplicate=True)
+
+    await add_inbox_event(session, provider=gateway.provider_name, event=event)
+    inbox_job.wake()
+    return WebhookAccepted(event_id=event.event_id)
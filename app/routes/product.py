@@ -1,15 +1,51 @@
+from collections.abc import Iterable
+from datetime import datetime
+from decimal import Decimal
+from typing import Any
+
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from fastapi import APIRouter, Depends, Query, status, HTTPException
+from fastapi import APIRouter, Depends, Query, Request, Response, status, HTTPException
+from fastapi.responses import StreamingResponse
 
 from app.database import get_db
+from app.http_cache import (
+    cache_headers,
+    is_conditional,
+    is_not_modified,
+    make_validators,
+    not_modified,
+)
+from app.pagination import (
+    NEXT_CURSOR_HEADER,
+    InvalidCursor,
+    decode_cursor,
+    encode_cursor,
+    filters_fingerprint,
+)
 from app.security.dependences import get_current_user
 
-from app.schemas.product import ProductCreate, ProductRead, ProductUpdatePatch
+from app.schemas.product import (
+    ProductCreate,
+    ProductAdminRead,
+    ProductImportReport,
+    ProductRead,
+    ProductUpdatePatch,
+)
+from app.services.product_export import MEDIA_TYPES, ExportFormat, export_products
+from app.services.product_import import ImportFormat, import_products
+from app.services.product_lookup import product_loader
 
 from app.repositories.product_repo import (
     ProductAlreadyExists,
+    ProductSort,
     get_product_list,
+    get_product_list_versions,
+    get_product_versions,
+    get_products_with_relation,
+    product_sort_key,
+    resolve_category_ids,
+    search_products,
     create_product,
     update_product,
     deactivate_product,
@@ -20,32 +56,309 @@ from app.dependency import ProductDep
 router = APIRouter(prefix="/products", tags=["products"])
 
 
+EXPORT_WATERMARK_HEADER = "X-Export-Watermark"
+IMPORT_CONTENT_TYPES = {
+    "text/csv": ImportFormat.CSV,
+    "application/x-ndjson": ImportFormat.NDJSON,
+    "application/jsonl": ImportFormat.NDJSON,
+}
+MAX_CATEGORY_FILTERS = 20  # каждая категория - отдельная ветка UNION ALL
+MAX_BATCH_IDS = 100
+
+
+def _list_keys(product_ids: Iterable[int]) -> list[str]:
+    """Surrogate-ключи списка: `products` (новые товары) + каждый товар."""
+    return ["products", *(f"product-{product_id}" for product_id in product_ids)]
+
+
+def _parse_ids(raw: str) -> list[int]:
+    """ "1,2,3" -> [1, 2, 3] без повторов, в порядке запроса."""
+    try:
+        ids = list(dict.fromkeys(int(part) for part in raw.split(",") if part.strip()))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ids - целые числа через запятую",
+        )
+    if not 0 < len(ids) <= MAX_BATCH_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"ids - от 1 до {MAX_BATCH_IDS} значений",
+        )
+    return ids
+
+
+async def _products_by_ids(
+    request: Request, response: Response, session: AsyncSession, ids: list[int]
+):
+    """Товары по списку id (режим ?ids= списка) с условным GET."""
+    if is_conditional(request):
+        versions = await get_product_versions(session, ids)
+        validators = make_validators("products", versions.items())
+        if is_not_modified(request, validators):
+            return not_modified(validators, _list_keys(versions))
+
+    found = await get_products_with_relation(session, ids)
+    validators = make_validators(
+        "products", [(product.id, product.updated_at) for product in found.values()]
+    )
+    response.headers.update(cache_headers(validators, _list_keys(found)))
+    return [found[product_id] for product_id in ids if product_id in found]
+
+
+def _decode_sort_key(raw: list[Any], sort: ProductSort) -> tuple[Any, ...]:
+    """Ключ сортировки из курсора -> типы колонок (см. product_sort_key)."""
+    *head, last_id = raw
+    if sort in (ProductSort.PRICE_ASC, ProductSort.PRICE_DESC):
+        (price,) = head
+        return Decimal(price), int(last_id)
+    if sort is ProductSort.NEWEST:
+        (created_at,) = head
+        return datetime.fromisoformat(created_at), int(last_id)
+    if head:
+        raise ValueError("Лишние значения в ключе курсора")
+    return (int(last_id),)
+
+
 @router.get("/", response_model=list[ProductRead], summary="Получить список товаров")
 async def product_list_route(
+    request: Request,
+    response: Response,
     category_id: int | None = Query(None, description="Категория товаров"),
+    category: list[int] = Query(
+        [], description="Несколько категорий по id (повторяемый параметр)"
+    ),
+    category_slug: list[str] = Query(
+        [], description="Несколько категорий по slug (повторяемый параметр)"
+    ),
+    price_min: Decimal | None = Query(None, ge=0, description="Цена от"),
+    price_max: Decimal | None = Query(None, ge=0, description="Цена до"),
+    created_after: datetime | None = Query(None, description="Добавлены после"),
+    sort: ProductSort = Query(ProductSort.ID, description="Порядок выдачи"),
     only_active: bool = Query(True, description="Только активные товары"),
     limit: int | None = Query(50, ge=1, le=100),
     offset: int | None = Query(0, ge=0),
+    cursor: str | None = Query(
+        None, description=f"Курсор следующей страницы (из {NEXT_CURSOR_HEADER})"
+    ),
+    ids: str | None = Query(
+        None,
+        description=f"Товары по id через запятую (до {MAX_BATCH_IDS}), например 1,2,3",
+    ),
     session: AsyncSession = Depends(get_db),
 ):
-    products = await get_product_list(
-        session,
+    """Список товаров с фильтрами и сортировкой.
+
+    ids - пакетное чтение по id (корзина): один запрос вместо N вызовов
+    GET /products/{id}. Товары - в порядке ids, ненайденные пропускаются,
+    неактивные возвращаются (как в GET /products/{id}); остальные фильтры
+    и пагинация в этом режиме не применяются.
+
+    Категории (category_id, category, category_slug) объединяются по ИЛИ.
+    Два режима пагинации:
+    - limit/offset - старый режим (глубокие страницы дорогие);
+    - cursor - keyset по ключу сортировки, цена страницы не зависит от глубины.
+    Если страница заполнена, курсор следующей отдаётся в X-Next-Cursor.
+    Поддерживает If-None-Match / If-Modified-Since (304 без загрузки товаров).
+    """
+    if ids is not None:
+        return await _products_by_ids(request, response, session, _parse_ids(ids))
+    if len(category) + len(category_slug) > MAX_CATEGORY_FILTERS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Не больше {MAX_CATEGORY_FILTERS} категорий в фильтре",
+        )
+    filters = filters_fingerprint(
         category_id=category_id,
+        category=sorted(set(category)),
+        category_slug=sorted(set(category_slug)),
+        price_min=price_min,
+        price_max=price_max,
+        created_after=created_after,
+        sort=sort.value,
         only_active=only_active,
-        limit=limit,
-        offset=offset,
     )
+
+    after = None
+    if cursor is not None:
+        try:
+            keys = decode_cursor(cursor)
+        except InvalidCursor:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Некорректный курсор"
+            )
+        if keys.get("filters") != filters:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Курсор выдан для других фильтров или сортировки",
+            )
+        try:
+            after = _decode_sort_key(keys["key"], sort)
+        except (KeyError, TypeError, ValueError, ArithmeticError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Некорректный курсор"
+            )
+        offset = None  # в keyset-режиме OFFSET не используется
+
+    category_ids = await resolve_category_ids(
+        session,
+        category_id=category_id,
+        category_ids=category,
+        category_slugs=category_slug,
+    )
+    query = {
+        "category_ids": category_ids or (),
+        "only_active": only_active,
+        "limit": limit,
+        "offset": offset,
+        "price_min": price_min,
+        "price_max": price_max,
+        "created_after": created_after,
+        "sort": sort,
+        "after": after,
+    }
+    # Условный GET: сначала только версии строк страницы
+    if is_conditional(request):
+        if category_ids is None:  # ни один slug не найден
+            versions = []
+        else:
+            versions = await get_product_list_versions(session, **query)
+        validators = make_validators("products", versions)
+        if is_not_modified(request, validators):
+            return not_modified(
+                validators, _list_keys(row_id for row_id, _ in versions)
+            )
+
+    products = [] if category_ids is None else await get_product_list(session, **query)
+    validators = make_validators(
+        "products", [(product.id, product.updated_at) for product in products]
+    )
+    response.headers.update(
+        cache_headers(validators, _list_keys(product.id for product in products))
+    )
+    if limit is not None and len(products) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(
+            key=product_sort_key(products[-1], sort), filters=filters
+        )
     return products
 
 
+@router.get(
+    "/search", response_model=list[ProductRead], summary="Поиск товаров по тексту"
+)
+async def product_search_route(
+    response: Response,
+    q: str = Query(..., min_length=2, max_length=100, description="Строка поиска"),
+    category_id: int | None = Query(None, description="Категория товаров"),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = Query(
+        None, description=f"Курсор следующей страницы (из {NEXT_CURSOR_HEADER})"
+    ),
+    session: AsyncSession = Depends(get_db),
+):
+    """Поиск активных товаров по названию и описанию.
+
+    Полнотекстовый поиск (морфология, синтаксис websearch: "фраза", -слово, or)
+    плюс нечёткое совпадение по названию - выдерживает опечатки.
+    Результаты отсортированы по релевантности; пагинация только курсором.
+    """
+    after = None
+    if cursor is not None:
+        try:
+            keys = decode_cursor(cursor)
+            after = (float(keys["score"]), int(keys["id"]))
+        except (InvalidCursor, KeyError, TypeError, ValueError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Некорректный курсор"
+            )
+        if keys.get("q") != q or keys.get("category_id") != category_id:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Курсор выдан для другого запроса",
+            )
+
+    rows = await search_products(
+        session, query=q, category_id=category_id, limit=limit, after=after
+    )
+    if len(rows) == limit:
+        last_product, last_score = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(
+            score=last_score, id=last_product.id, q=q, category_id=category_id
+        )
+    return [product for product, _ in rows]
+
+
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    summary="Выгрузка всего каталога (NDJSON / CSV)",
+    responses={
+        200: {
+            "content": {
+                media_type.split(";")[0]: {} for media_type in MEDIA_TYPES.values()
+            },
+            "headers": {
+                EXPORT_WATERMARK_HEADER: {
+                    "description": "Передать как updated_after в следующий раз",
+                    "schema": {"type": "string", "format": "date-time"},
+                }
+            },
+        }
+    },
+)
+async def export_products_route(
+    format: ExportFormat = Query(ExportFormat.NDJSON, description="Формат"),
+    updated_after: datetime | None = Query(
+        None, description="Только изменённые после (водяной знак прошлой выгрузки)"
+    ),
+    session: AsyncSession = Depends(get_db),
+):
+    """Все товары, включая неактивные, одним потоком (chunked).
+
+    Сессия get_db живёт до конца отправки ответа, курсор читается по мере
+    того, как клиент забирает данные.
+    """
+    watermark, body = await export_products(
+        session, format, updated_after=updated_after
+    )
+    stamp = watermark.strftime("%Y%m%dT%H%M%SZ")
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[format],
+        headers={
+            EXPORT_WATERMARK_HEADER: watermark.isoformat(),
+            "Content-Disposition": (
+                f'attachment; filename="products-{stamp}.{format.value}"'
+            ),
+            "Cache-Control": "no-store",
+        },
+    )
+
+
 @router.get("/{id}", response_model=ProductRead, summary="Получить продукт(+категорию)")
-async def product_with_relation_route(product: ProductDep):
+async def product_with_relation_route(id: int, request: Request, response: Response):
+    """Товар по id; поддерживает If-None-Match / If-Modified-Since (304).
+
+    Одновременные запросы разных товаров склеиваются в один запрос к БД
+    (product_lookup), поэтому сессия запроса здесь не нужна. Товар
+    читается один раз, валидаторы - по его updated_at.
+    """
+    product = await product_loader.load(id)
+    if product is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Продукт не найден"
+        )
+    keys = [f"product-{id}"]
+    validators = make_validators("product", [(product.id, product.updated_at)])
+    if is_not_modified(request, validators):
+        return not_modified(validators, keys)
+    response.headers.update(cache_headers(validators, keys))
     return product
 
 
 @router.post(
     "/",
-    response_model=ProductRead,
+    response_model=ProductAdminRead,
     status_code=status.HTTP_201_CREATED,
     summary="Создать продукт",
     dependencies=[Depends(get_current_user)],
@@ -63,9 +376,42 @@ async def create_product_route(
     return new_product
 
 
+@router.post(
+    "/import",
+    response_model=ProductImportReport,
+    summary="Импорт товаров из CSV / NDJSON",
+    dependencies=[Depends(get_current_user)],
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                content_type: {"schema": {"type": "string"}}
+                for content_type in IMPORT_CONTENT_TYPES
+            },
+        }
+    },
+)
+async def import_products_route(
+    request: Request, session: AsyncSession = Depends(get_db)
+):
+    """Upsert товаров по name из тела запроса (text/csv или application/x-ndjson).
+
+    Тело читается потоком, строки загружаются пачками; ответ - отчёт
+    с номерами строк, которые не удалось загрузить.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    fmt = IMPORT_CONTENT_TYPES.get(content_type.lower())
+    if fmt is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Ожидается один из типов: {', '.join(IMPORT_CONTENT_TYPES)}",
+        )
+    return await import_products(session, request.stream(), fmt)
+
+
 @router.patch(
     "/{id}",
-    response_model=ProductRead,
+    response_model=ProductAdminRead,
     summary="Обновить продукт",
     dependencies=[Depends(get_current_user)],
 )
@@ -81,7 +427,7 @@ async def update_product_route(
 
 @router.post(
     "/{id}/deactivate",
-    response_model=ProductRead,
+    response_model=ProductAdminRead,
     summary="Деактивировать продукт",
     dependencies=[Depends(get_current_user)],
 )
@@ -0,0 +1,33 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+from pydantic import BaseModel, Field
+
+
+class RevenuePoint(BaseModel):
+    """Выручка за день или час (местное время ANALYTICS_TIMEZONE)."""
+
+    period: date | datetime = Field(description="День или начало часа")
+    orders: int = Field(description="Оплаченных заказов")
+    units: int = Field(description="Продано штук")
+    revenue: Decimal
+
+
+class CategorySales(BaseModel):
+    """Продажи категории за период."""
+
+    category_id: int
+    name: str | None = Field(None, description="None - категория удалена")
+    units: int
+    revenue: Decimal
+
+
+class ProductSales(BaseModel):
+    """Продажи товара за период."""
+
+    product_id: int
+    name: str | None = Field(None, description="None - товар удалён")
+    category_id: int
+    orders: int = Field(description="Оплаченных заказов с этим товаром")
+    units: int
+    revenue: Decimal
@@ -82,6 +82,26 @@ class OrderRead(BaseModel):
     updated_at: datetime
 
 
+class OrderListItem(OrderRead):
+    """Заказ в списке "мои заказы"; сводка - только при with_summary=true."""
+
+    item_count: int | None = Field(None, description="Позиций в заказе")
+    units: int | None = Field(None, description="Единиц товара в заказе")
+
+
+class OrderStatsRead(BaseModel):
+    """Сводка заказов пользователя для страницы аккаунта."""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    order_count: int = Field(0, description="Всего заказов (включая отменённые)")
+    paid_order_count: int = Field(0, description="Оплаченных заказов")
+    lifetime_spend: Decimal = Field(
+        Decimal("0.00"), description="Сумма оплаченных заказов"
+    )
+    last_order_at: datetime | None = Field(None, description="Дата последнего заказа")
+
+
 class OrderReadDetailed(BaseModel):
     """Детальная схема заказа со списком позиций и данными товаров."""
 
@@ -8,6 +8,14 @@ from pydantic import BaseModel, ConfigDict
 from app.models.payment import PaymentStatus
 
 
+class WebhookAccepted(BaseModel):
+    """Подтверждение приёма webhook (обработка идёт в фоне)."""
+
+    accepted: bool = True
+    event_id: str
+    duplicate: bool = False  # событие уже обработано ранее
+
+
 class PaymentRead(BaseModel):
     """Схема ответа с данными платежа."""
 
@@ -10,6 +10,7 @@ class ProductCreate(BaseModel):
     description: str | None = Field(None, max_length=500)
     price: Decimal = Field(gt=0, decimal_places=2)  # цена > 0, 2 знака после запятой
     category_id: int = Field(gt=0)
+    stock: int = Field(0, ge=0, description="Остаток на складе")
 
 
 class ProductUpdatePatch(BaseModel):
@@ -21,11 +22,17 @@ class ProductUpdatePatch(BaseModel):
     description: str | None = Field(None, max_length=500)
     price: Decimal | None = Field(None, gt=0, decimal_places=2)
     category_id: int | None = Field(None, gt=0)
+    stock: int | None = Field(None, ge=0)
     is_active: bool | None = None
 
 
 class ProductRead(BaseModel):
-    """Схема для чтения продукта"""
+    """Схема для чтения продукта (каталог, кеш, экспорт).
+
+    Вместо точного остатка - только наличие: версия строки (updated_at,
+    по ней ETag и инкрементальный экспорт) меняется при переходе остатка
+    через ноль, но не при каждом списании.
+    """
 
     model_config = ConfigDict(from_attributes=True, extra="forbid")
 
@@ -34,5 +41,36 @@ class ProductRead(BaseModel):
     description: str | None
     price: Decimal
     category_id: int
+    in_stock: bool
     is_active: bool
     created_at: datetime
+
+
+class ProductAdminRead(ProductRead):
+    """Ответ на изменение продукта: с точным остатком (не кешируется)"""
+
+    stock: int
+
+
+class ProductImportRowError(BaseModel):
+    """Ошибки одной строки импорта"""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    line: int
+    errors: list[str]
+
+
+class ProductImportReport(BaseModel):
+    """Итог импорта товаров"""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    total: int = Field(description="Прочитано строк с данными")
+    inserted: int
+    updated: int
+    unchanged: int = Field(description="Без изменений, в т.ч. повторы name в пачке")
+    failed: int
+    errors: list[ProductImportRowError]
+    errors_truncated: bool = Field(description="В errors не все ошибки")
+    aborted: bool = Field(description="Файл прочитан не до конца")
@@ -0,0 +1,158 @@
+"""Подбор параметров Argon2id под конкретную машину.
+
+Стратегия (как в RFC 9106, раздел 4): память - максимум из бюджета,
+parallelism фиксирован, time_cost растёт, пока хеш не станет не быстрее
+целевого времени. Если даже минимальный time_cost на полной памяти медленнее
+цели, память уменьшается вдвое (но не ниже ARGON_MIN_MEMORY_COST).
+Результат никогда не слабее Argon2Params.minimum().
+
+CLI (печатает строки для .env):
+    uv run python -m app.security.argon2_calibration --target-ms 200
+
+При старте приложения то же самое делает ARGON_AUTO_CALIBRATE=true.
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+from dataclasses import dataclass, replace
+
+from argon2 import PasswordHasher
+from argon2.low_level import Type
+
+from app.config import settings
+
+MAX_TIME_COST = 20
+_SAMPLE_PASSWORD = "calibration-password"
+
+
+@dataclass(frozen=True, slots=True)
+class Argon2Params:
+    """Параметры Argon2id (memory_cost в KiB)."""
+
+    time_cost: int
+    memory_cost: int
+    parallelism: int
+    hash_len: int
+    salt_len: int
+
+    @classmethod
+    def from_settings(cls) -> Argon2Params:
+        return cls(
+            time_cost=settings.ARGON_TIME_COST,
+            memory_cost=settings.ARGON_MEMORY_COST,
+            parallelism=settings.ARGON_PARALLELISM,
+            hash_len=settings.ARGON_HASH_LEN,
+            salt_len=settings.ARGON_SALT_LEN,
+        )
+
+    @classmethod
+    def minimum(cls) -> Argon2Params:
+        """Общий для всех хостов минимум (ниже калибровка не опускается)."""
+        return replace(
+            cls.from_settings(),
+            time_cost=settings.ARGON_MIN_TIME_COST,
+            memory_cost=settings.ARGON_MIN_MEMORY_COST,
+        )
+
+    def weaker_than(self, floor: Argon2Params) -> bool:
+        """Хотя бы один параметр ниже floor (salt_len из хеша не извлекается)."""
+        return (
+            self.time_cost < floor.time_cost
+            or self.memory_cost < floor.memory_cost
+            or self.parallelism < floor.parallelism
+            or self.hash_len < floor.hash_len
+        )
+
+    def hasher(self) -> PasswordHasher:
+        return PasswordHasher(
+            time_cost=self.time_cost,
+            memory_cost=self.memory_cost,
+            parallelism=self.parallelism,
+            hash_len=self.hash_len,
+            salt_len=self.salt_len,
+            type=Type.ID,
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class CalibrationResult:
+    params: Argon2Params
+    measured_ms: float
+
+
+def measure_ms(params: Argon2Params, *, samples: int = 3) -> float:
+    """Медиана времени одного хеширования с этими параметрами, мс."""
+    hasher = params.hasher()
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        hasher.hash(_SAMPLE_PASSWORD)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def calibrate(
+    *,
+    target_ms: float,
+    max_memory_kib: int,
+    min_memory_kib: int,
+    base: Argon2Params,
+    min_time_cost: int = 1,
+    samples: int = 3,
+) -> CalibrationResult:
+    """Подобрать параметры: ближайшие к target_ms сверху (или максимум)."""
+    memory = max_memory_kib
+    params = replace(base, time_cost=min_time_cost, memory_cost=memory)
+    elapsed = measure_ms(params, samples=samples)
+    while elapsed > target_ms and memory // 2 >= min_memory_kib:
+        memory //= 2
+        params = replace(base, time_cost=min_time_cost, memory_cost=memory)
+        elapsed = measure_ms(params, samples=samples)
+
+    while elapsed < target_ms and params.time_cost < MAX_TIME_COST:
+        params = replace(params, time_cost=params.time_cost + 1)
+        elapsed = measure_ms(params, samples=samples)
+    return CalibrationResult(params=params, measured_ms=round(elapsed, 1))
+
+
+def calibrate_from_settings() -> CalibrationResult:
+    return calibrate(
+        target_ms=settings.ARGON_TARGET_MS,
+        max_memory_kib=settings.ARGON_MEMORY_COST,
+        min_memory_kib=settings.ARGON_MIN_MEMORY_COST,
+        base=Argon2Params.from_settings(),
+        min_time_cost=settings.ARGON_MIN_TIME_COST,
+    )
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Калибровка Argon2id")
+    parser.add_argument("--target-ms", type=float, default=settings.ARGON_TARGET_MS)
+    parser.add_argument(
+        "--max-memory-kib", type=int, default=settings.ARGON_MEMORY_COST
+    )
+    parser.add_argument(
+        "--min-memory-kib", type=int, default=settings.ARGON_MIN_MEMORY_COST
+    )
+    parser.add_argument("--samples", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    result = calibrate(
+        target_ms=args.target_ms,
+        max_memory_kib=args.max_memory_kib,
+        min_memory_kib=args.min_memory_kib,
+        base=Argon2Params.from_settings(),
+        min_time_cost=settings.ARGON_MIN_TIME_COST,
+        samples=args.samples,
+    )
+    print(f"# ~{result.measured_ms} ms на хеш")
+    print(f"ARGON_TIME_COST={result.params.time_cost}")
+    print(f"ARGON_MEMORY_COST={result.params.memory_cost}")
+    print(f"ARGON_PARALLELISM={result.params.parallelism}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.models.user import User
 from app.repositories.user_repo import get_user_by_id
+from app.security import principal_cache
 from app.security.jwt import decode_access_token, TokenExpired, TokenInvalid
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
@@ -23,7 +24,7 @@ async def get_current_user(
         session: Асинхронная сессия БД
 
     Returns:
-        User: Активный пользователь
+        User: Активный пользователь (при попадании в кеш - detached-снимок)
 
     Raises:
         HTTPException: 401 если токен невалиден или пользователь не найден
@@ -49,14 +50,17 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    # 3. Поиск пользователя
-    user = await get_user_by_id(session, user_id)
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Сессия недействительна (пользователь не найден)",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+    # 3. Поиск пользователя: сначала кеш принципала, затем БД
+    user = await principal_cache.get(user_id)
+    if user is None:
+        user = await get_user_by_id(session, user_id)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Сессия недействительна (пользователь не найден)",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        await principal_cache.put(user)
 
     # 4. Проверка активности (пользователь мог быть забанен после логина)
     if not user.is_active:
@@ -66,3 +70,18 @@ async def get_current_user(
         )
 
     return user
+
+
+async def get_current_admin(user: User = Depends(get_current_user)) -> User:
+    """
+    Текущий пользователь с правами администратора.
+
+    Raises:
+        HTTPException: 403 если у пользователя нет прав администратора
+    """
+    if not user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Недостаточно прав",
+        )
+    return user
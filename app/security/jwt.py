@@ -2,13 +2,16 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+import hashlib
+import time
+from dataclasses import asdict, dataclass
 from datetime import datetime, timedelta, timezone
 from typing import Any
 
 import jwt
 from jwt import ExpiredSignatureError, InvalidTokenError
 
+from app.cache import TTLCache
 from app.config import settings
 
 
@@ -67,10 +70,48 @@ class TokenData:
     payload: dict[str, Any]
 
 
+@dataclass
+class TokenCacheStats:
+    """Счётчики кеша проверенных токенов (на процесс)."""
+
+    hits: int = 0
+    misses: int = 0
+
+
+token_cache_stats = TokenCacheStats()
+
+# Уже проверенные токены: ключ - хеш токена, запись живёт до его `exp`.
+_verified_tokens: TTLCache[bytes, TokenData] = TTLCache(
+    maxsize=settings.JWT_CACHE_MAX_SIZE, ttl=0
+)
+
+
+def _cache_key(token: str) -> bytes:
+    # Хеш с ключом SECRET_KEY (+ алгоритм): после ротации ключа старые
+    # записи просто не находятся, а сам токен в памяти не хранится.
+    return hashlib.blake2b(
+        f"{settings.ALGORITHM}:{token}".encode(),
+        key=hashlib.sha256(settings.SECRET_KEY.encode()).digest(),
+        digest_size=32,
+    ).digest()
+
+
+def get_token_cache_stats() -> dict[str, Any]:
+    """Состояние кеша токенов этого процесса."""
+    return {
+        "size": len(_verified_tokens),
+        "max_size": _verified_tokens.maxsize,
+        **asdict(token_cache_stats),
+    }
+
+
 def decode_access_token(token: str) -> TokenData:
     """
     Декодирование и валидация JWT токена.
 
+    Повторный запрос с тем же токеном берётся из кеша без проверки подписи;
+    запись истекает вместе с токеном, невалидные токены не кешируются.
+
     Args:
         token: JWT токен для декодирования
 
@@ -81,6 +122,13 @@ def decode_access_token(token: str) -> TokenData:
         TokenExpired: Если токен истёк
         TokenInvalid: Если токен невалиден или поврежден
     """
+    key = _cache_key(token)
+    cached = _verified_tokens.get(key)
+    if cached is not None:
+        token_cache_stats.hits += 1
+        return cached
+    token_cache_stats.misses += 1
+
     try:
         payload = jwt.decode(
             jwt=token,
@@ -97,4 +145,8 @@ def decode_access_token(token: str) -> TokenData:
     if not isinstance(sub, str) or not sub:
         raise TokenInvalid("Ошибка субъекта в токене")
 
-    return TokenData(sub=sub, payload=payload)
+    token_data = TokenData(sub=sub, payload=payload)
+    ttl = payload["exp"] - time.time()
+    if ttl > 0:
+        _verified_tokens.set(key, token_data, ttl=ttl)
+    return token_data
@@ -2,33 +2,84 @@
 
 - Argon2id - рекомендуемый вариант для паролей (устойчив к GPU, без утечек по времени).
 - Параметры берём из конфигурации (.env), чтобы их можно было тюнить под железо 2026+ без правки кода.
-- Хеширование/проверка отправляем в threadpool, чтобы не блокировать event loop.
+- Хеширование/проверка идут в отдельный ограниченный пул (не общий threadpool
+  AnyIO), чтобы всплеск логинов не забирал потоки у остальных эндпоинтов;
+  при переполнении очереди - ExecutorOverloaded (роуты отвечают 503).
 - Ограничиваем максимальную длину пароля как простую защиту от DoS сверхдлинными строками.
-- Периодически стоит перепроверять скорость (целевой SLA ~150–250 мс) и обновлять параметры.
+- Скорость зависит от железа: параметры подбирает калибровка
+  (`python -m app.security.argon2_calibration` или ARGON_AUTO_CALIBRATE=true),
+  целевой SLA ~150–250 мс.
+- Хеши слабее общего для всех хостов минимума перехешируются при успешном
+  входе (`needs_rehash`), миграция не нужна. Сравниваем с минимумом, а не с
+  параметрами этого процесса: после калибровки у хостов они разные, и
+  сравнение "не равно" перехешировало бы пользователя на каждом входе.
 """
 
 import logging
+from functools import lru_cache
 
-from fastapi.concurrency import run_in_threadpool
-from argon2 import PasswordHasher
-from argon2.low_level import Type
+from argon2 import PasswordHasher, extract_parameters
 from argon2.exceptions import VerifyMismatchError, VerificationError, InvalidHash
+from argon2.low_level import ARGON2_VERSION, Type
 
 from app.config import settings
+from app.executors import BoundedExecutor
+from app.security.argon2_calibration import Argon2Params
 
 log = logging.getLogger(__name__)
 
-# Argon2id с явными параметрами из конфигурации.
-pwd_hasher = PasswordHasher(
-    time_cost=settings.ARGON_TIME_COST,
-    memory_cost=settings.ARGON_MEMORY_COST,
-    parallelism=settings.ARGON_PARALLELISM,
-    hash_len=settings.ARGON_HASH_LEN,
-    salt_len=settings.ARGON_SALT_LEN,
-    type=Type.ID,  # гарантируем Argon2id
+# Текущие параметры Argon2id: из конфигурации или результат калибровки.
+_params = Argon2Params.from_settings()
+# Нижняя граница для перехеширования - одинаковая на всех хостах: без
+# калибровки это параметры из .env, с калибровкой - минимум, ниже которого
+# она не опускается (иначе хост перехешировал бы свои же хеши).
+_rehash_floor = Argon2Params.minimum() if settings.ARGON_AUTO_CALIBRATE else _params
+
+
+def get_params() -> Argon2Params:
+    return _params
+
+
+def set_params(params: Argon2Params) -> None:
+    """Применить новые параметры к последующим хешам этого процесса."""
+    global _params
+    _params = params
+
+
+@lru_cache(maxsize=4)
+def _hasher(params: Argon2Params) -> PasswordHasher:
+    return params.hasher()
+
+
+password_executor = BoundedExecutor(
+    "argon2",
+    kind=settings.PASSWORD_HASH_EXECUTOR,
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+    retry_after=settings.PASSWORD_HASH_RETRY_AFTER_SECONDS,
 )
 
 
+# Функции уровня модуля, чтобы их можно было отправить в ProcessPoolExecutor.
+# Параметры передаются явно: в дочернем процессе калибровки не было.
+def _hash(password: str, params: Argon2Params) -> str:
+    return _hasher(params).hash(password)
+
+
+def _verify(hashed_password: str, password: str, params: Argon2Params) -> bool:
+    try:
+        # Проверка берёт параметры из самого хеша.
+        return _hasher(params).verify(hashed_password, password)
+    except VerifyMismatchError:
+        return False
+    except (VerificationError, InvalidHash) as exc:
+        log.warning(
+            "Argon2 verify failed (%s)",
+            exc.__class__.__name__,
+        )
+        return False
+
+
 async def hash_password(*, password: str) -> str:
     """
     Хеширование пароля с использованием Argon2id.
@@ -41,10 +92,11 @@ async def hash_password(*, password: str) -> str:
 
     Raises:
         ValueError: Если пароль превышает максимальную длину
+        ExecutorOverloaded: Если очередь пула хеширования заполнена
     """
     if len(password) > settings.ARGON_MAX_PASSWORD_LEN:
         raise ValueError("Пароль слишком длинный")
-    return await run_in_threadpool(pwd_hasher.hash, password)
+    return await password_executor.run(_hash, password, _params)
 
 
 async def verify_password(*, password: str, hashed_password: str) -> bool:
@@ -57,20 +109,27 @@ async def verify_password(*, password: str, hashed_password: str) -> bool:
 
     Returns:
         bool: True если пароль совпадает, False иначе
-    """
 
-    def _verify() -> bool:
-        if len(password) > settings.ARGON_MAX_PASSWORD_LEN:
-            return False
-        try:
-            return pwd_hasher.verify(hashed_password, password)
-        except VerifyMismatchError:
-            return False
-        except (VerificationError, InvalidHash) as exc:
-            log.warning(
-                "Argon2 verify failed (%s)",
-                exc.__class__.__name__,
-            )
-            return False
-
-    return await run_in_threadpool(_verify)
+    Raises:
+        ExecutorOverloaded: Если очередь пула хеширования заполнена
+    """
+    if len(password) > settings.ARGON_MAX_PASSWORD_LEN:
+        return False
+    return await password_executor.run(_verify, hashed_password, password, _params)
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """Хеш слабее общего минимума или не Argon2id (дёшево, без хеширования)."""
+    try:
+        stored = extract_parameters(hashed_password)
+    except InvalidHash:
+        return False
+    if stored.type is not Type.ID or stored.version < ARGON2_VERSION:
+        return True
+    return Argon2Params(
+        time_cost=stored.time_cost,
+        memory_cost=stored.memory_cost,
+        parallelism=stored.parallelism,
+        hash_len=stored.hash_len,
+        salt_len=stored.salt_len,
+    ).weaker_than(_rehash_floor)
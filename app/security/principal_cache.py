@@ -0,0 +1,137 @@
+"""Кеш принципала (пользователя) для get_current_user.
+
+Без кеша каждый защищённый запрос делает SELECT пользователя только ради
+проверки is_active. Здесь два уровня:
+- in-process LRU с коротким TTL (ограничивает рассинхрон между воркерами);
+- опционально Redis (общий для всех воркеров, включается через REDIS_URL).
+
+Из кеша возвращается detached-снимок User без hashed_password: его можно
+читать, но нельзя добавлять в сессию и менять.
+
+При деактивации пользователя вместо удаления записи кладётся "надгробие"
+(`revoke`): снимок с is_active=False, который `put` не перезаписывает, пока
+он жив. Иначе запрос, прочитавший пользователя из БД до коммита
+деактивации, мог бы положить в кеш старый активный снимок уже после
+сброса, и токены работали бы ещё PRINCIPAL_CACHE_REDIS_TTL_SECONDS.
+Локальный уровень других воркеров надгробия не видит: там старый снимок
+живёт не дольше PRINCIPAL_CACHE_TTL_SECONDS.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from datetime import datetime
+from typing import Any
+
+from redis.exceptions import RedisError
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.cache import TTLCache
+from app.config import settings
+from app.models.user import User
+from app.redis_client import get_redis
+
+log = logging.getLogger(__name__)
+
+REDIS_KEY_PREFIX = "principal:"
+TOMBSTONE = "tombstone"
+
+# SET, если под ключом нет надгробия (атомарно, в одном вызове Redis)
+_PUT_UNLESS_TOMBSTONE = """
+local current = redis.call('GET', KEYS[1])
+if current and cjson.decode(current)['tombstone'] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+return 1
+"""
+
+_local: TTLCache[int, dict[str, Any]] = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+
+def _snapshot(user: User) -> dict[str, Any]:
+    """Поля пользователя, нужные для авторизации и /auth/me."""
+    return {
+        "id": user.id,
+        "email": user.email,
+        "is_active": user.is_active,
+        "is_admin": user.is_admin,
+        "created_at": user.created_at.isoformat(),
+        "updated_at": user.updated_at.isoformat(),
+    }
+
+
+def _from_snapshot(data: dict[str, Any]) -> User:
+    user = User(
+        id=data["id"],
+        email=data["email"],
+        is_active=data["is_active"],
+        # снимки, записанные до появления поля, - без прав администратора
+        is_admin=data.get("is_admin", False),
+        created_at=datetime.fromisoformat(data["created_at"]),
+        updated_at=datetime.fromisoformat(data["updated_at"]),
+    )
+    make_transient_to_detached(user)
+    return user
+
+
+async def get(user_id: int) -> User | None:
+    """Найти пользователя в кеше (сначала локально, затем в Redis)."""
+    data = _local.get(user_id)
+    if data is None:
+        redis = get_redis()
+        if redis is None:
+            return None
+        try:
+            raw = await redis.get(f"{REDIS_KEY_PREFIX}{user_id}")
+        except RedisError as exc:
+            log.warning("Principal cache: Redis недоступен (%s)", exc)
+            return None
+        if raw is None:
+            return None
+        data = json.loads(raw)
+        _local.set(user_id, data)
+    return _from_snapshot(data)
+
+
+async def put(user: User) -> None:
+    """Положить пользователя в кеш после чтения из БД (не поверх надгробия)."""
+    local = _local.get(user.id)
+    if local is not None and local.get(TOMBSTONE):
+        return
+    data = _snapshot(user)
+    redis = get_redis()
+    if redis is not None:
+        try:
+            stored = await redis.eval(
+                _PUT_UNLESS_TOMBSTONE,
+                1,
+                f"{REDIS_KEY_PREFIX}{user.id}",
+                json.dumps(data),
+                settings.PRINCIPAL_CACHE_REDIS_TTL_SECONDS,
+            )
+        except RedisError as exc:
+            log.warning("Principal cache: Redis недоступен (%s)", exc)
+        else:
+            if not stored:
+                # снимок прочитан до деактивации - локально его тоже не держим
+                return
+    _local.set(user.id, data)
+
+
+async def revoke(user: User) -> None:
+    """Деактивация: надгробие вместо записи, чтобы её не вернул гонящийся put."""
+    data = {**_snapshot(user), "is_active": False, TOMBSTONE: True}
+    ttl = settings.PRINCIPAL_CACHE_REDIS_TTL_SECONDS
+    _local.set(user.id, data, ttl=ttl)
+    redis = get_redis()
+    if redis is None:
+        return
+    try:
+        await redis.set(f"{REDIS_KEY_PREFIX}{user.id}", json.dumps(data), ex=ttl)
+    except RedisError as exc:
+        log.warning("Principal cache: Redis недоступен (%s)", exc)
@@ -0,0 +1,73 @@
+"""Аналитика продаж: фоновое обновление свёрток и отчёты по ним.
+
+Отчёты (/analytics) читают только свёртки `sales_*` - сотни строк за
+месяц вместо GROUP BY по всем заказам на основной БД. Свёртки догоняют
+заказы раз в ANALYTICS_REFRESH_INTERVAL_SECONDS; насколько они свежие,
+показывает водяной знак (заголовок X-Analytics-Watermark).
+
+Ручной запуск (догнать сейчас / пересчитать всё заново):
+    uv run python -m app.services.analytics [--rebuild]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+
+from app.background import PeriodicJob
+from app.config import settings
+from app.database import AsyncSessionLocal, engine
+from app.repositories.analytics_repo import (
+    refresh_sales_rollups,
+    reset_sales_rollups,
+)
+
+log = logging.getLogger(__name__)
+
+
+async def refresh_sales_rollups_batch() -> bool:
+    """Одна пачка обновления свёрток. True - есть ещё изменённые заказы."""
+    async with AsyncSessionLocal() as session:
+        result = await refresh_sales_rollups(
+            session,
+            batch_size=settings.ANALYTICS_REFRESH_BATCH_SIZE,
+            tz=settings.ANALYTICS_TIMEZONE,
+        )
+    if result is None:
+        return False  # обновляет другой воркер
+    if result.orders:
+        log.info(
+            "Свёртки продаж: заказов %s, часов пересчитано %s, знак %s",
+            result.orders,
+            result.hours,
+            result.high_water.isoformat(),
+        )
+    return result.has_more
+
+
+analytics_refresh_job = PeriodicJob(
+    "analytics-refresh",
+    refresh_sales_rollups_batch,
+    interval=settings.ANALYTICS_REFRESH_INTERVAL_SECONDS,
+    jitter=settings.ANALYTICS_REFRESH_INTERVAL_SECONDS / 10,
+)
+
+
+async def _main() -> None:
+    parser = argparse.ArgumentParser(description="Обновление свёрток продаж")
+    parser.add_argument(
+        "--rebuild", action="store_true", help="очистить свёртки и построить заново"
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    if args.rebuild:
+        async with AsyncSessionLocal() as session:
+            await reset_sales_rollups(session)
+    while await refresh_sales_rollups_batch():
+        pass
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -2,10 +2,16 @@
 
 from __future__ import annotations
 
+import logging
+
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.user import User
-from app.security.password import hash_password, verify_password
+from app.executors import ExecutorOverloaded
+from app.security.password import hash_password, needs_rehash, verify_password
 from app.repositories import user_repo
+from app.security import principal_cache
+
+log = logging.getLogger(__name__)
 
 
 async def register_user(session: AsyncSession, email: str, password: str) -> User:
@@ -33,6 +39,9 @@ async def authenticate_user(
     """
     Аутентификация пользователя.
 
+    Если хеш слабее общего минимума Argon2, после успешной проверки
+    пароль перехешируется текущими (пароль в открытом виде есть только тут).
+
     Args:
         session: Асинхронная сессия БД
         email: Email пользователя
@@ -49,4 +58,35 @@ async def authenticate_user(
     ):
         return None
 
+    if need_user.is_active and needs_rehash(need_user.hashed_password):
+        try:
+            new_hash = await hash_password(password=password)
+        except ExecutorOverloaded:
+            # Не роняем вход: перехешируем при следующем.
+            log.info("Rehash пользователя %s отложен: пул занят", need_user.id)
+        else:
+            need_user = await user_repo.update_password_hash(
+                session, need_user, new_hash
+            )
+
     return need_user
+
+
+async def deactivate_user(session: AsyncSession, user: User) -> User:
+    """
+    Заблокировать пользователя.
+
+    Кладёт в кеш принципала надгробие (см. principal_cache.revoke): уже
+    выданные токены перестают работать сразу в этом воркере и через Redis,
+    в локальном кеше других воркеров - не позже PRINCIPAL_CACHE_TTL_SECONDS.
+
+    Args:
+        session: Асинхронная сессия БД
+        user: Пользователь (из БД, не снимок из кеша)
+
+    Returns:
+        User: Заблокированный пользователь
+    """
+    user = await user_repo.deactivate_user(session, user)
+    await principal_cache.revoke(user)
+    return user
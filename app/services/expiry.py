@@ -0,0 +1,96 @@
+"""Фоновое истечение зависших заказов и платежей.
+
+Платёж в CREATED/PENDING дольше PAYMENT_PENDING_TTL_SECONDS отменяется
+(покупатель ушёл со страницы оплаты), заказ в pending дольше
+ORDER_PENDING_TTL_SECONDS - отменяется с возвратом резерва на склад.
+Заказ с активным платежом ждёт, пока истечёт платёж, поэтому TTL заказа
+должен быть больше TTL платежа.
+
+Запускается в каждом воркере: пачки захватываются через
+FOR UPDATE SKIP LOCKED, воркеры делят работу, а не ждут друг друга.
+Пачка - своя короткая транзакция; пока пачки полные, следующий запуск -
+сразу (PeriodicJob), иначе - через EXPIRY_INTERVAL_SECONDS + jitter.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from app.background import PeriodicJob
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.repositories.order_repo import expire_pending_orders
+from app.repositories.payment_repo import expire_stale_payments
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class ExpiryStats:
+    """Счётчики истечения (на процесс)."""
+
+    runs: int = 0
+    errors: int = 0
+    orders_expired: int = 0
+    payments_expired: int = 0
+    # последний запуск этого воркера
+    last_run_at: str | None = None
+    last_run_ms: float = 0.0
+    last_run_orders: int = 0
+    last_run_payments: int = 0
+
+
+_stats = ExpiryStats()
+
+
+async def expire_stale_batch() -> bool:
+    """Одна пачка платежей и одна пачка заказов. True - есть ещё работа."""
+    batch_size = settings.EXPIRY_BATCH_SIZE
+    started = time.perf_counter()
+    _stats.runs += 1
+    try:
+        async with AsyncSessionLocal() as session:
+            payments = await expire_stale_payments(
+                session,
+                ttl=timedelta(seconds=settings.PAYMENT_PENDING_TTL_SECONDS),
+                limit=batch_size,
+            )
+            orders = await expire_pending_orders(
+                session,
+                ttl=timedelta(seconds=settings.ORDER_PENDING_TTL_SECONDS),
+                limit=batch_size,
+            )
+    except Exception:
+        _stats.errors += 1
+        raise
+    _stats.orders_expired += orders
+    _stats.payments_expired += payments
+    _stats.last_run_at = datetime.now(timezone.utc).isoformat()
+    _stats.last_run_ms = round((time.perf_counter() - started) * 1000, 1)
+    _stats.last_run_orders = orders
+    _stats.last_run_payments = payments
+    if orders or payments:
+        log.info(
+            "Истекли: заказов %s, платежей %s (%s мс)",
+            orders,
+            payments,
+            _stats.last_run_ms,
+        )
+    return orders == batch_size or payments == batch_size
+
+
+def get_expiry_stats() -> dict[str, Any]:
+    """Счётчики истечения этого воркера."""
+    return asdict(_stats)
+
+
+expiry_job = PeriodicJob(
+    "expiry",
+    expire_stale_batch,
+    interval=settings.EXPIRY_INTERVAL_SECONDS,
+    jitter=settings.EXPIRY_INTERVAL_SECONDS / 5,
+)
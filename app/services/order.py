@@ -1,16 +1,20 @@
 from __future__ import annotations
 from collections.abc import Sequence
-from decimal import Decimal
+from typing import NoReturn
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.order import Order, OrderItem
+from app.models.order import Order
 from app.repositories.order_repo import (
+    InsufficientStock,
     OrderItemData,
+    OrderNotPending,
     ProductNotFound,
     ProductNotActive,
+    cancel_pending_order,
     get_products_by_ids,
     create_order_db,
+    release_stock_for_orders,
 )
 
 
@@ -19,46 +23,52 @@ async def create_order(
 ) -> Order:
     """
     Создать заказ - БИЗНЕС-ЛОГИКА.
-    Валидирует товары, рассчитывает цены, создаёт заказ.
+    Резервирует остатки и фиксирует цены товаров на момент заказа.
+
+    Успешный путь - один SQL-запрос (валидация, резерв, цены, вставка
+    заказа и позиций) плюс COMMIT. Разбор причин - только при ошибке.
     """
-    # ШАГ 1: Получить все product_id
-    product_ids = [item.product_id for item in items]
+    new_order = await create_order_db(session, user_id=user_id, items=items)
+    if new_order is None:
+        await session.rollback()
+        await _raise_reservation_error(session, items)
+    return new_order
+
 
-    # ШАГ 2: Загрузить товары через репозиторий
+async def _raise_reservation_error(
+    session: AsyncSession, items: Sequence[OrderItemData]
+) -> NoReturn:
+    """Определить, почему заказ не зарезервирован (только путь ошибки)."""
+    product_ids = [item.product_id for item in items]
     products = await get_products_by_ids(session, product_ids)
 
-    # ШАГ 3: ВАЛИДАЦИЯ существования
     found_ids = {p.id for p in products}
     missing_ids = set(product_ids) - found_ids
     if missing_ids:
         raise ProductNotFound(f"Товары не найдены: {sorted(missing_ids)}")
 
-    # ШАГ 4: ВАЛИДАЦИЯ активности
-    inactive_products = [p for p in products if not p.is_active]
-    if inactive_products:
-        inactive_ids = [p.id for p in inactive_products]
+    inactive_ids = [p.id for p in products if not p.is_active]
+    if inactive_ids:
         raise ProductNotActive(f"Товары деактивированы: {inactive_ids}")
 
-    # ШАГ 5: Создать маппинг для быстрого доступа
-    products_map = {p.id: p for p in products}
+    # остатки могли измениться после отката - тогда отдаём все позиции
+    stock_map = {p.id: p.stock for p in products}
+    short_ids = [i.product_id for i in items if stock_map[i.product_id] < i.quantity]
+    raise InsufficientStock(sorted(short_ids or product_ids))
 
-    # ШАГ 6: БИЗНЕС-ЛОГИКА: создать OrderItem с ценами из Product
-    order_items = []
-    for item_data in items:
-        product = products_map[item_data.product_id]
-        order_item = OrderItem(
-            product_id=item_data.product_id,
-            quantity=item_data.quantity,
-            price=product.price,  # берём текущую цену товара
-        )
-        order_items.append(order_item)
 
-    # ШАГ 7: БИЗНЕС-ЛОГИКА: рассчитать общую сумму
-    total_price = sum(Decimal(str(item.quantity)) * item.price for item in order_items)
+async def cancel_order(session: AsyncSession, order: Order) -> Order:
+    """
+    Отменить заказ и вернуть резерв на склад в одной транзакции.
 
-    # ШАГ 8: Сохранить через репозиторий (чистая работа с БД)
-    new_order = await create_order_db(
-        session, user_id=user_id, order_items=order_items, total_price=total_price
-    )
+    Raises:
+        OrderNotPending: Заказ уже не в статусе pending
+    """
+    if not await cancel_pending_order(session, order.id):
+        await session.rollback()
+        raise OrderNotPending("Заказ нельзя отменить в текущем статусе")
 
-    return new_order
+    await release_stock_for_orders(session, [order.id])
+    await session.commit()
+    await session.refresh(order)
+    return order
@@ -0,0 +1,82 @@
+"""Сводка заказов пользователя: чтение и сверка с таблицей orders.
+
+Сводку ведут сами операции с заказами (order_repo); сверка нужна для
+расхождений, которые мимо них прошли (ручные правки, старые данные).
+Она идёт пачками по ORDER_STATS_RECONCILE_BATCH_SIZE пользователей,
+каждая пачка - своя короткая транзакция. Пачку держит advisory lock
+уровня транзакции: второй воркер в это время пропускает запуск, а
+попав между пачками, забирает сверку себе - первый тогда останавливается.
+
+Ручной запуск:
+    uv run python -m app.services.order_stats
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from sqlalchemy import text
+
+from app.background import PeriodicJob
+from app.config import settings
+from app.database import AsyncSessionLocal, engine
+from app.repositories.order_stats_repo import reconcile_user_order_stats
+
+log = logging.getLogger(__name__)
+
+# Ключ pg_try_advisory_xact_lock для сверки (любое число, уникальное в приложении)
+RECONCILE_LOCK_KEY = 0x6F726473  # "ords"
+
+
+async def reconcile_order_stats() -> int | None:
+    """Пересчитать всю сводку из orders. Число исправленных строк или None,
+    если сверку уже выполняет другой процесс."""
+    fixed_total = 0
+    after: int | None = 0
+    while after is not None:
+        async with AsyncSessionLocal() as session:
+            # блокировка уровня транзакции - на каждую пачку: снимается её
+            # коммитом и не зависит от серверного соединения (PgBouncer в
+            # режиме transaction), в отличие от сессионной
+            locked = await session.scalar(
+                text("SELECT pg_try_advisory_xact_lock(:key)"),
+                {"key": RECONCILE_LOCK_KEY},
+            )
+            if not locked:
+                # другой процесс начал сверку между нашими пачками -
+                # продолжит он, второй проход не нужен
+                log.info("Сверка сводки заказов уже выполняется в другом процессе")
+                return None if after == 0 else fixed_total
+            after, fixed = await reconcile_user_order_stats(
+                session,
+                after_user_id=after,
+                batch_size=settings.ORDER_STATS_RECONCILE_BATCH_SIZE,
+            )
+        fixed_total += fixed
+    if fixed_total:
+        log.warning("Сверка сводки заказов: исправлено строк - %s", fixed_total)
+    return fixed_total
+
+
+async def _reconcile_job() -> None:
+    await reconcile_order_stats()
+
+
+order_stats_reconcile_job = PeriodicJob(
+    "order-stats-reconcile",
+    _reconcile_job,
+    interval=settings.ORDER_STATS_RECONCILE_INTERVAL_SECONDS,
+    jitter=settings.ORDER_STATS_RECONCILE_INTERVAL_SECONDS / 10,
+)
+
+
+async def _main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    fixed = await reconcile_order_stats()
+    await engine.dispose()
+    print("занято другим процессом" if fixed is None else f"исправлено строк: {fixed}")
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -4,27 +4,50 @@
 - когда можно создать оплату;
 - как обрабатывать webhook;
 - когда переводить заказ в paid.
+
+Вызовы провайдера идут вне транзакции БД: платёж сначала коммитится
+локально (CREATED), ответ провайдера записывается отдельной короткой
+транзакцией, а недоставленные платежи досылает outbox.
 """
 
 from __future__ import annotations
 
+import logging
 from uuid import uuid4
 
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.models.order import Order, OrderStatus
-from app.models.payment import DEFAULT_CURRENCY, Payment, PaymentStatus
-from app.payments.gateway import CreatePaymentRequest, PaymentGateway, WebhookEvent
+from app.models.payment import (
+    ACTIVE_PAYMENT_STATUSES,
+    DEFAULT_CURRENCY,
+    Payment,
+    PaymentStatus,
+)
+from app.payments.gateway import (
+    CreatePaymentRequest,
+    PaymentGateway,
+    PaymentGatewayRejected,
+    WebhookEvent,
+)
 from app.repositories.order_repo import get_order_by_id, update_order_status
+from app.repositories.webhook_inbox_repo import record_processed_event
 from app.repositories.payment_repo import (
+    apply_provider_result,
+    claim_created_payment,
     create_payment,
+    fail_created_payment,
+    flag_payment_for_refund,
     get_active_payment_for_order,
     get_payment_by_provider_payment_id,
-    update_payment_after_create,
+    release_payment_lease,
     update_payment_status,
 )
 
+log = logging.getLogger(__name__)
+
 
 class PaymentError(Exception):
     """Базовая ошибка домена оплаты."""
@@ -38,6 +61,17 @@ class PaymentNotFoundError(PaymentError):
     """Платеж не найден."""
 
 
+class PaymentProviderError(PaymentError):
+    """Провайдер не ответил; платёж остался в CREATED и будет дослан."""
+
+
+class PaymentRejectedError(PaymentProviderError):
+    """Провайдер отклонил платёж; он закрыт как FAILED и не досылается."""
+
+
+PROVIDER_REJECTED_REASON = "provider_rejected"
+
+
 def _map_provider_status(provider_status: str) -> PaymentStatus:
     """Сопоставить статус провайдера с внутренним статусом платежа."""
     normalized = provider_status.lower()
@@ -65,41 +99,105 @@ async def create_payment_for_order(
     """Создать платеж для заказа и отправить его в провайдер.
 
     Доступно только для заказа в статусе `pending`.
-    Возвращает ошибку, если по заказу уже есть активный платёж.
+    Возвращает ошибку, если по заказу уже есть активный платёж; платёж,
+    не переданный провайдеру после сбоя (CREATED, аренда истекла),
+    передаётся повторно с тем же ключом идемпотентности.
+
+    Три шага, соединение БД не занято во время вызова провайдера:
+    1. короткая транзакция: проверка заказа и INSERT платежа (CREATED);
+    2. вызов провайдера - сессия без транзакции, соединение в пуле;
+    3. короткая транзакция: запись ответа (apply_provider_result).
+    Сбой между шагами оставляет платёж в CREATED - его дошлёт outbox
+    (app.services.payment_outbox).
+
+    Raises:
+        PaymentStateError: заказ не pending или платёж уже есть
+        PaymentProviderError: провайдер не ответил (платёж дошлёт outbox)
+        PaymentRejectedError: провайдер отклонил платёж (закрыт как FAILED)
     """
+    payment = await _reserve_payment(
+        session, order=order, provider=gateway.provider_name, currency=currency
+    )
+    return await send_payment_to_provider(session, payment, gateway)
+
+
+async def _reserve_payment(
+    session: AsyncSession, *, order: Order, provider: str, currency: str
+) -> Payment:
+    """Шаг 1: локальный платёж в CREATED (новый или повтор) и коммит."""
+    # строка заказа блокируется до коммита: параллельные запросы оплаты
+    # одного заказа идут по очереди и видят платёж друг друга
+    await session.refresh(
+        order, attribute_names=["status", "total_price"], with_for_update=True
+    )
     if order.status != OrderStatus.PENDING:
+        await session.rollback()
         raise PaymentStateError("Оплата доступна только для заказа в статусе pending")
 
+    lease = settings.PAYMENT_PROVIDER_LEASE_SECONDS
     existing = await get_active_payment_for_order(session, order.id)
-    if existing:
-        raise PaymentStateError("По этому заказу уже есть активный платёж")
-
-    try:
+    if existing is not None:
+        payment = None
+        if existing.status == PaymentStatus.CREATED:
+            payment = await claim_created_payment(
+                session, existing.id, lease_seconds=lease
+            )
+        if payment is None:
+            await session.rollback()
+            raise PaymentStateError("По этому заказу уже есть активный платёж")
+    else:
         payment = await create_payment(
             session,
             order_id=order.id,
             amount=order.total_price,
             currency=currency,
-            provider=gateway.provider_name,
+            provider=provider,
             idempotency_key=uuid4().hex,
+            lease_seconds=lease,
         )
+    try:
+        await session.commit()
     except IntegrityError:
         await session.rollback()
         raise PaymentStateError("По этому заказу уже есть активный платёж")
+    return payment
 
-    provider_result = await gateway.create_payment(
-        CreatePaymentRequest(
-            payment_id=payment.id,
-            order_id=order.id,
-            amount=order.total_price,
-            currency=currency,
-            idempotency_key=payment.idempotency_key,
-            description=f"Оплата заказа #{order.id}",
-        )
+
+async def send_payment_to_provider(
+    session: AsyncSession, payment: Payment, gateway: PaymentGateway
+) -> Payment:
+    """Шаги 2-3: создать платёж у провайдера и записать ответ.
+
+    Вызывается без открытой транзакции (платёж уже закоммичен и
+    арендован); повтор с тем же idempotency_key безопасен - провайдер
+    вернёт тот же платёж.
+    """
+    request = CreatePaymentRequest(
+        payment_id=payment.id,
+        order_id=payment.order_id,
+        amount=payment.amount,
+        currency=payment.currency,
+        idempotency_key=payment.idempotency_key,
+        description=f"Оплата заказа #{payment.order_id}",
     )
-    return await update_payment_after_create(
+    try:
+        provider_result = await gateway.create_payment(request)
+    except PaymentGatewayRejected as exc:
+        # 4xx: тот же запрос провайдер отклонит и при повторе
+        log.error("Платёж %s: провайдер отклонил платёж: %s", payment.id, exc)
+        await fail_created_payment(session, payment.id, reason=PROVIDER_REJECTED_REASON)
+        raise PaymentRejectedError("Платёжный провайдер отклонил платёж") from exc
+    except Exception as exc:
+        log.warning("Платёж %s: провайдер не создал платёж: %r", payment.id, exc)
+        await release_payment_lease(
+            session,
+            payment.id,
+            retry_after=settings.PAYMENT_OUTBOX_RETRY_DELAY_SECONDS,
+        )
+        raise PaymentProviderError("Платёжный провайдер недоступен") from exc
+    return await apply_provider_result(
         session,
-        payment,
+        payment.id,
         provider_payment_id=provider_result.provider_payment_id,
         checkout_url=provider_result.checkout_url,
         provider_payload=provider_result.raw,
@@ -109,17 +207,46 @@ async def create_payment_for_order(
 async def process_webhook_event(
     session: AsyncSession,
     *,
+    provider: str,
     event: WebhookEvent,
-) -> Payment:
-    """Обработать webhook-событие и синхронизировать статус платежа/заказа."""
+) -> Payment | None:
+    """Обработать webhook-событие и синхронизировать статус платежа/заказа.
+
+    Всё (отметка event_id, платёж, заказ) - в одной транзакции; платёж,
+    затем заказ блокируются (FOR UPDATE) - тот же порядок, что у истечения.
+    Возвращает None, если событие с таким event_id уже обработано.
+
+    Завершённый платёж (succeeded/failed/canceled) статус не меняет:
+    поздний "succeeded" для истёкшего или отменённого платежа, как и
+    успешная оплата уже не pending заказа, означает списанные деньги без
+    оплаченного заказа - платёж помечается к возврату (refund_required_at).
+    """
+    if not await record_processed_event(
+        session, provider=provider, event_id=event.event_id
+    ):
+        await session.rollback()
+        return None
+
     payment = await get_payment_by_provider_payment_id(
         session,
+        provider=provider,
         provider_payment_id=event.provider_payment_id,
+        for_update=True,
     )
     if not payment:
         raise PaymentNotFoundError("Платеж не найден")
 
     new_status = _map_provider_status(event.status)
+    if payment.status not in ACTIVE_PAYMENT_STATUSES:
+        if (
+            new_status == PaymentStatus.SUCCEEDED
+            and payment.status != PaymentStatus.SUCCEEDED
+        ):
+            await _require_refund(session, payment, event)
+        await session.commit()
+        await session.refresh(payment)
+        return payment
+
     fail_reason = (
         event.raw.get("fail_reason") if new_status == PaymentStatus.FAILED else None
     )
@@ -129,11 +256,31 @@ async def process_webhook_event(
         status=new_status,
         provider_payload=event.raw,
         fail_reason=fail_reason,
+        commit=False,
     )
 
     if new_status == PaymentStatus.SUCCEEDED:
-        order = await get_order_by_id(session, payment.order_id, load_items=False)
+        order = await get_order_by_id(session, payment.order_id, for_update=True)
         if order and order.status == OrderStatus.PENDING:
-            await update_order_status(session, order, new_status=OrderStatus.PAID)
+            await update_order_status(
+                session, order, new_status=OrderStatus.PAID, commit=False
+            )
+        else:
+            await _require_refund(session, payment, event)
 
+    await session.commit()
+    await session.refresh(payment)
     return payment
+
+
+async def _require_refund(
+    session: AsyncSession, payment: Payment, event: WebhookEvent
+) -> None:
+    log.error(
+        "Платёж %s (заказ %s, %s): провайдер сообщил об оплате, но заказ "
+        "не может быть оплачен - нужен возврат",
+        payment.id,
+        payment.order_id,
+        payment.status.value,
+    )
+    await flag_payment_for_refund(session, payment, provider_payload=event.raw)
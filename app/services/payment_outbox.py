@@ -0,0 +1,104 @@
+"""Досылка платежей, не переданных провайдеру (outbox).
+
+Платёж коммитится в CREATED до вызова провайдера. Если запрос упал
+между шагами (провайдер не ответил, процесс перезапустился, ответ не
+записался), платёж остаётся в CREATED, и после истечения аренды
+(PAYMENT_PROVIDER_LEASE_SECONDS) его подхватывает эта задача: повторяет
+вызов с тем же idempotency_key и записывает ответ. После
+PAYMENT_OUTBOX_MAX_ATTEMPTS попыток платёж закрывается как FAILED -
+покупатель может начать оплату заново. Отказ провайдера (4xx) закрывает
+платёж сразу, без повторов.
+
+Захват - FOR UPDATE SKIP LOCKED с арендой, как у webhook inbox:
+воркеры делят пачку, один платёж не передаётся параллельно.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from app.background import PeriodicJob
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.payment import Payment
+from app.payments import get_gateway
+from app.repositories.payment_repo import claim_outbox_batch, fail_created_payment
+from app.services.payment import (
+    PaymentProviderError,
+    PaymentRejectedError,
+    send_payment_to_provider,
+)
+
+log = logging.getLogger(__name__)
+
+UNKNOWN_PROVIDER_REASON = "unknown_provider"
+ATTEMPTS_EXHAUSTED_REASON = "provider_unavailable"
+
+
+async def drain_payment_outbox_batch() -> bool:
+    """Дослать одну пачку платежей. True - пачка полная, есть ещё работа."""
+    async with AsyncSessionLocal() as session:
+        payments = await claim_outbox_batch(
+            session,
+            limit=settings.PAYMENT_OUTBOX_BATCH_SIZE,
+            lease_seconds=settings.PAYMENT_PROVIDER_LEASE_SECONDS,
+        )
+    if not payments:
+        return False
+
+    # вызов провайдера соединение не держит; БД - только запись ответа
+    semaphore = asyncio.Semaphore(settings.PAYMENT_OUTBOX_CONCURRENCY)
+
+    async def run(payment: Payment) -> None:
+        async with semaphore:
+            await _send(payment)
+
+    await asyncio.gather(*(run(payment) for payment in payments))
+    return len(payments) == settings.PAYMENT_OUTBOX_BATCH_SIZE
+
+
+async def _send(payment: Payment) -> None:
+    """Передать один платёж; ошибка не должна ронять остальную пачку."""
+    async with AsyncSessionLocal() as session:
+        gateway = get_gateway(payment.provider)
+        if gateway is None:
+            log.error(
+                "Платёж %s: неизвестный провайдер %s", payment.id, payment.provider
+            )
+            await fail_created_payment(
+                session, payment.id, reason=UNKNOWN_PROVIDER_REASON
+            )
+            return
+        try:
+            await send_payment_to_provider(session, payment, gateway)
+        except PaymentRejectedError:
+            return  # уже закрыт как FAILED
+        except PaymentProviderError:
+            if payment.provider_attempts >= settings.PAYMENT_OUTBOX_MAX_ATTEMPTS:
+                log.error(
+                    "Платёж %s: провайдер недоступен, попыток - %s; закрыт",
+                    payment.id,
+                    payment.provider_attempts,
+                )
+                await fail_created_payment(
+                    session, payment.id, reason=ATTEMPTS_EXHAUSTED_REASON
+                )
+            return
+        except Exception:
+            await session.rollback()
+            log.exception("Платёж %s: ошибка досылки", payment.id)
+            return
+    log.info(
+        "Платёж %s дослан провайдеру (попытка %s)",
+        payment.id,
+        payment.provider_attempts,
+    )
+
+
+payment_outbox_job = PeriodicJob(
+    "payment-outbox",
+    drain_payment_outbox_batch,
+    interval=settings.PAYMENT_OUTBOX_POLL_INTERVAL,
+    jitter=settings.PAYMENT_OUTBOX_POLL_INTERVAL / 5,
+)
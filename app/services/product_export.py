@@ -0,0 +1,98 @@
+"""Потоковая выгрузка каталога в NDJSON / CSV.
+
+Строки читаются серверным курсором пачками по PRODUCT_EXPORT_BATCH_SIZE
+и сразу отдаются клиенту: в памяти только текущая пачка, сколько бы
+товаров ни было в каталоге.
+
+Инкрементальная выгрузка: клиент сохраняет водяной знак из ответа
+(заголовок X-Export-Watermark) и в следующий раз передаёт его как
+updated_after - придут товары, изменённые после него (в том числе
+деактивированные). Строки на границе могут прийти повторно, но не
+потеряются - повтор безопасен, ключ строки - id. Точного остатка в
+выгрузке нет, только in_stock: он, как и карточка, двигает updated_at,
+поэтому инкрементальная выгрузка его изменения не теряет (см. app.http_cache).
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+from collections.abc import AsyncIterator
+from datetime import datetime
+from enum import Enum
+
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import get_visibility_watermark
+from app.models.product import Product
+from app.repositories.product_repo import stream_products_for_export
+from app.schemas.product import ProductRead
+
+PRODUCT_BATCH = TypeAdapter(list[ProductRead])
+CSV_COLUMNS = tuple(ProductRead.model_fields)
+
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv; charset=utf-8",
+}
+
+
+def _ndjson_lines(products: list[Product]) -> bytes:
+    items = PRODUCT_BATCH.validate_python(products)
+    return b"".join(item.model_dump_json().encode() + b"\n" for item in items)
+
+
+def _csv_value(value: object) -> object:
+    # как в JSON: true/false, а не True/False; None - пустое поле
+    return str(value).lower() if isinstance(value, bool) else value
+
+
+def _csv_lines(products: list[Product]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    for item in PRODUCT_BATCH.dump_python(
+        PRODUCT_BATCH.validate_python(products), mode="json"
+    ):
+        writer.writerow(_csv_value(item[column]) for column in CSV_COLUMNS)
+    return buffer.getvalue().encode()
+
+
+async def export_products(
+    session: AsyncSession,
+    fmt: ExportFormat,
+    *,
+    updated_after: datetime | None = None,
+) -> tuple[datetime, AsyncIterator[bytes]]:
+    """Водяной знак для следующей выгрузки и поток байт выгрузки.
+
+    Водяной знак берётся до открытия курсора: всё, что изменится позже,
+    попадёт в следующую инкрементальную выгрузку.
+    """
+    watermark = await get_visibility_watermark(session)
+    serialize = _ndjson_lines if fmt is ExportFormat.NDJSON else _csv_lines
+
+    async def body() -> AsyncIterator[bytes]:
+        if fmt is ExportFormat.CSV:
+            yield (",".join(CSV_COLUMNS) + "\n").encode()
+        result = await stream_products_for_export(
+            session,
+            updated_after=updated_after,
+            batch_size=settings.PRODUCT_EXPORT_BATCH_SIZE,
+        )
+        try:
+            async for partition in result.partitions():
+                # identity map держит объекты по слабым ссылкам: после
+                # сериализации пачка освобождается
+                yield serialize(list(partition))
+        finally:
+            await result.close()
+
+    return watermark, body()
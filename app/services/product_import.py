@@ -0,0 +1,254 @@
+"""Потоковый импорт товаров из CSV / NDJSON.
+
+Тело запроса читается по частям и разбирается построчно: в памяти - только
+текущая пачка (PRODUCT_IMPORT_CHUNK_SIZE строк) и не больше
+PRODUCT_IMPORT_MAX_ERRORS описаний ошибок. Каждая пачка проверяется схемой
+ProductCreate, загружается через COPY во временную таблицу и upsert'ится
+по name в отдельной транзакции: уже загруженные пачки не откатываются,
+если дальше в файле что-то сломалось.
+
+CSV - с заголовком (name, price, category_id обязательны; description,
+stock - нет), UTF-8, разделитель - запятая. NDJSON - по JSON-объекту
+на строку. Пустые строки пропускаются. Если stock в строке не задан
+(нет колонки, пустое поле, нет ключа), остаток существующего товара
+не меняется; заданный stock - абсолютное значение остатка.
+"""
+
+from __future__ import annotations
+
+import codecs
+import csv
+import json
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any
+
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.product import Product
+from app.repositories.product_repo import ProductImportRow, upsert_products_bulk
+from app.schemas.product import ProductCreate
+
+CSV_REQUIRED_COLUMNS = frozenset({"name", "price", "category_id"})
+CSV_COLUMNS = CSV_REQUIRED_COLUMNS | {"description", "stock"}
+MAX_LINE_BYTES = 64 * 1024  # защита памяти от "файла в одну строку"
+NOT_UTF8 = "строка не в кодировке UTF-8"
+# ProductCreate допускает description до 500 символов, колонка - 255
+DESCRIPTION_MAX_LENGTH = Product.__table__.c.description.type.length
+
+
+class ImportFormat(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+
+class ImportFileError(Exception):
+    """Файл нельзя разобрать дальше (заголовок CSV, слишком длинная строка).
+
+    Импорт останавливается; уже прочитанные строки загружаются.
+    """
+
+    def __init__(self, line: int, message: str) -> None:
+        super().__init__(f"строка {line}: {message}")
+        self.line = line
+        self.message = message
+
+
+@dataclass(frozen=True, slots=True)
+class RowError:
+    line: int
+    errors: list[str]
+
+
+@dataclass
+class ImportReport:
+    """Итог импорта; errors - первые PRODUCT_IMPORT_MAX_ERRORS ошибок."""
+
+    total: int = 0
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    failed: int = 0
+    errors: list[RowError] = field(default_factory=list)
+    errors_truncated: bool = False
+    aborted: bool = False  # файл дочитан не до конца (см. ImportFileError)
+
+    def add_error(self, line: int, errors: list[str]) -> None:
+        self.failed += 1
+        if len(self.errors) < settings.PRODUCT_IMPORT_MAX_ERRORS:
+            self.errors.append(RowError(line=line, errors=errors))
+        else:
+            self.errors_truncated = True
+
+
+async def _iter_lines(
+    chunks: AsyncIterator[bytes],
+) -> AsyncIterator[tuple[int, str | None]]:
+    """(номер строки, строка без перевода строки) из потока байт.
+
+    Байт 0x0A не встречается внутри многобайтных символов UTF-8, поэтому
+    поток режется на строки до декодирования; строка не в UTF-8 - None
+    (ошибка только этой строки, а не всего файла).
+    """
+    tail = b""
+    line_no = 0
+    async for chunk in chunks:
+        lines = (tail + chunk).split(b"\n")
+        tail = lines.pop()
+        if len(tail) > MAX_LINE_BYTES:
+            raise ImportFileError(line_no + 1, f"строка длиннее {MAX_LINE_BYTES} байт")
+        for line in lines:
+            line_no += 1
+            yield line_no, _decode_line(line, first=line_no == 1)
+    if tail:
+        yield line_no + 1, _decode_line(tail, first=line_no == 0)
+
+
+def _decode_line(line: bytes, *, first: bool) -> str | None:
+    if first:
+        line = line.removeprefix(codecs.BOM_UTF8)
+    try:
+        return line.removesuffix(b"\r").decode()
+    except UnicodeDecodeError:
+        return None
+
+
+async def _iter_csv_records(
+    chunks: AsyncIterator[bytes],
+) -> AsyncIterator[tuple[int, dict[str, Any] | str]]:
+    """Записи CSV как словари по заголовку (или текст ошибки разбора).
+
+    Запись может занимать несколько строк (перевод строки внутри кавычек):
+    она закончена, когда число кавычек в ней чётное - удвоенная кавычка
+    внутри поля чётность не меняет.
+    """
+    header: list[str] | None = None
+    record: list[str] = []
+    start = 0
+    async for line_no, line in _iter_lines(chunks):
+        if line is None:
+            if header is None:
+                raise ImportFileError(line_no, NOT_UTF8)
+            # запись с этой строкой (если начата) целиком отбрасывается
+            yield (start if record else line_no), NOT_UTF8
+            record = []
+            continue
+        if not record:
+            if not line.strip():
+                continue
+            start = line_no
+        record.append(line)
+        if sum(part.count('"') for part in record) % 2:
+            if sum(len(part) for part in record) > MAX_LINE_BYTES:
+                raise ImportFileError(start, f"запись длиннее {MAX_LINE_BYTES} байт")
+            continue
+        text, record = "\n".join(record), []
+        try:
+            values = next(csv.reader([text], strict=True))
+        except csv.Error as exc:
+            if header is None:
+                raise ImportFileError(start, f"некорректный заголовок CSV: {exc}")
+            yield start, f"некорректная строка CSV: {exc}"
+            continue
+
+        if header is None:
+            header = [value.strip() for value in values]
+            missing = CSV_REQUIRED_COLUMNS.difference(header)
+            if missing:
+                raise ImportFileError(
+                    start, f"в заголовке нет колонок: {', '.join(sorted(missing))}"
+                )
+            continue
+        if len(values) != len(header):
+            yield start, f"ожидалось {len(header)} полей, получено {len(values)}"
+            continue
+        # пустое поле CSV - "не задано": для description это NULL,
+        # для stock - остаток не меняется (новый товар - 0)
+        data = {
+            column: value
+            for column, value in zip(header, values)
+            if column in CSV_COLUMNS and value != ""
+        }
+        yield start, data
+    if record:
+        yield start, "незакрытая кавычка в конце файла"
+
+
+async def _iter_ndjson_records(
+    chunks: AsyncIterator[bytes],
+) -> AsyncIterator[tuple[int, dict[str, Any] | str]]:
+    async for line_no, line in _iter_lines(chunks):
+        if line is None:
+            yield line_no, NOT_UTF8
+            continue
+        if not line.strip():
+            continue
+        try:
+            value = json.loads(line)
+        except json.JSONDecodeError as exc:
+            yield line_no, f"некорректный JSON: {exc.msg}"
+            continue
+        if not isinstance(value, dict):
+            yield line_no, "ожидался JSON-объект"
+            continue
+        yield line_no, value
+
+
+def _validate(line: int, data: dict[str, Any]) -> ProductImportRow | list[str]:
+    """Строка импорта или список ошибок в формате "поле: сообщение"."""
+    try:
+        product = ProductCreate.model_validate(data)
+    except ValidationError as exc:
+        return [
+            f"{'.'.join(str(part) for part in error['loc']) or 'row'}: {error['msg']}"
+            for error in exc.errors(include_url=False)
+        ]
+    if product.description and len(product.description) > DESCRIPTION_MAX_LENGTH:
+        return [f"description: не длиннее {DESCRIPTION_MAX_LENGTH} символов"]
+    fields = product.model_dump()
+    if "stock" not in product.model_fields_set:
+        fields["stock"] = None  # не задан - остаток не трогаем
+    return ProductImportRow(line=line, **fields)
+
+
+async def import_products(
+    session: AsyncSession, chunks: AsyncIterator[bytes], fmt: ImportFormat
+) -> ImportReport:
+    """Импортировать товары из потока байт."""
+    records = (
+        _iter_csv_records(chunks)
+        if fmt is ImportFormat.CSV
+        else _iter_ndjson_records(chunks)
+    )
+    report = ImportReport()
+    batch: list[ProductImportRow] = []
+
+    async def flush() -> None:
+        result = await upsert_products_bulk(session, batch)
+        await session.commit()
+        report.inserted += result.inserted
+        report.updated += result.updated
+        report.unchanged += result.unchanged
+        for line, category_id in result.missing_category_lines:
+            report.add_error(line, [f"category_id: категория {category_id} не найдена"])
+        batch.clear()
+
+    try:
+        async for line, record in records:
+            report.total += 1
+            row = _validate(line, record) if isinstance(record, dict) else [record]
+            if isinstance(row, list):
+                report.add_error(line, row)
+                continue
+            batch.append(row)
+            if len(batch) >= settings.PRODUCT_IMPORT_CHUNK_SIZE:
+                await flush()
+    except ImportFileError as exc:
+        report.aborted = True
+        report.add_error(exc.line, [exc.message])
+    if batch:
+        await flush()
+    return report
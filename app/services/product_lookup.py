@@ -0,0 +1,35 @@
+"""Точечные чтения товаров по id со склейкой в пакеты (см. app.batching).
+
+Витрина запрашивает товары корзины параллельно, по одному GET /products/{id}
+на позицию. Одновременные запросы в этом воркере уходят в БД одним
+`WHERE id IN (...)` на пакет; валидаторы условного GET считаются по
+загруженному товару, отдельного запроса версии нет. Пакет выполняется
+в собственной сессии, поэтому товары отсоединены от сессии запроса и
+только для чтения: для изменений есть ProductDep.
+"""
+
+from __future__ import annotations
+
+from app.batching import BatchLoader
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.product import Product
+from app.repositories.product_repo import get_products_with_relation
+
+
+async def _fetch_products(ids: list[int]) -> dict[int, Product]:
+    async with AsyncSessionLocal() as session:
+        return await get_products_with_relation(session, ids)
+
+
+product_loader: BatchLoader[int, Product] = BatchLoader(
+    "products",
+    _fetch_products,
+    max_batch_size=settings.PRODUCT_LOADER_MAX_BATCH_SIZE,
+    max_concurrency=settings.PRODUCT_LOADER_CONCURRENCY,
+)
+
+
+def get_product_loader_stats() -> list[dict]:
+    """Счётчики загрузчиков товаров этого процесса."""
+    return [product_loader.stats()]
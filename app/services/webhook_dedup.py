@@ -0,0 +1,65 @@
+"""Быстрая проверка повторных webhook по event_id.
+
+Источник истины - таблица `processed_webhook_events` (см. webhook_inbox_repo).
+Перед ней два уровня кеша уже обработанных событий:
+- in-process LRU (на воркер);
+- опционально Redis (общий для всех воркеров, включается через REDIS_URL).
+Дубль, найденный в кеше, отвечается сразу: без очереди и без запросов
+к `payments`/`orders`. Промах кеша не страшен - дубль отсеет БД.
+"""
+
+from __future__ import annotations
+
+import logging
+
+from redis.exceptions import RedisError
+
+from app.cache import TTLCache
+from app.config import settings
+from app.redis_client import get_redis
+
+log = logging.getLogger(__name__)
+
+REDIS_KEY_PREFIX = "webhook:processed:"
+
+_local: TTLCache[tuple[str, str], bool] = TTLCache(
+    maxsize=settings.WEBHOOK_DEDUP_CACHE_SIZE,
+    ttl=settings.WEBHOOK_DEDUP_TTL_SECONDS,
+)
+
+
+def _redis_key(provider: str, event_id: str) -> str:
+    return f"{REDIS_KEY_PREFIX}{provider}:{event_id}"
+
+
+async def is_processed(provider: str, event_id: str) -> bool:
+    """Событие точно уже обработано (по данным кеша)."""
+    if _local.get((provider, event_id)):
+        return True
+    redis = get_redis()
+    if redis is None:
+        return False
+    try:
+        found = await redis.exists(_redis_key(provider, event_id))
+    except RedisError as exc:
+        log.warning("Webhook dedup: Redis недоступен (%s)", exc)
+        return False
+    if found:
+        _local.set((provider, event_id), True)
+    return bool(found)
+
+
+async def remember_processed(provider: str, event_id: str) -> None:
+    """Запомнить событие после коммита его обработки."""
+    _local.set((provider, event_id), True)
+    redis = get_redis()
+    if redis is None:
+        return
+    try:
+        await redis.set(
+            _redis_key(provider, event_id),
+            1,
+            ex=int(settings.WEBHOOK_DEDUP_TTL_SECONDS),
+        )
+    except RedisError as exc:
+        log.warning("Webhook dedup: Redis недоступен (%s)", exc)
@@ -0,0 +1,149 @@
+"""Фоновая обработка входящих webhook (inbox).
+
+Правила:
+- события одного платежа обрабатываются последовательно, в порядке поступления;
+- разные платежи - параллельно, но не больше WEBHOOK_INBOX_CONCURRENCY
+  (каждая обработка держит соединение из пула);
+- повтор уже обработанного event_id пропускается (processed_webhook_events);
+- доменные ошибки (неизвестный статус и т.п.) не повторяются, остальные -
+  повторяются с паузой до WEBHOOK_INBOX_MAX_ATTEMPTS попыток; "платёж не
+  найден" тоже повторяется: webhook может прийти раньше, чем записан
+  ответ провайдера о создании платежа (provider_payment_id).
+
+Завершённые события и записи processed_webhook_events старше
+WEBHOOK_RETENTION_SECONDS (но не моложе окна кеша дублей) удаляет
+webhook_retention_job: иначе обе таблицы растут без ограничений.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import defaultdict
+from collections.abc import Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.background import PeriodicJob
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.webhook_inbox import WebhookInbox
+from app.payments.gateway import WebhookEvent
+from app.repositories.webhook_inbox_repo import (
+    claim_inbox_batch,
+    mark_inbox_failed,
+    mark_inbox_processed,
+    prune_webhook_history,
+)
+from app.services.payment import (
+    PaymentError,
+    PaymentNotFoundError,
+    process_webhook_event,
+)
+from app.services.webhook_dedup import remember_processed
+
+log = logging.getLogger(__name__)
+
+
+async def drain_inbox_batch() -> bool:
+    """Обработать одну пачку событий. True - пачка полная, есть ещё работа."""
+    async with AsyncSessionLocal() as session:
+        rows = await claim_inbox_batch(
+            session,
+            limit=settings.WEBHOOK_INBOX_BATCH_SIZE,
+            lease_seconds=settings.WEBHOOK_INBOX_LEASE_SECONDS,
+        )
+    if not rows:
+        return False
+
+    by_payment: dict[str, list[WebhookInbox]] = defaultdict(list)
+    for row in rows:
+        by_payment[row.provider_payment_id].append(row)
+
+    semaphore = asyncio.Semaphore(settings.WEBHOOK_INBOX_CONCURRENCY)
+
+    async def run_group(group: Sequence[WebhookInbox]) -> None:
+        async with semaphore:
+            for row in group:
+                await _process_row(row)
+
+    await asyncio.gather(*(run_group(group) for group in by_payment.values()))
+    return len(rows) == settings.WEBHOOK_INBOX_BATCH_SIZE
+
+
+async def _process_row(row: WebhookInbox) -> None:
+    """Применить одно событие; ошибка не должна ронять остальную пачку."""
+    event = WebhookEvent(
+        event_id=row.event_id,
+        provider_payment_id=row.provider_payment_id,
+        status=row.event_status,
+        raw=row.payload,
+    )
+    async with AsyncSessionLocal() as session:
+        try:
+            payment = await process_webhook_event(
+                session, provider=row.provider, event=event
+            )
+        except PaymentNotFoundError as exc:
+            await session.rollback()
+            log.info("Webhook %s: %s, повтор позже", row.event_id, exc)
+            await _retry_or_fail(session, row, str(exc))
+            return
+        except PaymentError as exc:
+            await session.rollback()
+            log.warning("Webhook %s отклонён: %s", row.event_id, exc)
+            await mark_inbox_failed(session, row.id, error=str(exc), retry_after=None)
+            return
+        except Exception as exc:
+            await session.rollback()
+            log.exception("Webhook %s: ошибка обработки", row.event_id)
+            await _retry_or_fail(session, row, f"{exc.__class__.__name__}: {exc}")
+            return
+        if payment is None:
+            log.info("Webhook %s: дубль, пропущен", row.event_id)
+        await mark_inbox_processed(session, row.id)
+    await remember_processed(row.provider, row.event_id)
+
+
+async def _retry_or_fail(session: AsyncSession, row: WebhookInbox, error: str) -> None:
+    """Повторить событие с паузой или закрыть, если попытки кончились."""
+    retry = row.attempts < settings.WEBHOOK_INBOX_MAX_ATTEMPTS
+    await mark_inbox_failed(
+        session,
+        row.id,
+        error=error,
+        retry_after=(
+            settings.WEBHOOK_INBOX_RETRY_DELAY_SECONDS * row.attempts if retry else None
+        ),
+    )
+
+
+inbox_job = PeriodicJob(
+    "webhook-inbox",
+    drain_inbox_batch,
+    interval=settings.WEBHOOK_INBOX_POLL_INTERVAL,
+)
+"""Фоновый разбор очереди; `inbox_job.wake()` - разобрать сразу."""
+
+
+async def prune_webhook_history_batch() -> bool:
+    """Удалить пачку старых событий. True - пачка полная, есть ещё работа."""
+    async with AsyncSessionLocal() as session:
+        deleted = await prune_webhook_history(
+            session,
+            older_than_seconds=max(
+                settings.WEBHOOK_RETENTION_SECONDS, settings.WEBHOOK_DEDUP_TTL_SECONDS
+            ),
+            limit=settings.WEBHOOK_RETENTION_BATCH_SIZE,
+        )
+    if deleted:
+        log.info("Webhook: удалено старых записей - до %s", deleted)
+    return deleted == settings.WEBHOOK_RETENTION_BATCH_SIZE
+
+
+webhook_retention_job = PeriodicJob(
+    "webhook-retention",
+    prune_webhook_history_batch,
+    interval=settings.WEBHOOK_RETENTION_INTERVAL_SECONDS,
+    jitter=settings.WEBHOOK_RETENTION_INTERVAL_SECONDS / 10,
+)
@@ -0,0 +1,271 @@
+"""Нагрузочный прогон HttpPaymentGateway против заглушки провайдера.
+
+Поднимает benchmarks.payment_stub отдельным процессом (настоящий TCP,
+своё ядро CPU) и гоняет create_payment сценариями:
+    pooled   - общий шлюз, пул keep-alive соединений;
+    per-call - новый шлюз (и соединение) на каждый вызов, для сравнения;
+    flaky    - провайдер отвечает 503 с долей --failure-rate, видны повторы
+               (при большой доле ошибки идут подряд и breaker размыкается);
+    outage   - провайдер лежит: breaker размыкается и вызовы отклоняются
+               сразу, после восстановления - half-open и снова closed.
+
+Запуск:
+    uv run python -m benchmarks.payment_gateway --requests 2000 --concurrency 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass
+from decimal import Decimal
+from typing import Any
+
+import httpx
+
+from app.circuit_breaker import CircuitBreaker
+from app.payments import CreatePaymentRequest, PaymentGatewayError
+from app.payments.http_gateway import HttpPaymentGateway
+from benchmarks.run import percentile
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    requests: int
+    errors: int
+    rps: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    gateway: dict[str, Any] | None
+
+
+def make_gateway(base_url: str, args: argparse.Namespace) -> HttpPaymentGateway:
+    return HttpPaymentGateway(
+        provider_name="stub",
+        base_url=base_url,
+        api_key="",
+        webhook_secret="",
+        connect_timeout=1.0,
+        read_timeout=args.read_timeout,
+        total_timeout=args.total_timeout,
+        max_retries=args.max_retries,
+        retry_backoff=0.05,
+        max_connections=args.concurrency,
+        max_keepalive_connections=args.concurrency,
+        breaker=CircuitBreaker(
+            "payment-stub",
+            failure_threshold=args.breaker_failures,
+            reset_timeout=args.breaker_reset,
+        ),
+    )
+
+
+def payment_request() -> CreatePaymentRequest:
+    return CreatePaymentRequest(
+        payment_id=1,
+        order_id=1,
+        amount=Decimal("100.00"),
+        currency="RUB",
+        idempotency_key=uuid.uuid4().hex,
+    )
+
+
+async def run_scenario(
+    name: str,
+    call: Callable[[], Awaitable[Any]],
+    *,
+    requests: int,
+    concurrency: int,
+    gateway: HttpPaymentGateway | None,
+) -> ScenarioResult:
+    latencies: list[float] = []
+    errors = 0
+    remaining = requests
+
+    async def worker() -> None:
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            try:
+                await call()
+            except PaymentGatewayError:
+                errors += 1
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    ms = sorted(latencies)
+    return ScenarioResult(
+        name=name,
+        requests=requests,
+        errors=errors,
+        rps=round(requests / elapsed, 1),
+        p50_ms=round(percentile(ms, 50), 2),
+        p95_ms=round(percentile(ms, 95), 2),
+        p99_ms=round(percentile(ms, 99), 2),
+        gateway=gateway.stats() if gateway is not None else None,
+    )
+
+
+async def set_stub(control: httpx.AsyncClient, **changes: float) -> None:
+    response = await control.post("/_control", json=changes)
+    response.raise_for_status()
+
+
+async def outage_scenario(
+    base_url: str, control: httpx.AsyncClient, args: argparse.Namespace
+) -> dict[str, Any]:
+    """Провайдер лежит, потом поднимается: как ведёт себя breaker."""
+    gateway = make_gateway(base_url, args)
+    await set_stub(control, failure_rate=1.0)
+    states: list[str] = []
+    try:
+        for _ in range(args.breaker_failures * 4):
+            try:
+                await gateway.create_payment(payment_request())
+            except PaymentGatewayError:
+                pass
+            states.append(gateway.breaker.state.value)
+        await set_stub(control, failure_rate=0.0)
+        await asyncio.sleep(args.breaker_reset)
+        states.append(gateway.breaker.state.value)
+        await gateway.create_payment(payment_request())
+        states.append(gateway.breaker.state.value)
+        return {"states": states, "gateway": gateway.stats()}
+    finally:
+        await gateway.aclose()
+
+
+async def main_async(args: argparse.Namespace) -> dict[str, Any]:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    base_url = f"http://127.0.0.1:{port}"
+    stub = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.payment_stub",
+            "--port",
+            str(port),
+            "--latency-ms",
+            str(args.latency_ms),
+            "--no-access-log",
+        ]
+    )
+    control = httpx.AsyncClient(base_url=base_url)
+    for _ in range(100):
+        try:
+            await control.get("/_stats")
+            break
+        except httpx.TransportError:
+            await asyncio.sleep(0.1)
+    else:
+        stub.terminate()
+        raise RuntimeError("Заглушка провайдера не запустилась")
+
+    results: list[ScenarioResult] = []
+    try:
+        gateway = make_gateway(base_url, args)
+        try:
+            results.append(
+                await run_scenario(
+                    "pooled",
+                    lambda: gateway.create_payment(payment_request()),
+                    requests=args.requests,
+                    concurrency=args.concurrency,
+                    gateway=gateway,
+                )
+            )
+        finally:
+            await gateway.aclose()
+
+        async def per_call() -> None:
+            fresh = make_gateway(base_url, args)
+            try:
+                await fresh.create_payment(payment_request())
+            finally:
+                await fresh.aclose()
+
+        results.append(
+            await run_scenario(
+                "per-call",
+                per_call,
+                requests=args.requests,
+                concurrency=args.concurrency,
+                gateway=None,
+            )
+        )
+
+        await set_stub(control, failure_rate=args.failure_rate)
+        gateway = make_gateway(base_url, args)
+        try:
+            results.append(
+                await run_scenario(
+                    "flaky",
+                    lambda: gateway.create_payment(payment_request()),
+                    requests=args.requests,
+                    concurrency=args.concurrency,
+                    gateway=gateway,
+                )
+            )
+        finally:
+            await gateway.aclose()
+        await set_stub(control, failure_rate=0.0)
+
+        outage = await outage_scenario(base_url, control, args)
+        stub_stats = (await control.get("/_stats")).json()
+    finally:
+        await control.aclose()
+        stub.terminate()
+        stub.wait()
+
+    return {
+        "scenarios": [asdict(result) for result in results],
+        "outage": outage,
+        "stub": stub_stats,
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Нагрузка на HTTP-шлюз провайдера")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--failure-rate", type=float, default=0.1)
+    parser.add_argument("--read-timeout", type=float, default=2.0)
+    parser.add_argument("--total-timeout", type=float, default=5.0)
+    parser.add_argument("--max-retries", type=int, default=3)
+    parser.add_argument("--breaker-failures", type=int, default=5)
+    parser.add_argument("--breaker-reset", type=float, default=1.0)
+    parser.add_argument("--output", default=None, help="Сохранить результат в JSON")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(main_async(args))
+    for result in report["scenarios"]:
+        print(
+            f"{result['name']:<9} rps {result['rps']:>8.1f}  "
+            f"p50 {result['p50_ms']:>7.2f} ms  p95 {result['p95_ms']:>7.2f} ms  "
+            f"p99 {result['p99_ms']:>7.2f} ms  errors {result['errors']}  "
+            f"retries {(result['gateway'] or {}).get('retries', '-')}"
+        )
+    print("outage:", " -> ".join(report["outage"]["states"]))
+    print("stub:", report["stub"])
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(report, fh, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""Локальная заглушка платёжного провайдера для HttpPaymentGateway.
+
+Реализует API из app.payments.http_gateway: POST /v1/payments с
+Idempotency-Key (повтор с тем же ключом возвращает тот же платёж) и,
+если задан --webhook-url, через --webhook-delay шлёт подписанный webhook
+`succeeded`. Задержку и долю ошибок (503) можно менять на ходу:
+POST /_control {"latency_ms": 300, "failure_rate": 0.2}; счётчики -
+GET /_stats.
+
+Запуск (приложение - с PAYMENT_GATEWAY=http):
+    uv run python -m benchmarks.payment_stub --port 8100 --latency-ms 300 \\
+        --webhook-url http://127.0.0.1:8000/api/v1/payments/webhook/http
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import random
+from dataclasses import asdict, dataclass, field
+from typing import Any
+from uuid import uuid4
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.responses import JSONResponse
+
+
+@dataclass
+class StubConfig:
+    latency_ms: float = 0.0
+    failure_rate: float = 0.0  # доля ответов 503
+    api_key: str = ""  # пусто - не проверять
+    webhook_url: str | None = None
+    webhook_secret: str = ""
+    webhook_delay: float = 1.0
+
+
+@dataclass
+class StubStats:
+    requests: int = 0
+    created: int = 0
+    replays: int = 0  # повтор с известным Idempotency-Key
+    failures: int = 0
+    webhooks_sent: int = 0
+    payments: dict[str, dict[str, Any]] = field(default_factory=dict, repr=False)
+
+
+def create_stub_app(config: StubConfig) -> FastAPI:
+    """ASGI-приложение заглушки (для uvicorn или in-process прогонов)."""
+    app = FastAPI(title="Payment provider stub")
+    stats = StubStats()
+    background: set[asyncio.Task[None]] = set()
+
+    @app.post("/v1/payments", status_code=201)
+    async def create_payment(
+        request: Request,
+        idempotency_key: str = Header(...),
+        authorization: str | None = Header(None),
+    ):
+        stats.requests += 1
+        if config.api_key and authorization != f"Bearer {config.api_key}":
+            raise HTTPException(status_code=401, detail="bad api key")
+        if config.latency_ms:
+            await asyncio.sleep(config.latency_ms / 1000)
+        if random.random() < config.failure_rate:
+            stats.failures += 1
+            return JSONResponse({"error": "unavailable"}, status_code=503)
+        known = stats.payments.get(idempotency_key)
+        if known is not None:
+            stats.replays += 1
+            return JSONResponse(known, status_code=200)
+        body = await request.json()
+        provider_payment_id = f"stub_{uuid4().hex}"
+        payment = {
+            "id": provider_payment_id,
+            "status": "pending",
+            "checkout_url": f"http://stub.local/checkout/{provider_payment_id}",
+            "amount": body.get("amount"),
+            "currency": body.get("currency"),
+        }
+        stats.payments[idempotency_key] = payment
+        stats.created += 1
+        if config.webhook_url:
+            task = asyncio.create_task(_send_webhook(provider_payment_id))
+            background.add(task)
+            task.add_done_callback(background.discard)
+        return payment
+
+    async def _send_webhook(provider_payment_id: str) -> None:
+        await asyncio.sleep(config.webhook_delay)
+        body = json.dumps(
+            {
+                "event_id": f"evt_{uuid4().hex}",
+                "provider_payment_id": provider_payment_id,
+                "status": "succeeded",
+            }
+        ).encode()
+        signature = hmac.new(
+            config.webhook_secret.encode(), body, hashlib.sha256
+        ).hexdigest()
+        async with httpx.AsyncClient(timeout=5) as client:
+            await client.post(
+                config.webhook_url,
+                content=body,
+                headers={"Content-Type": "application/json", "X-Signature": signature},
+            )
+        stats.webhooks_sent += 1
+
+    @app.post("/_control")
+    async def control(changes: dict[str, float]):
+        for name in ("latency_ms", "failure_rate"):
+            if name in changes:
+                setattr(config, name, float(changes[name]))
+        return {"latency_ms": config.latency_ms, "failure_rate": config.failure_rate}
+
+    @app.get("/_stats")
+    async def get_stats():
+        data = asdict(stats)
+        data.pop("payments")
+        return data
+
+    return app
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Заглушка платёжного провайдера")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--api-key", default="")
+    parser.add_argument("--webhook-url", default=None)
+    parser.add_argument("--webhook-secret", default="")
+    parser.add_argument("--webhook-delay", type=float, default=1.0)
+    parser.add_argument("--no-access-log", action="store_true")
+    args = parser.parse_args(argv)
+    config = StubConfig(
+        latency_ms=args.latency_ms,
+        failure_rate=args.failure_rate,
+        api_key=args.api_key,
+        webhook_url=args.webhook_url,
+        webhook_secret=args.webhook_secret,
+        webhook_delay=args.webhook_delay,
+    )
+    uvicorn.run(
+        create_stub_app(config),
+        host=args.host,
+        port=args.port,
+        access_log=not args.no_access_log,
+    )
+
+
+if __name__ == "__main__":
+    main()
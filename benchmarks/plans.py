@@ -0,0 +1,148 @@
+"""Проверка планов запросов каталога на засеянной БД.
+
+Для каждой поддерживаемой комбинации фильтров и сортировки строит тот же
+SELECT, что и GET /products/ (product_list_query), выполняет
+EXPLAIN (FORMAT JSON) и проверяет, что в плане нет Seq Scan и Sort:
+строки должны приходить из индекса уже в нужном порядке.
+
+Фасеты - реалистичные (диапазон цен - заметная доля каталога). Для очень
+узкого диапазона цен при сортировке по id планировщик законно выбирает
+bitmap-скан по цене и сортировку нескольких строк - это дешевле.
+
+Запуск (нужны данные, иначе планировщику выгоден Seq Scan):
+    uv run python -m benchmarks.plans --seed --products 100000
+Код выхода 1, если хоть один план не прошёл проверку.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+from collections.abc import Iterator
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Any
+
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+
+from app.database import AsyncSessionLocal, engine
+from app.repositories.product_repo import ProductSort, product_list_query
+from benchmarks.seed import SeedConfig, reset_database, seed
+
+FORBIDDEN_NODES = {"Seq Scan", "Sort", "Incremental Sort"}
+
+CATEGORY_FILTERS: dict[str, tuple[int, ...]] = {
+    "all": (),
+    "one": (3,),
+    "many": (2, 5, 7),
+}
+PRICE_FILTERS: dict[str, dict[str, Decimal]] = {
+    "any": {},
+    "range": {"price_min": Decimal("100"), "price_max": Decimal("600")},
+    "min": {"price_min": Decimal("250")},
+}
+CREATED_FILTERS: dict[str, dict[str, datetime]] = {
+    "any": {},
+    "after": {"created_after": datetime.now(timezone.utc) - timedelta(days=180)},
+}
+# ключ keyset-курсора "где-то в середине" для проверки второй страницы
+SAMPLE_AFTER: dict[ProductSort, tuple[Any, ...]] = {
+    ProductSort.ID: (5000,),
+    ProductSort.PRICE_ASC: (Decimal("300.00"), 5000),
+    ProductSort.PRICE_DESC: (Decimal("700.00"), 5000),
+    ProductSort.NEWEST: (datetime.now(timezone.utc) - timedelta(days=30), 5000),
+}
+
+
+def combinations() -> Iterator[tuple[str, dict[str, Any]]]:
+    """Все проверяемые комбинации: (подпись, аргументы product_list_query)."""
+    grid = itertools.product(
+        CATEGORY_FILTERS, PRICE_FILTERS, CREATED_FILTERS, ProductSort, ("first", "next")
+    )
+    for cat_name, price_name, created_name, sort, page in grid:
+        kwargs: dict[str, Any] = {
+            "category_ids": CATEGORY_FILTERS[cat_name],
+            "sort": sort,
+            "limit": 50,
+            "offset": None if page == "next" else 0,
+            "after": SAMPLE_AFTER[sort] if page == "next" else None,
+            **PRICE_FILTERS[price_name],
+            **CREATED_FILTERS[created_name],
+        }
+        label = (
+            f"categories={cat_name} price={price_name} created={created_name} "
+            f"sort={sort.value} page={page}"
+        )
+        yield label, kwargs
+
+
+def plan_nodes(node: dict[str, Any]) -> Iterator[str]:
+    yield node["Node Type"]
+    for child in node.get("Plans", ()):
+        yield from plan_nodes(child)
+
+
+async def check_plans(verbose: bool) -> int:
+    failures = 0
+    async with AsyncSessionLocal() as session:
+        for label, kwargs in combinations():
+            sql = (
+                product_list_query(**kwargs)
+                .compile(
+                    dialect=postgresql.dialect(),
+                    compile_kwargs={"literal_binds": True},
+                )
+                .string
+            )
+            raw = (
+                await session.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))
+            ).scalar_one()
+            plan = (json.loads(raw) if isinstance(raw, str) else raw)[0]["Plan"]
+            nodes = list(plan_nodes(plan))
+            bad = sorted(FORBIDDEN_NODES.intersection(nodes))
+            if bad:
+                failures += 1
+                print(f"FAIL {label}: {', '.join(bad)}")
+                print(json.dumps(plan, indent=2))
+            elif verbose:
+                print(f"ok   {label}: {' > '.join(nodes)}")
+    return failures
+
+
+async def main(args: argparse.Namespace) -> int:
+    if args.seed:
+        async with AsyncSessionLocal() as session:
+            await reset_database(session)
+            await seed(
+                session,
+                SeedConfig(
+                    categories=args.categories,
+                    products=args.products,
+                    users=1,
+                    orders_per_user=0,
+                ),
+            )
+    failures = await check_plans(args.verbose)
+    await engine.dispose()
+    total = sum(1 for _ in combinations())
+    print(f"{total - failures}/{total} планов без Seq Scan и Sort")
+    return 1 if failures else 0
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    defaults = SeedConfig()
+    parser = argparse.ArgumentParser(description="Проверка планов каталога")
+    parser.add_argument(
+        "--seed", action="store_true", help="очистить БД и залить данные"
+    )
+    parser.add_argument("--categories", type=int, default=defaults.categories)
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("-v", "--verbose", action="store_true")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    raise SystemExit(asyncio.run(main(parse_args())))
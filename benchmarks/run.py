@@ -0,0 +1,335 @@
+"""Бенчмарк HTTP-эндпоинтов через in-process ASGI-клиент.
+
+Гоняет настоящее приложение `app.main:app` (с lifespan и фоновыми задачами)
+через httpx.ASGITransport - без сети, но со всей цепочкой FastAPI,
+зависимостями и реальной БД из DATABASE_URL.
+
+Запуск (БД должна быть отдельной, --seed очищает все таблицы):
+    uv run python -m benchmarks.run --seed --products 100000 --output bench.json
+
+Результат - JSON со списком эндпоинтов: rps и p50/p95/p99 в миллисекундах.
+Два JSON можно сравнить между коммитами.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import subprocess
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+from sqlalchemy import select
+
+from app.database import AsyncSessionLocal, engine
+from app.main import app
+from app.models.order import Order
+from app.models.user import User
+from benchmarks.seed import (
+    BENCH_EMAIL_DOMAIN,
+    BENCH_PASSWORD,
+    SeedConfig,
+    bench_email,
+    reset_database,
+    seed,
+)
+
+API = "/api/v1"
+ENDPOINTS = (
+    "product_list",
+    "product_get",
+    "order_create",
+    "order_detail",
+    "login",
+    "webhook",
+)
+
+RequestFactory = Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]]
+
+
+@dataclass
+class EndpointResult:
+    """Итог прогона одного эндпоинта."""
+
+    name: str
+    requests: int
+    errors: int
+    concurrency: int
+    duration_s: float
+    throughput_rps: float
+    mean_ms: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+
+
+@dataclass
+class BenchContext:
+    """Данные, нужные сценариям: токены, заказы пользователей, размер каталога.
+
+    orders_by_user[j] - заказы владельца tokens[j].
+    """
+
+    tokens: list[str]
+    orders_by_user: list[list[int]]
+    products: int
+    categories: int
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """Перцентиль по методу ближайшего ранга (значения уже отсортированы)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(q / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+async def run_endpoint(
+    client: httpx.AsyncClient,
+    name: str,
+    make_request: RequestFactory,
+    *,
+    total: int,
+    concurrency: int,
+    warmup: int,
+) -> EndpointResult:
+    """Выполнить `total` запросов, держа `concurrency` запросов в полёте."""
+    for i in range(warmup):
+        await make_request(client, i)
+
+    latencies: list[float] = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker() -> None:
+        nonlocal errors
+        for i in counter:
+            started = time.perf_counter()
+            try:
+                response = await make_request(client, i)
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            latencies.append(time.perf_counter() - started)
+            errors += failed
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    duration = time.perf_counter() - started
+
+    latencies.sort()
+    ms = [value * 1000 for value in latencies]
+    return EndpointResult(
+        name=name,
+        requests=total,
+        errors=errors,
+        concurrency=concurrency,
+        duration_s=round(duration, 3),
+        throughput_rps=round(total / duration, 1) if duration else 0.0,
+        mean_ms=round(sum(ms) / len(ms), 3) if ms else 0.0,
+        p50_ms=round(percentile(ms, 50), 3),
+        p95_ms=round(percentile(ms, 95), 3),
+        p99_ms=round(percentile(ms, 99), 3),
+        max_ms=round(ms[-1], 3) if ms else 0.0,
+    )
+
+
+def build_scenarios(ctx: BenchContext) -> dict[str, RequestFactory]:
+    """Сценарии по эндпоинтам (имя -> фабрика запроса по номеру i)."""
+    rnd = random.Random(42)
+
+    def auth(i: int) -> dict[str, str]:
+        return {"Authorization": f"Bearer {ctx.tokens[i % len(ctx.tokens)]}"}
+
+    async def product_list(client: httpx.AsyncClient, i: int) -> httpx.Response:
+        category_id = rnd.randint(1, ctx.categories)
+        return await client.get(
+            f"{API}/products/", params={"limit": 50, "category_id": category_id}
+        )
+
+    async def product_get(client: httpx.AsyncClient, i: int) -> httpx.Response:
+        return await client.get(f"{API}/products/{rnd.randint(1, ctx.products)}")
+
+    async def order_create(client: httpx.AsyncClient, i: int) -> httpx.Response:
+        product_ids = rnd.sample(range(1, ctx.products + 1), k=min(3, ctx.products))
+        items = [{"product_id": pid, "quantity": 1} for pid in product_ids]
+        return await client.post(
+            f"{API}/orders/", json={"items": items}, headers=auth(i)
+        )
+
+    async def order_detail(client: httpx.AsyncClient, i: int) -> httpx.Response:
+        user_orders = ctx.orders_by_user[i % len(ctx.tokens)] or [0]
+        return await client.get(
+            f"{API}/orders/{rnd.choice(user_orders)}", headers=auth(i)
+        )
+
+    async def login(client: httpx.AsyncClient, i: int) -> httpx.Response:
+        return await client.post(
+            f"{API}/auth/login",
+            data={
+                "username": bench_email(1 + i % len(ctx.tokens)),
+                "password": BENCH_PASSWORD,
+            },
+        )
+
+    async def webhook(client: httpx.AsyncClient, i: int) -> httpx.Response:
+        body = {
+            "event_id": uuid.uuid4().hex,
+            "provider_payment_id": f"bench_{i}",
+            "status": "succeeded",
+        }
+        return await client.post(f"{API}/payments/webhook/mock", json=body)
+
+    return {
+        "product_list": product_list,
+        "product_get": product_get,
+        "order_create": order_create,
+        "order_detail": order_detail,
+        "login": login,
+        "webhook": webhook,
+    }
+
+
+async def prepare_context(
+    client: httpx.AsyncClient, cfg: SeedConfig, users: int
+) -> BenchContext:
+    """Залогинить пользователей бенчмарка и собрать их заказы."""
+    async with AsyncSessionLocal() as session:
+        rows = (
+            await session.execute(
+                select(User.id, User.email)
+                .where(User.email.like(f"%@{BENCH_EMAIL_DOMAIN}"))
+                .order_by(User.id)
+                .limit(users)
+            )
+        ).all()
+        orders = (
+            await session.execute(
+                select(Order.user_id, Order.id).where(
+                    Order.user_id.in_([user_id for user_id, _ in rows])
+                )
+            )
+        ).all()
+    if not rows:
+        raise SystemExit("Нет пользователей бенчмарка: запустите с --seed")
+
+    by_user: dict[int, list[int]] = {user_id: [] for user_id, _ in rows}
+    for user_id, order_id in orders:
+        by_user[user_id].append(order_id)
+
+    tokens = []
+    for _, email in rows:
+        response = await client.post(
+            f"{API}/auth/login",
+            data={"username": email, "password": BENCH_PASSWORD},
+        )
+        response.raise_for_status()
+        tokens.append(response.json()["access_token"])
+
+    return BenchContext(
+        tokens=tokens,
+        orders_by_user=list(by_user.values()),  # в том же порядке, что tokens
+        products=cfg.products,
+        categories=cfg.categories,
+    )
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def main(args: argparse.Namespace) -> None:
+    cfg = SeedConfig(
+        categories=args.categories,
+        products=args.products,
+        users=args.users,
+        orders_per_user=args.orders_per_user,
+    )
+    if args.seed:
+        async with AsyncSessionLocal() as session:
+            await reset_database(session)
+            await seed(session, cfg)
+
+    transport = httpx.ASGITransport(app=app)
+    async with (
+        app.router.lifespan_context(app),
+        httpx.AsyncClient(transport=transport, base_url="http://bench") as client,
+    ):
+        ctx = await prepare_context(client, cfg, args.users)
+        scenarios = build_scenarios(ctx)
+        results = []
+        for name in args.endpoints:
+            total = args.login_requests if name == "login" else args.requests
+            result = await run_endpoint(
+                client,
+                name,
+                scenarios[name],
+                total=total,
+                concurrency=args.concurrency,
+                warmup=min(args.warmup, total),
+            )
+            results.append(result)
+            print(
+                f"{name:<14} {result.throughput_rps:>9.1f} rps  "
+                f"p50 {result.p50_ms:>8.2f} ms  p95 {result.p95_ms:>8.2f} ms  "
+                f"p99 {result.p99_ms:>8.2f} ms  errors {result.errors}"
+            )
+    await engine.dispose()
+
+    report = {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "seed": asdict(cfg),
+        "concurrency": args.concurrency,
+        "results": [asdict(result) for result in results],
+    }
+    Path(args.output).write_text(json.dumps(report, indent=2, ensure_ascii=False))
+    print(f"JSON: {args.output}")
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    defaults = SeedConfig()
+    parser = argparse.ArgumentParser(description="Бенчмарк эндпоинтов API")
+    parser.add_argument(
+        "--seed", action="store_true", help="очистить БД и залить данные"
+    )
+    parser.add_argument("--categories", type=int, default=defaults.categories)
+    parser.add_argument("--products", type=int, default=defaults.products)
+    parser.add_argument("--users", type=int, default=defaults.users)
+    parser.add_argument("--orders-per-user", type=int, default=defaults.orders_per_user)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument(
+        "--login-requests", type=int, default=100, help="Argon2 - дорого"
+    )
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument(
+        "--endpoints",
+        nargs="+",
+        choices=ENDPOINTS,
+        default=list(ENDPOINTS),
+    )
+    parser.add_argument("--output", default="bench_results.json")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,108 @@
+"""Наполнение локальной БД данными для бенчмарков.
+
+Всё генерируется на стороне PostgreSQL (generate_series), поэтому
+даже миллионы товаров заливаются за секунды. Все пользователи
+получают один и тот же пароль (хеш считается один раз).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.security.password import hash_password
+
+BENCH_PASSWORD = "bench-password"
+BENCH_EMAIL_DOMAIN = "bench.local"
+
+
+@dataclass(frozen=True, slots=True)
+class SeedConfig:
+    """Объём данных для бенчмарка."""
+
+    categories: int = 20
+    products: int = 10_000
+    users: int = 50
+    orders_per_user: int = 20
+    stock: int = 1_000_000  # чтобы создание заказов не упиралось в остатки
+
+
+def bench_email(n: int) -> str:
+    return f"user{n}@{BENCH_EMAIL_DOMAIN}"
+
+
+async def reset_database(session: AsyncSession) -> None:
+    """Очистить все таблицы приложения (кроме alembic_version)."""
+    tables = (
+        await session.execute(
+            text(
+                "SELECT string_agg(quote_ident(tablename), ', ') FROM pg_tables "
+                "WHERE schemaname = 'public' AND tablename <> 'alembic_version'"
+            )
+        )
+    ).scalar_one()
+    await session.execute(text(f"TRUNCATE {tables} RESTART IDENTITY CASCADE"))
+    await session.commit()
+
+
+async def seed(session: AsyncSession, cfg: SeedConfig) -> None:
+    """Залить категории, товары, пользователей и их заказы."""
+    await session.execute(
+        text(
+            "INSERT INTO categories (name, slug) "
+            "SELECT 'Category ' || g, 'category-' || g "
+            "FROM generate_series(1, :n) AS g"
+        ),
+        {"n": cfg.categories},
+    )
+    await session.execute(
+        text(
+            "INSERT INTO products "
+            "    (name, description, price, category_id, stock, created_at) "
+            "SELECT 'Product ' || g, 'Bench product ' || g, "
+            "       round((1 + random() * 999)::numeric, 2), "
+            "       1 + (g % :categories), :stock, "
+            # товары добавлялись в течение года (фильтр/сортировка по новизне)
+            "       timezone('utc', now()) - random() * interval '365 days' "
+            "FROM generate_series(1, :n) AS g"
+        ),
+        {"n": cfg.products, "categories": cfg.categories, "stock": cfg.stock},
+    )
+    hashed = await hash_password(password=BENCH_PASSWORD)
+    await session.execute(
+        text(
+            "INSERT INTO users (email, hashed_password) "
+            "SELECT 'user' || g || '@' || :domain, :hashed "
+            "FROM generate_series(1, :n) AS g"
+        ),
+        {"n": cfg.users, "domain": BENCH_EMAIL_DOMAIN, "hashed": hashed},
+    )
+    await session.execute(
+        text(
+            "INSERT INTO orders (user_id, status, total_price) "
+            "SELECT u.id, 'PENDING', 0 FROM users u, generate_series(1, :n)"
+        ),
+        {"n": cfg.orders_per_user},
+    )
+    # по 3 позиции на заказ, сумма заказа - из цен позиций
+    await session.execute(
+        text(
+            "INSERT INTO order_items (order_id, product_id, quantity, price) "
+            "SELECT o.id, p.id, 1 + (o.id + k) % 3, p.price "
+            "FROM orders o CROSS JOIN generate_series(0, 2) AS k "
+            "JOIN products p ON p.id = 1 + (o.id * 31 + k * 7919) % :products"
+        ),
+        {"products": cfg.products},
+    )
+    await session.execute(
+        text(
+            "UPDATE orders o SET total_price = s.total FROM ("
+            "  SELECT order_id, sum(price * quantity) AS total "
+            "  FROM order_items GROUP BY order_id) s "
+            "WHERE s.order_id = o.id"
+        )
+    )
+    await session.execute(text("ANALYZE"))
+    await session.commit()
@@ -0,0 +1,102 @@
+"""Стоимость сериализации ответа `list[ProductRead]` (без БД и HTTP).
+
+Сравнивает способы превратить страницу ORM-объектов Product в JSON:
+- legacy: model_validate каждого + jsonable_encoder + json.dumps
+  (старый путь FastAPI без response_model);
+- double: model_validate в роуте, затем ещё раз валидация response_model
+  и dump_json (так делали роуты заказов до отказа от model_validate);
+- single: один проход TypeAdapter(list[ProductRead]) - validate_python из
+  атрибутов + dump_json в pydantic-core (так FastAPI сериализует ответ
+  с response_model);
+- orjson: validate_python + dump_python + orjson.dumps (если orjson установлен).
+
+Запуск:
+    uv run python -m benchmarks.serialization --items 100
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import timeit
+from collections.abc import Callable
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.models.product import Product
+from app.schemas.product import ProductRead
+
+try:
+    import orjson
+except ImportError:  # необязательная зависимость
+    orjson = None
+
+PRODUCT_LIST = TypeAdapter(list[ProductRead])
+
+
+def make_products(n: int) -> list[Product]:
+    """Transient ORM-объекты, как после загрузки страницы каталога."""
+    now = datetime.now(timezone.utc)
+    return [
+        Product(
+            id=i,
+            name=f"Product {i}",
+            description=f"Bench product {i}",
+            price=Decimal("10.00") + i,
+            category_id=1 + i % 20,
+            stock=100,
+            is_active=True,
+            created_at=now - timedelta(minutes=i),
+            updated_at=now,
+        )
+        for i in range(1, n + 1)
+    ]
+
+
+def scenarios(products: list[Product]) -> dict[str, Callable[[], Any]]:
+    def legacy() -> bytes:
+        items = [ProductRead.model_validate(product) for product in products]
+        return json.dumps(jsonable_encoder(items)).encode()
+
+    def double() -> bytes:
+        items = [ProductRead.model_validate(product) for product in products]
+        return PRODUCT_LIST.dump_json(PRODUCT_LIST.validate_python(items))
+
+    def single() -> bytes:
+        return PRODUCT_LIST.dump_json(PRODUCT_LIST.validate_python(products))
+
+    result = {"legacy": legacy, "double": double, "single": single}
+    if orjson is not None:
+
+        def orjson_dump() -> bytes:
+            items = PRODUCT_LIST.validate_python(products)
+            return orjson.dumps(PRODUCT_LIST.dump_python(items), default=str)
+
+        result["orjson"] = orjson_dump
+    return result
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк сериализации ответа")
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--number", type=int, default=200, help="вызовов в замере")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    products = make_products(args.items)
+    for name, func in scenarios(products).items():
+        func()  # прогрев
+        best = min(timeit.repeat(func, number=args.number, repeat=args.repeat))
+        per_call_us = best / args.number * 1e6
+        print(
+            f"{name:<8} {per_call_us:>9.1f} us/ответ  "
+            f"{per_call_us / args.items:>7.2f} us/элемент"
+        )
+
+
+if __name__ == "__main__":
+    main()
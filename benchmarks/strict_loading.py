@@ -0,0 +1,362 @@
+"""Проверка эндпоинтов в строгом режиме загрузки связей (lazy="raise").
+
+С ORM_STRICT_LOADING=true любое обращение к незагруженной relationship
+падает сразу, даже если объект уже в сессии и SQL не понадобился бы.
+Скрипт проходит по всем эндпоинтам настоящего приложения (`app.main:app`
+через httpx.ASGITransport, с lifespan) - каталог, импорт/экспорт, заказы,
+платёж с webhook, аналитика, блокировка пользователя - и проверяет коды
+ответов. Обработка webhook идёт в фоне и ошибки там не видны в ответе,
+поэтому после неё отдельно проверяется, что заказ стал PAID.
+
+Запуск (--seed очищает все таблицы, как в benchmarks.run):
+    ORM_STRICT_LOADING=true uv run python -m benchmarks.strict_loading --seed
+Код выхода 1, если хоть один запрос не прошёл.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import uuid
+from typing import Any
+
+import httpx
+from sqlalchemy import select, update
+
+from app.config import settings
+from app.database import AsyncSessionLocal, engine
+from app.main import app
+from app.models.category import Category
+from app.models.order import Order, OrderStatus
+from app.models.product import Product
+from app.models.user import User
+from app.services.webhook_inbox import drain_inbox_batch
+from benchmarks.seed import (
+    BENCH_PASSWORD,
+    SeedConfig,
+    bench_email,
+    reset_database,
+    seed,
+)
+
+API = "/api/v1"
+WEBHOOK_WAIT_ATTEMPTS = 50  # по 0.1 с
+
+
+class RouteChecker:
+    """Запросы к приложению с проверкой кода ответа; считает провалы."""
+
+    def __init__(self, client: httpx.AsyncClient, *, verbose: bool) -> None:
+        self.client = client
+        self.verbose = verbose
+        self.total = 0
+        self.failures = 0
+
+    async def call(
+        self, method: str, url: str, *, expect: int, **kwargs: Any
+    ) -> httpx.Response | None:
+        """Ответ при ожидаемом коде, иначе None (провал уже напечатан)."""
+        self.total += 1
+        label = f"{method} {url}"
+        try:
+            response = await self.client.request(method, f"{API}{url}", **kwargs)
+        except Exception as exc:  # noqa: BLE001 - ASGITransport пробрасывает ошибку приложения
+            self.fail(label, f"{exc.__class__.__name__}: {exc}")
+            return None
+        if response.status_code != expect:
+            self.fail(label, f"{response.status_code} {response.text[:500]}")
+            return None
+        if self.verbose:
+            print(f"ok   {label}: {response.status_code}")
+        return response
+
+    def fail(self, label: str, reason: str) -> None:
+        self.failures += 1
+        print(f"FAIL {label}: {reason}")
+
+
+async def login(client: httpx.AsyncClient, email: str, password: str) -> str:
+    response = await client.post(
+        f"{API}/auth/login", data={"username": email, "password": password}
+    )
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def prepare_data() -> dict[str, Any]:
+    """Id из засеянной БД; первый пользователь бенчмарка - администратор."""
+    admin_email, customer_email = bench_email(1), bench_email(2)
+    async with AsyncSessionLocal() as session:
+        users = dict(
+            (
+                await session.execute(
+                    select(User.email, User.id).where(
+                        User.email.in_([admin_email, customer_email])
+                    )
+                )
+            ).all()
+        )
+        if len(users) < 2:
+            raise SystemExit("Нет пользователей бенчмарка: запустите с --seed")
+        await session.execute(
+            update(User).where(User.id == users[admin_email]).values(is_admin=True)
+        )
+        category = (
+            await session.execute(
+                select(Category.id, Category.slug)
+                .where(Category.is_active.is_(True))
+                .order_by(Category.id)
+                .limit(1)
+            )
+        ).one()
+        product_ids = (
+            await session.scalars(
+                select(Product.id)
+                .where(Product.is_active.is_(True), Product.stock >= 10)
+                .order_by(Product.id)
+                .limit(3)
+            )
+        ).all()
+        order_id = await session.scalar(
+            select(Order.id)
+            .where(Order.user_id == users[customer_email])
+            .order_by(Order.id)
+            .limit(1)
+        )
+        await session.commit()
+    return {
+        "admin_email": admin_email,
+        "customer_email": customer_email,
+        "category_id": category.id,
+        "category_slug": category.slug,
+        "product_ids": product_ids,
+        "order_id": order_id,
+    }
+
+
+async def check_catalog(
+    check: RouteChecker, data: dict[str, Any], admin: dict[str, str]
+) -> None:
+    suffix = uuid.uuid4().hex[:8]
+    await check.call("GET", "/categories/all", expect=200)
+    await check.call("GET", f"/categories/{data['category_slug']}", expect=200)
+    await check.call("GET", f"/categories/{data['category_id']}", expect=200)
+    slug = f"strict-{suffix}"
+    await check.call(
+        "POST",
+        "/categories/",
+        json={"name": f"Strict {suffix}", "slug": slug},
+        headers=admin,
+        expect=201,
+    )
+    await check.call(
+        "PATCH",
+        f"/categories/{slug}",
+        json={"name": f"Strict {suffix} (upd)"},
+        headers=admin,
+        expect=200,
+    )
+    await check.call(
+        "POST", f"/categories/{slug}/deactivate", headers=admin, expect=200
+    )
+
+    product_id = data["product_ids"][0]
+    await check.call("GET", "/products/", params={"limit": 20}, expect=200)
+    await check.call(
+        "GET",
+        "/products/",
+        params={"limit": 20, "category_id": data["category_id"], "sort": "price_asc"},
+        expect=200,
+    )
+    await check.call("GET", "/products/", params={"ids": product_id}, expect=200)
+    await check.call("GET", f"/products/{product_id}", expect=200)
+    await check.call("GET", "/products/search", params={"q": "Product"}, expect=200)
+    await check.call("GET", "/products/export", headers=admin, expect=200)
+    created = await check.call(
+        "POST",
+        "/products/",
+        json={
+            "name": f"Strict product {suffix}",
+            "price": "10.00",
+            "category_id": data["category_id"],
+            "stock": 5,
+        },
+        headers=admin,
+        expect=201,
+    )
+    if created is not None:
+        new_id = created.json()["id"]
+        await check.call(
+            "PATCH",
+            f"/products/{new_id}",
+            json={"price": "11.00"},
+            headers=admin,
+            expect=200,
+        )
+        await check.call(
+            "POST", f"/products/{new_id}/deactivate", headers=admin, expect=200
+        )
+    await check.call(
+        "POST",
+        "/products/import",
+        content=(
+            "name,price,category_id,stock\n"
+            f"Strict import {suffix},12.50,{data['category_id']},3\n"
+        ),
+        headers={**admin, "Content-Type": "text/csv"},
+        expect=200,
+    )
+
+
+async def check_orders(
+    check: RouteChecker, data: dict[str, Any], customer: dict[str, str]
+) -> None:
+    await check.call("GET", "/orders/me", headers=customer, expect=200)
+    await check.call(
+        "GET",
+        "/orders/me",
+        params={"with_summary": "true"},
+        headers=customer,
+        expect=200,
+    )
+    await check.call("GET", "/orders/me/summary", headers=customer, expect=200)
+    if data["order_id"] is not None:
+        await check.call(
+            "GET", f"/orders/{data['order_id']}", headers=customer, expect=200
+        )
+
+    items = [{"product_id": pid, "quantity": 1} for pid in data["product_ids"]]
+    to_cancel = await check.call(
+        "POST", "/orders/", json={"items": items}, headers=customer, expect=201
+    )
+    if to_cancel is not None:
+        await check.call(
+            "POST",
+            f"/orders/{to_cancel.json()['id']}/cancel",
+            headers=customer,
+            expect=200,
+        )
+
+    created = await check.call(
+        "POST", "/orders/", json={"items": items}, headers=customer, expect=201
+    )
+    if created is None:
+        return
+    order_id = created.json()["id"]
+    await check.call("GET", f"/orders/{order_id}", headers=customer, expect=200)
+    payment = await check.call(
+        "POST", f"/payments/orders/{order_id}", headers=customer, expect=201
+    )
+    if payment is None:
+        return
+    await check.call(
+        "POST",
+        "/payments/webhook/mock",
+        json={
+            "event_id": uuid.uuid4().hex,
+            "provider_payment_id": payment.json()["provider_payment_id"],
+            "status": "succeeded",
+        },
+        expect=202,
+    )
+    # ошибка в фоновом обработчике видна только по статусу заказа; событие
+    # может забрать и фоновая задача inbox из lifespan, поэтому ждём
+    for _ in range(WEBHOOK_WAIT_ATTEMPTS):
+        await drain_inbox_batch()
+        async with AsyncSessionLocal() as session:
+            status = await session.scalar(
+                select(Order.status).where(Order.id == order_id)
+            )
+        if status == OrderStatus.PAID:
+            break
+        await asyncio.sleep(0.1)
+    paid = await check.call("GET", f"/orders/{order_id}", headers=customer, expect=200)
+    if paid is not None and paid.json()["status"] != "paid":
+        check.fail(
+            f"webhook для заказа {order_id}",
+            f"статус {paid.json()['status']}, ожидался paid",
+        )
+
+
+async def check_admin(check: RouteChecker, admin: dict[str, str]) -> None:
+    for report in ("revenue", "categories", "products", "top-sellers"):
+        await check.call("GET", f"/analytics/{report}", headers=admin, expect=200)
+    for probe in (
+        "db-pool",
+        "password-hasher",
+        "token-cache",
+        "product-loader",
+        "expiry",
+        "payment-gateway",
+    ):
+        await check.call("GET", f"/health/{probe}", headers=admin, expect=200)
+
+    email = f"strict-{uuid.uuid4().hex[:8]}@example.com"
+    registered = await check.call(
+        "POST",
+        "/auth/register",
+        json={"email": email, "password": BENCH_PASSWORD},
+        expect=201,
+    )
+    if registered is None:
+        return
+    user = {
+        "Authorization": f"Bearer {await login(check.client, email, BENCH_PASSWORD)}"
+    }
+    await check.call("GET", "/auth/me", headers=user, expect=200)
+    await check.call(
+        "POST",
+        f"/auth/users/{registered.json()['id']}/deactivate",
+        headers=admin,
+        expect=200,
+    )
+    await check.call("GET", "/auth/me", headers=user, expect=403)
+
+
+async def main(args: argparse.Namespace) -> int:
+    if not settings.ORM_STRICT_LOADING:
+        print("Нужен строгий режим: запустите с ORM_STRICT_LOADING=true")
+        return 2
+    if args.seed:
+        async with AsyncSessionLocal() as session:
+            await reset_database(session)
+            await seed(
+                session,
+                SeedConfig(categories=5, products=200, users=2, orders_per_user=3),
+            )
+    data = await prepare_data()
+
+    transport = httpx.ASGITransport(app=app)
+    async with (
+        app.router.lifespan_context(app),
+        httpx.AsyncClient(transport=transport, base_url="http://strict") as client,
+    ):
+        admin = {
+            "Authorization": "Bearer "
+            + await login(client, data["admin_email"], BENCH_PASSWORD)
+        }
+        customer = {
+            "Authorization": "Bearer "
+            + await login(client, data["customer_email"], BENCH_PASSWORD)
+        }
+        check = RouteChecker(client, verbose=args.verbose)
+        await check_catalog(check, data, admin)
+        await check_orders(check, data, customer)
+        await check_admin(check, admin)
+    await engine.dispose()
+
+    print(f"{check.total - check.failures}/{check.total} запросов без ошибок")
+    return 1 if check.failures else 0
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Эндпоинты при lazy='raise'")
+    parser.add_argument(
+        "--seed", action="store_true", help="очистить БД и залить данные"
+    )
+    parser.add_argument("-v", "--verbose", action="store_true")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    raise SystemExit(asyncio.run(main(parse_args())))
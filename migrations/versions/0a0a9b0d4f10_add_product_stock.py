@@ -0,0 +1,78 @@
+"""add product stock
+
+Revision ID: 0a0a9b0d4f10
+Revises: 3f2e72babc9f
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import context, op
+
+
+revision: str = "0a0a9b0d4f10"
+down_revision: Union[str, Sequence[str], None] = "3f2e72babc9f"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+BACKFILL_BATCH_SIZE = 5000
+
+
+def upgrade() -> None:
+    """Upgrade schema.
+
+    Остаток существующих товаров миграция не знает: колонка заполняется 0,
+    и до загрузки остатков такие товары заказать нельзя (409). Загрузить
+    остатки до включения трафика: импортом с колонкой stock
+    (POST /products/import) или сразу в миграции -
+    `alembic -x initial_stock=N upgrade head` выставит N всем товарам.
+    """
+    # server_default => без перезаписи таблицы (PostgreSQL 11+)
+    op.add_column(
+        "products",
+        sa.Column("stock", sa.Integer(), server_default=sa.text("0"), nullable=False),
+    )
+    # NOT VALID - без скана таблицы под ACCESS EXCLUSIVE: проверяются
+    # только новые и изменённые строки, старые - VALIDATE ниже
+    op.create_check_constraint(
+        "ck_products_stock_non_negative",
+        "products",
+        "stock >= 0",
+        postgresql_not_valid=True,
+    )
+
+    initial_stock = context.get_x_argument(as_dictionary=True).get("initial_stock")
+    # пачками, каждая в своей транзакции: без блокировки всей таблицы
+    with op.get_context().autocommit_block():
+        conn = op.get_bind()
+        if initial_stock is not None:
+            max_id = conn.execute(sa.text("SELECT max(id) FROM products")).scalar()
+            last_id = 0
+            while max_id is not None and last_id < max_id:
+                conn.execute(
+                    sa.text(
+                        "UPDATE products SET stock = :stock "
+                        "WHERE id > :last_id AND id <= :upper"
+                    ),
+                    {
+                        "stock": int(initial_stock),
+                        "last_id": last_id,
+                        "upper": last_id + BACKFILL_BATCH_SIZE,
+                    },
+                )
+                last_id += BACKFILL_BATCH_SIZE
+        # SHARE UPDATE EXCLUSIVE: чтение и запись товаров не блокирует
+        conn.execute(
+            sa.text(
+                "ALTER TABLE products VALIDATE CONSTRAINT ck_products_stock_non_negative"
+            )
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint("ck_products_stock_non_negative", "products", type_="check")
+    op.drop_column("products", "stock")
@@ -0,0 +1,67 @@
+"""add product keyset indexes
+
+Revision ID: 3f2e72babc9f
+Revises: d3e4f5a6b7c8
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision: str = "3f2e72babc9f"
+down_revision: Union[str, Sequence[str], None] = "d3e4f5a6b7c8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY: каталог большой, нельзя блокировать запись на время сборки
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_products_category_id_id",
+            "products",
+            ["category_id", "id"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_products_active_category_id_id",
+            "products",
+            ["category_id", "id"],
+            unique=False,
+            postgresql_where=sa.text("is_active"),
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_products_active_id",
+            "products",
+            ["id"],
+            unique=False,
+            postgresql_where=sa.text("is_active"),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_products_active_id",
+            table_name="products",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_products_active_category_id_id",
+            table_name="products",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_products_category_id_id",
+            table_name="products",
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,108 @@
+"""add product search
+
+Revision ID: 5c1d2e8a9b47
+Revises: b787a6ae9158
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = "5c1d2e8a9b47"
+down_revision: Union[str, Sequence[str], None] = "b787a6ae9158"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 5000
+
+# Одно выражение для триггера и для заполнения существующих строк.
+# Конфигурация russian: русские слова - russian_stem, латиница - english_stem.
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('russian', coalesce({p}name, '')), 'A') || "
+    "setweight(to_tsvector('russian', coalesce({p}description, '')), 'B')"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # Nullable-колонка без default: ALTER без перезаписи таблицы.
+    op.add_column(
+        "products",
+        sa.Column("search_vector", postgresql.TSVECTOR(), nullable=True),
+    )
+    op.execute(
+        f"""
+        CREATE FUNCTION products_search_vector_update() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := {SEARCH_VECTOR_SQL.format(p="NEW.")};
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER trg_products_search_vector
+        BEFORE INSERT OR UPDATE OF name, description ON products
+        FOR EACH ROW EXECUTE FUNCTION products_search_vector_update()
+        """
+    )
+
+    # Новые и изменённые строки уже заполняет триггер; старые - пачками,
+    # каждая в своей транзакции, чтобы не держать блокировки на всю таблицу.
+    with op.get_context().autocommit_block():
+        conn = op.get_bind()
+        max_id = conn.execute(sa.text("SELECT max(id) FROM products")).scalar()
+        last_id = 0
+        while max_id is not None and last_id < max_id:
+            conn.execute(
+                sa.text(
+                    f"UPDATE products SET search_vector = {SEARCH_VECTOR_SQL.format(p='')} "
+                    "WHERE id > :last_id AND id <= :upper AND search_vector IS NULL"
+                ),
+                {"last_id": last_id, "upper": last_id + BACKFILL_BATCH_SIZE},
+            )
+            last_id += BACKFILL_BATCH_SIZE
+
+        op.create_index(
+            "ix_products_search_vector",
+            "products",
+            ["search_vector"],
+            unique=False,
+            postgresql_using="gin",
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_products_name_trgm",
+            "products",
+            ["name"],
+            unique=False,
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_products_name_trgm",
+            table_name="products",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_products_search_vector",
+            table_name="products",
+            postgresql_concurrently=True,
+        )
+    op.execute("DROP TRIGGER IF EXISTS trg_products_search_vector ON products")
+    op.execute("DROP FUNCTION IF EXISTS products_search_vector_update()")
+    op.drop_column("products", "search_vector")
+    # pg_trgm не удаляем: расширение могут использовать другие объекты
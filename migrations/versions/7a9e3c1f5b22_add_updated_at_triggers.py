@@ -0,0 +1,54 @@
+"""add updated_at triggers
+
+Revision ID: 7a9e3c1f5b22
+Revises: e41b7c9d2f03
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "7a9e3c1f5b22"
+down_revision: Union[str, Sequence[str], None] = "e41b7c9d2f03"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Таблицы с TimestampMixin.updated_at
+TABLES = ("categories", "products", "users", "orders", "payments")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # server_onupdate в модели только сообщает ORM, что значение ставит БД;
+    # ставит его этот триггер - при любом UPDATE, включая сырой SQL
+    # (списание остатков и т.п.). clock_timestamp(), а не now(): время
+    # самого изменения, а не начала транзакции, - Last-Modified не идёт назад.
+    op.execute(
+        """
+        CREATE FUNCTION set_updated_at() RETURNS trigger AS $$
+        BEGIN
+            NEW.updated_at := timezone('utc', clock_timestamp());
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    for table in TABLES:
+        op.execute(
+            f"""
+            CREATE TRIGGER trg_{table}_updated_at
+            BEFORE UPDATE ON {table}
+            FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*)
+            EXECUTE FUNCTION set_updated_at()
+            """
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS trg_{table}_updated_at ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS set_updated_at()")
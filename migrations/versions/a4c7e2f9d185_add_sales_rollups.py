@@ -0,0 +1,111 @@
+"""add sales rollups
+
+Revision ID: a4c7e2f9d185
+Revises: f1b7d3c9a526
+Create Date: 2026-10-17 21:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision: str = "a4c7e2f9d185"
+down_revision: Union[str, Sequence[str], None] = "f1b7d3c9a526"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _counters() -> list[sa.Column]:
+    return [
+        sa.Column("orders", sa.Integer(), nullable=False),
+        sa.Column("units", sa.Integer(), nullable=False),
+        sa.Column("revenue", sa.Numeric(precision=14, scale=2), nullable=False),
+    ]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "users",
+        sa.Column(
+            "is_admin", sa.Boolean(), server_default=sa.text("false"), nullable=False
+        ),
+    )
+    op.create_table(
+        "sales_hourly",
+        sa.Column("bucket", sa.DateTime(), nullable=False),
+        *_counters(),
+        sa.PrimaryKeyConstraint("bucket"),
+    )
+    op.create_table(
+        "sales_product_hourly",
+        sa.Column("bucket", sa.DateTime(), nullable=False),
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        *_counters(),
+        sa.PrimaryKeyConstraint("bucket", "product_id"),
+    )
+    op.create_table(
+        "sales_product_daily",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("category_id", sa.Integer(), nullable=False),
+        *_counters(),
+        sa.PrimaryKeyConstraint("day", "product_id"),
+    )
+    op.create_index(
+        "ix_sales_product_daily_category_day",
+        "sales_product_daily",
+        ["category_id", "day"],
+        unique=False,
+    )
+    op.create_table(
+        "analytics_watermarks",
+        sa.Column("name", sa.String(length=50), nullable=False),
+        sa.Column("high_water", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("name"),
+    )
+    # свёртки пустые: первое обновление пройдёт все заказы пачками
+    op.execute(
+        "INSERT INTO analytics_watermarks (name, high_water) "
+        "VALUES ('sales', '-infinity')"
+    )
+
+    # Обновление свёрток: заказы с updated_at после водяного знака
+    # и все заказы затронутого часа (по created_at).
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_orders_updated_at",
+            "orders",
+            ["updated_at"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_orders_created_at",
+            "orders",
+            ["created_at"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_orders_created_at", table_name="orders", postgresql_concurrently=True
+        )
+        op.drop_index(
+            "ix_orders_updated_at", table_name="orders", postgresql_concurrently=True
+        )
+    op.drop_table("analytics_watermarks")
+    op.drop_index(
+        "ix_sales_product_daily_category_day", table_name="sales_product_daily"
+    )
+    op.drop_table("sales_product_daily")
+    op.drop_table("sales_product_hourly")
+    op.drop_table("sales_hourly")
+    op.drop_column("users", "is_admin")
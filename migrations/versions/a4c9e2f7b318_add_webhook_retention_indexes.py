@@ -0,0 +1,44 @@
+"""add webhook retention indexes
+
+Revision ID: a4c9e2f7b318
+Revises: e2b8d4f6a193
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "a4c9e2f7b318"
+down_revision: Union[str, Sequence[str], None] = "e2b8d4f6a193"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = (
+    ("ix_webhook_inbox_created_at", "webhook_inbox"),
+    ("ix_processed_webhook_events_created_at", "processed_webhook_events"),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Очистка старых записей (webhook_retention_job) идёт от самых старых
+    # пачками; без индекса каждая пачка читала бы таблицу целиком.
+    with op.get_context().autocommit_block():
+        for name, table in INDEXES:
+            op.create_index(
+                name,
+                table,
+                ["created_at"],
+                unique=False,
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table in INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,69 @@
+"""add webhook inbox
+
+Revision ID: ac4dc549520d
+Revises: 0a0a9b0d4f10
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision: str = "ac4dc549520d"
+down_revision: Union[str, Sequence[str], None] = "0a0a9b0d4f10"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "webhook_inbox",
+        sa.Column("id", sa.Integer(), sa.Identity(always=False), nullable=False),
+        sa.Column("provider", sa.String(length=32), nullable=False),
+        sa.Column("event_id", sa.String(length=128), nullable=False),
+        sa.Column("provider_payment_id", sa.String(length=128), nullable=False),
+        sa.Column("event_status", sa.String(length=32), nullable=False),
+        sa.Column("payload", sa.JSON(), nullable=False),
+        sa.Column(
+            "status",
+            sa.Enum(
+                "PENDING",
+                "PROCESSING",
+                "PROCESSED",
+                "FAILED",
+                name="inboxstatus",
+            ),
+            nullable=False,
+        ),
+        sa.Column(
+            "attempts", sa.Integer(), server_default=sa.text("0"), nullable=False
+        ),
+        sa.Column("locked_until", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_error", sa.String(length=255), nullable=True),
+        sa.Column("processed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("timezone('utc', now())"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_webhook_inbox_queue",
+        "webhook_inbox",
+        ["id"],
+        unique=False,
+        postgresql_where=sa.text("status IN ('PENDING', 'PROCESSING')"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_webhook_inbox_queue", table_name="webhook_inbox")
+    op.drop_table("webhook_inbox")
+    sa.Enum(name="inboxstatus").drop(op.get_bind(), checkfirst=True)
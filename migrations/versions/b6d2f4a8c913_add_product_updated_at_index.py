@@ -0,0 +1,40 @@
+"""add product updated_at index
+
+Revision ID: b6d2f4a8c913
+Revises: 7a9e3c1f5b22
+Create Date: 2026-10-17 17:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "b6d2f4a8c913"
+down_revision: Union[str, Sequence[str], None] = "7a9e3c1f5b22"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # инкрементальный экспорт: WHERE updated_at > ? ORDER BY updated_at, id
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_products_updated_at_id",
+            "products",
+            ["updated_at", "id"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_products_updated_at_id",
+            table_name="products",
+            postgresql_concurrently=True,
+        )
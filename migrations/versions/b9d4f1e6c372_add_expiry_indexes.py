@@ -0,0 +1,57 @@
+"""add expiry indexes
+
+Revision ID: b9d4f1e6c372
+Revises: a4c7e2f9d185
+Create Date: 2026-10-17 22:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision: str = "b9d4f1e6c372"
+down_revision: Union[str, Sequence[str], None] = "a4c7e2f9d185"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Фоновое истечение: WHERE status = 'PENDING' AND created_at < ?
+    # ORDER BY created_at LIMIT n. Частичные индексы маленькие - в них
+    # только живые pending-строки, которые задача и вычищает.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_orders_pending_created_at",
+            "orders",
+            ["created_at"],
+            unique=False,
+            postgresql_where=sa.text("status = 'PENDING'"),
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_payments_active_created_at",
+            "payments",
+            ["created_at"],
+            unique=False,
+            postgresql_where=sa.text("status IN ('CREATED', 'PENDING')"),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_payments_active_created_at",
+            table_name="payments",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_orders_pending_created_at",
+            table_name="orders",
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,56 @@
+"""add payment outbox columns
+
+Revision ID: c3e8a6f2d417
+Revises: b9d4f1e6c372
+Create Date: 2026-10-17 23:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision: str = "c3e8a6f2d417"
+down_revision: Union[str, Sequence[str], None] = "b9d4f1e6c372"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Платёж в CREATED - запись outbox: ещё не передан провайдеру.
+    # Существующие CREATED (locked_until = NULL) outbox подхватит сразу.
+    op.add_column(
+        "payments",
+        sa.Column(
+            "provider_attempts",
+            sa.Integer(),
+            server_default=sa.text("0"),
+            nullable=False,
+        ),
+    )
+    op.add_column(
+        "payments",
+        sa.Column("locked_until", sa.DateTime(timezone=True), nullable=True),
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_payments_outbox",
+            "payments",
+            ["id"],
+            unique=False,
+            postgresql_where=sa.text("status = 'CREATED'"),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_payments_outbox", table_name="payments", postgresql_concurrently=True
+        )
+    op.drop_column("payments", "locked_until")
+    op.drop_column("payments", "provider_attempts")
@@ -0,0 +1,55 @@
+"""add orders user created_at index
+
+Revision ID: c8e1a5d7f240
+Revises: b6d2f4a8c913
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "c8e1a5d7f240"
+down_revision: Union[str, Sequence[str], None] = "b6d2f4a8c913"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # "мои заказы": WHERE user_id = ? AND (created_at, id) < (?, ?)
+    # ORDER BY created_at DESC, id DESC - обратный скан индекса.
+    # ix_orders_user_id не нужен: user_id - префикс этого индекса
+    # (и ix_orders_user_status), их хватает и для ON DELETE CASCADE.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_orders_user_id_created_at_id",
+            "orders",
+            ["user_id", "created_at", "id"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_orders_user_id",
+            table_name="orders",
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_orders_user_id",
+            "orders",
+            ["user_id"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_orders_user_id_created_at_id",
+            table_name="orders",
+            postgresql_concurrently=True,
+        )
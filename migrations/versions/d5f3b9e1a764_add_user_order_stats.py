@@ -0,0 +1,88 @@
+"""add user order stats
+
+Revision ID: d5f3b9e1a764
+Revises: c8e1a5d7f240
+Create Date: 2026-10-17 19:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision: str = "d5f3b9e1a764"
+down_revision: Union[str, Sequence[str], None] = "c8e1a5d7f240"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 5000  # пользователей на транзакцию
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "user_order_stats",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column(
+            "order_count", sa.Integer(), server_default=sa.text("0"), nullable=False
+        ),
+        sa.Column(
+            "paid_order_count",
+            sa.Integer(),
+            server_default=sa.text("0"),
+            nullable=False,
+        ),
+        sa.Column(
+            "lifetime_spend",
+            sa.Numeric(precision=12, scale=2),
+            server_default=sa.text("0"),
+            nullable=False,
+        ),
+        sa.Column("last_order_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("timezone('utc', now())"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+
+    # Заполнение из orders пачками по диапазонам user_id, каждая пачка
+    # в своей транзакции. Заказы, созданные между заполнением и выкладкой
+    # кода, который ведёт сводку, догонит сверка (app.services.order_stats).
+    with op.get_context().autocommit_block():
+        conn = op.get_bind()
+        max_id = conn.execute(sa.text("SELECT max(id) FROM users")).scalar()
+        last_id = 0
+        while max_id is not None and last_id < max_id:
+            conn.execute(
+                sa.text(
+                    """
+                    INSERT INTO user_order_stats
+                        (user_id, order_count, paid_order_count, lifetime_spend,
+                         last_order_at)
+                    SELECT user_id,
+                           count(*),
+                           count(*) FILTER (
+                               WHERE status IN ('PAID', 'SHIPPED', 'DELIVERED')),
+                           coalesce(sum(total_price) FILTER (
+                               WHERE status IN ('PAID', 'SHIPPED', 'DELIVERED')), 0),
+                           max(created_at)
+                    FROM orders
+                    WHERE user_id > :last_id AND user_id <= :upper
+                    GROUP BY user_id
+                    ON CONFLICT (user_id) DO NOTHING
+                    """
+                ),
+                {"last_id": last_id, "upper": last_id + BACKFILL_BATCH_SIZE},
+            )
+            last_id += BACKFILL_BATCH_SIZE
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("user_order_stats")
@@ -0,0 +1,48 @@
+"""add payment refund flag
+
+Revision ID: d7a1c5e3b902
+Revises: c3e8a6f2d417
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision: str = "d7a1c5e3b902"
+down_revision: Union[str, Sequence[str], None] = "c3e8a6f2d417"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Деньги списаны, а заказ не оплачен (поздний webhook для истёкшего
+    # платежа или отменённого заказа) - очередь на возврат.
+    op.add_column(
+        "payments",
+        sa.Column("refund_required_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_payments_refund_required",
+            "payments",
+            ["refund_required_at"],
+            unique=False,
+            postgresql_where=sa.text("refund_required_at IS NOT NULL"),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_payments_refund_required",
+            table_name="payments",
+            postgresql_concurrently=True,
+        )
+    op.drop_column("payments", "refund_required_at")
@@ -0,0 +1,56 @@
+"""products updated_at on catalog changes only
+
+Revision ID: e2b8d4f6a193
+Revises: d7a1c5e3b902
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "e2b8d4f6a193"
+down_revision: Union[str, Sequence[str], None] = "d7a1c5e3b902"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Карточка товара - то, что видит каталог; stock - только переход через ноль
+# (товар кончился / появился), иначе каждая покупка меняла бы updated_at.
+CATALOG_CHANGED = """
+    (OLD.name, OLD.description, OLD.price, OLD.is_active, OLD.category_id)
+        IS DISTINCT FROM
+    (NEW.name, NEW.description, NEW.price, NEW.is_active, NEW.category_id)
+    OR (OLD.stock > 0) IS DISTINCT FROM (NEW.stock > 0)
+"""
+
+
+def _recreate_trigger(condition: str) -> None:
+    op.execute("DROP TRIGGER IF EXISTS trg_products_updated_at ON products")
+    op.execute(
+        f"""
+        CREATE TRIGGER trg_products_updated_at
+        BEFORE UPDATE ON products
+        FOR EACH ROW WHEN ({condition})
+        EXECUTE FUNCTION set_updated_at()
+        """
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Списание остатка при заказе меняло updated_at, а он в индексе
+    # ix_products_updated_at_id: UPDATE не мог быть HOT и писал во все
+    # индексы товаров, включая GIN (search_vector, name_trgm). Теперь такой
+    # UPDATE меняет только stock (без индексов) и при свободном месте на
+    # странице идёт HOT. fillfactor действует на новые страницы; старые
+    # освободятся по мере VACUUM / перезаписи строк.
+    _recreate_trigger(CATALOG_CHANGED)
+    op.execute("ALTER TABLE products SET (fillfactor = 90)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("ALTER TABLE products RESET (fillfactor)")
+    _recreate_trigger("OLD::text IS DISTINCT FROM NEW::text")
@@ -0,0 +1,49 @@
+"""add product sort indexes
+
+Revision ID: e41b7c9d2f03
+Revises: 5c1d2e8a9b47
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "e41b7c9d2f03"
+down_revision: Union[str, Sequence[str], None] = "5c1d2e8a9b47"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = {
+    "ix_products_price_id": ["price", "id"],
+    "ix_products_category_id_price_id": ["category_id", "price", "id"],
+    "ix_products_created_at_id": ["created_at", "id"],
+    "ix_products_category_id_created_at_id": ["category_id", "created_at", "id"],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY: каталог большой, нельзя блокировать запись на время сборки
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES.items():
+            op.create_index(
+                name,
+                "products",
+                columns,
+                unique=False,
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name="products",
+                postgresql_concurrently=True,
+            )
@@ -0,0 +1,46 @@
+"""fix updated_at trigger condition
+
+Revision ID: f1b7d3c9a526
+Revises: d5f3b9e1a764
+Create Date: 2026-10-17 19:30:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "f1b7d3c9a526"
+down_revision: Union[str, Sequence[str], None] = "d5f3b9e1a764"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Таблицы с TimestampMixin.updated_at (см. 7a9e3c1f5b22)
+TABLES = ("categories", "products", "users", "orders", "payments")
+
+
+def _recreate_triggers(condition: str) -> None:
+    for table in TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS trg_{table}_updated_at ON {table}")
+        op.execute(
+            f"""
+            CREATE TRIGGER trg_{table}_updated_at
+            BEFORE UPDATE ON {table}
+            FOR EACH ROW WHEN ({condition})
+            EXECUTE FUNCTION set_updated_at()
+            """
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # OLD.* IS DISTINCT FROM NEW.* сравнивает колонки по очереди и падает
+    # на json (payments.provider_payload): у типа json нет оператора "=".
+    # Текстовое представление строки сравнивается для любых типов.
+    _recreate_triggers("OLD::text IS DISTINCT FROM NEW::text")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _recreate_triggers("OLD.* IS DISTINCT FROM NEW.*")